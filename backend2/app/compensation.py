@@ -0,0 +1,71 @@
+"""
+Compensation normalization for TalentGraph V2
+Converts salary ranges to annual amounts in one base currency when job
+postings and job profiles are written, using an offline FX table
+"""
+
+import json
+import math
+import os
+from typing import Dict, Optional, Tuple
+
+from app.values import enum_value
+
+BASE_CURRENCY = "usd"
+
+# Units of BASE_CURRENCY per unit of each currency; override or extend with a
+# JSON object in FX_RATES, e.g. {"gbp": 1.25}
+FX_RATES: Dict[str, float] = {
+    "usd": 1.0,
+    "eur": 1.08,
+    "gbp": 1.27,
+}
+FX_RATES.update({code.lower(): float(rate) for code, rate in json.loads(os.getenv("FX_RATES") or "{}").items()})
+if any(rate <= 0 for rate in FX_RATES.values()):
+    raise RuntimeError("FX_RATES must all be positive")
+
+# Paid hours in a year of full-time work (40 hours x 52 weeks)
+HOURS_PER_YEAR = float(os.getenv("HOURS_PER_YEAR", "2080"))
+if HOURS_PER_YEAR <= 0:
+    raise RuntimeError("HOURS_PER_YEAR must be positive")
+
+# Pay periods per year by pay_type; rows without a pay_type are annual
+PERIODS_PER_YEAR: Dict[str, float] = {
+    "hourly": HOURS_PER_YEAR,
+    "daily": HOURS_PER_YEAR / 8,
+    "weekly": 52,
+    "monthly": 12,
+    "annually": 1,
+    "annual": 1,
+    "yearly": 1,
+}
+
+
+def annual_range(salary_min, salary_max, currency, pay_type) -> Optional[Tuple[float, float]]:
+    """
+    (min, max) per year in BASE_CURRENCY, with open ends as 0 / inf; None
+    when a bound is not numeric or the currency or pay_type is unknown
+    """
+    rate = FX_RATES.get(str(enum_value(currency) or BASE_CURRENCY).lower())
+    periods = PERIODS_PER_YEAR.get(str(pay_type).strip().lower()) if pay_type else 1
+    if rate is None or periods is None:
+        return None
+    try:
+        low = float(salary_min) if salary_min else 0
+        high = float(salary_max) if salary_max else math.inf
+    except (TypeError, ValueError):
+        return None
+    return low * rate * periods, high * rate * periods
+
+
+def normalize_compensation(row):
+    """
+    Store the annual range of a JobPosting or JobProfile on the row. An open
+    maximum is stored as NULL; a NULL minimum means the salary cannot be compared.
+    """
+    bounds = annual_range(row.salary_min, row.salary_max, row.salary_currency, row.pay_type)
+    if bounds is None:
+        row.annual_salary_min = row.annual_salary_max = None
+    else:
+        row.annual_salary_min = bounds[0]
+        row.annual_salary_max = bounds[1] if math.isfinite(bounds[1]) else None
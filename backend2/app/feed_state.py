@@ -0,0 +1,79 @@
+"""
+Feed state for TalentGraph V2 recommendation feeds
+The viewer's swipes, matches and applications for one page of a feed,
+loaded in three set queries so every row is annotated with dict lookups
+"""
+
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import gather_queries
+from app.models import Application, Match, Swipe
+
+
+class FeedState(NamedTuple):
+    """First swipe, match and application per feed item (candidate_id or job_posting_id)"""
+    swipes: Dict[int, Swipe]
+    matches: Dict[int, Match]
+    applications: Dict[int, Application]
+
+
+def _first_by(records: Iterable, key: str) -> dict:
+    first = {}
+    for record in records:
+        first.setdefault(getattr(record, key), record)
+    return first
+
+
+async def posting_feed_state(session: AsyncSession, job_posting_id: int, candidate_ids: Optional[Iterable[int]] = None,
+                             company_id: Optional[int] = None, swipe_actor: Optional[str] = None) -> FeedState:
+    """
+    State of a recruiter's candidate feed for one posting, keyed by
+    candidate_id. Swipes and matches are narrowed to `company_id` and swipes
+    to `swipe_actor` when given; `candidate_ids` limits it to one page.
+    """
+    swipes = select(Swipe).where(Swipe.job_posting_id == job_posting_id)
+    matches = select(Match).where(Match.job_posting_id == job_posting_id)
+    applications = select(Application).where(Application.job_posting_id == job_posting_id)
+    if company_id is not None:
+        swipes = swipes.where(Swipe.company_id == company_id)
+        matches = matches.where(Match.company_id == company_id)
+    if swipe_actor is not None:
+        swipes = swipes.where(Swipe.action_by == swipe_actor)
+    if candidate_ids is not None:
+        candidate_ids = list(candidate_ids)
+        swipes = swipes.where(Swipe.candidate_id.in_(candidate_ids))
+        matches = matches.where(Match.candidate_id.in_(candidate_ids))
+        applications = applications.where(Application.candidate_id.in_(candidate_ids))
+    swipe_rows, match_rows, application_rows = await gather_queries(
+        session, swipes.order_by(Swipe.id), matches.order_by(Match.id), applications.order_by(Application.id)
+    )
+    return FeedState(
+        swipes=_first_by(swipe_rows, "candidate_id"),
+        matches=_first_by(match_rows, "candidate_id"),
+        applications=_first_by(application_rows, "candidate_id"),
+    )
+
+
+async def candidate_feed_state(session: AsyncSession, candidate_id: int, job_posting_ids: Iterable[int],
+                               swipe_actor: Optional[str] = None) -> FeedState:
+    """State of a candidate's job feed for the postings on one page, keyed by job_posting_id"""
+    job_posting_ids = list(job_posting_ids)
+    swipes = select(Swipe).where(Swipe.candidate_id == candidate_id, Swipe.job_posting_id.in_(job_posting_ids))
+    if swipe_actor is not None:
+        swipes = swipes.where(Swipe.action_by == swipe_actor)
+    swipe_rows, match_rows, application_rows = await gather_queries(
+        session,
+        swipes.order_by(Swipe.id),
+        select(Match).where(Match.candidate_id == candidate_id, Match.job_posting_id.in_(job_posting_ids))
+        .order_by(Match.id),
+        select(Application).where(Application.candidate_id == candidate_id, Application.job_posting_id.in_(job_posting_ids))
+        .order_by(Application.id),
+    )
+    return FeedState(
+        swipes=_first_by(swipe_rows, "job_posting_id"),
+        matches=_first_by(match_rows, "job_posting_id"),
+        applications=_first_by(application_rows, "job_posting_id"),
+    )
@@ -0,0 +1,444 @@
+"""
+Offline gazetteer for TalentGraph V2
+Resolves job posting locations and location preferences to coordinates and a
+region (US state or country) when rows are written, and a grid index that
+finds the points within N miles of another without scanning them all
+"""
+
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from app.values import enum_value
+
+# Postings and preferences this close count as the same place
+GEO_MATCH_RADIUS_MILES = float(os.getenv("GEO_MATCH_RADIUS_MILES", "50"))
+if GEO_MATCH_RADIUS_MILES <= 0:
+    raise RuntimeError("GEO_MATCH_RADIUS_MILES must be positive")
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * math.pi / 180
+
+# ============ GAZETTEER ============
+# Regions are "US-<state>" for the US and ISO 3166 country codes elsewhere
+
+US_STATES = [
+    # (code, name, latitude, longitude of the geographic center)
+    ("AL", "Alabama", 32.806, -86.791), ("AK", "Alaska", 61.370, -152.404),
+    ("AZ", "Arizona", 33.729, -111.431), ("AR", "Arkansas", 34.970, -92.373),
+    ("CA", "California", 36.116, -119.682), ("CO", "Colorado", 39.060, -105.311),
+    ("CT", "Connecticut", 41.598, -72.755), ("DE", "Delaware", 39.319, -75.507),
+    ("DC", "District of Columbia", 38.897, -77.026), ("FL", "Florida", 27.766, -81.687),
+    ("GA", "Georgia", 33.041, -83.643), ("HI", "Hawaii", 21.094, -157.498),
+    ("ID", "Idaho", 44.240, -114.479), ("IL", "Illinois", 40.349, -88.986),
+    ("IN", "Indiana", 39.849, -86.258), ("IA", "Iowa", 42.012, -93.211),
+    ("KS", "Kansas", 38.527, -96.726), ("KY", "Kentucky", 37.668, -84.670),
+    ("LA", "Louisiana", 31.169, -91.868), ("ME", "Maine", 44.693, -69.382),
+    ("MD", "Maryland", 39.064, -76.802), ("MA", "Massachusetts", 42.230, -71.530),
+    ("MI", "Michigan", 43.327, -84.536), ("MN", "Minnesota", 45.694, -93.900),
+    ("MS", "Mississippi", 32.742, -89.679), ("MO", "Missouri", 38.456, -92.288),
+    ("MT", "Montana", 46.922, -110.454), ("NE", "Nebraska", 41.125, -98.268),
+    ("NV", "Nevada", 38.313, -117.055), ("NH", "New Hampshire", 43.452, -71.564),
+    ("NJ", "New Jersey", 40.299, -74.521), ("NM", "New Mexico", 34.841, -106.249),
+    ("NY", "New York", 42.166, -74.948), ("NC", "North Carolina", 35.630, -79.806),
+    ("ND", "North Dakota", 47.529, -99.784), ("OH", "Ohio", 40.388, -82.765),
+    ("OK", "Oklahoma", 35.565, -96.929), ("OR", "Oregon", 44.572, -122.071),
+    ("PA", "Pennsylvania", 40.591, -77.210), ("RI", "Rhode Island", 41.681, -71.512),
+    ("SC", "South Carolina", 33.857, -80.945), ("SD", "South Dakota", 44.300, -99.439),
+    ("TN", "Tennessee", 35.748, -86.692), ("TX", "Texas", 31.054, -97.563),
+    ("UT", "Utah", 40.150, -111.862), ("VT", "Vermont", 44.045, -72.710),
+    ("VA", "Virginia", 37.769, -78.170), ("WA", "Washington", 47.401, -121.491),
+    ("WV", "West Virginia", 38.491, -80.954), ("WI", "Wisconsin", 44.269, -89.616),
+    ("WY", "Wyoming", 42.756, -107.302), ("PR", "Puerto Rico", 18.221, -66.590),
+]
+
+COUNTRIES = {
+    "US": ["united states", "united states of america", "usa", "us", "u.s.", "u.s.a.", "america"],
+    "CA": ["canada"],
+    "MX": ["mexico"],
+    "BR": ["brazil"],
+    "GB": ["united kingdom", "uk", "u.k.", "great britain", "england", "scotland", "wales"],
+    "IE": ["ireland"],
+    "DE": ["germany", "deutschland"],
+    "NL": ["netherlands", "the netherlands", "holland"],
+    "FR": ["france"],
+    "ES": ["spain"],
+    "PT": ["portugal"],
+    "CH": ["switzerland"],
+    "SE": ["sweden"],
+    "PL": ["poland"],
+    "IN": ["india"],
+    "SG": ["singapore"],
+    "JP": ["japan"],
+    "AU": ["australia"],
+    "AE": ["united arab emirates", "uae"],
+    "IL": ["israel"],
+    "PH": ["philippines"],
+}
+
+# (city, state code, latitude, longitude); where a name is shared, the first
+# entry wins for lookups that give no state or country
+US_CITIES = [
+    ("New York", "NY", 40.7128, -74.0060), ("Los Angeles", "CA", 34.0522, -118.2437),
+    ("Chicago", "IL", 41.8781, -87.6298), ("Houston", "TX", 29.7604, -95.3698),
+    ("Phoenix", "AZ", 33.4484, -112.0740), ("Philadelphia", "PA", 39.9526, -75.1652),
+    ("San Antonio", "TX", 29.4241, -98.4936), ("San Diego", "CA", 32.7157, -117.1611),
+    ("Dallas", "TX", 32.7767, -96.7970), ("San Jose", "CA", 37.3382, -121.8863),
+    ("Austin", "TX", 30.2672, -97.7431), ("Jacksonville", "FL", 30.3322, -81.6557),
+    ("Fort Worth", "TX", 32.7555, -97.3308), ("Columbus", "OH", 39.9612, -82.9988),
+    ("Charlotte", "NC", 35.2271, -80.8431), ("San Francisco", "CA", 37.7749, -122.4194),
+    ("Indianapolis", "IN", 39.7684, -86.1581), ("Seattle", "WA", 47.6062, -122.3321),
+    ("Denver", "CO", 39.7392, -104.9903), ("Washington", "DC", 38.9072, -77.0369),
+    ("Boston", "MA", 42.3601, -71.0589), ("El Paso", "TX", 31.7619, -106.4850),
+    ("Nashville", "TN", 36.1627, -86.7816), ("Detroit", "MI", 42.3314, -83.0458),
+    ("Oklahoma City", "OK", 35.4676, -97.5164), ("Portland", "OR", 45.5152, -122.6784),
+    ("Las Vegas", "NV", 36.1699, -115.1398), ("Memphis", "TN", 35.1495, -90.0490),
+    ("Louisville", "KY", 38.2527, -85.7585), ("Baltimore", "MD", 39.2904, -76.6122),
+    ("Milwaukee", "WI", 43.0389, -87.9065), ("Albuquerque", "NM", 35.0844, -106.6504),
+    ("Tucson", "AZ", 32.2226, -110.9747), ("Fresno", "CA", 36.7378, -119.7871),
+    ("Sacramento", "CA", 38.5816, -121.4944), ("Kansas City", "MO", 39.0997, -94.5786),
+    ("Mesa", "AZ", 33.4152, -111.8315), ("Atlanta", "GA", 33.7490, -84.3880),
+    ("Omaha", "NE", 41.2565, -95.9345), ("Colorado Springs", "CO", 38.8339, -104.8214),
+    ("Raleigh", "NC", 35.7796, -78.6382), ("Long Beach", "CA", 33.7701, -118.1937),
+    ("Virginia Beach", "VA", 36.8529, -75.9780), ("Miami", "FL", 25.7617, -80.1918),
+    ("Oakland", "CA", 37.8044, -122.2712), ("Minneapolis", "MN", 44.9778, -93.2650),
+    ("Tulsa", "OK", 36.1540, -95.9928), ("Tampa", "FL", 27.9506, -82.4572),
+    ("Arlington", "TX", 32.7357, -97.1081), ("New Orleans", "LA", 29.9511, -90.0715),
+    ("Wichita", "KS", 37.6872, -97.3301), ("Cleveland", "OH", 41.4993, -81.6944),
+    ("Bakersfield", "CA", 35.3733, -119.0187), ("Aurora", "CO", 39.7294, -104.8319),
+    ("Anaheim", "CA", 33.8366, -117.9143), ("Honolulu", "HI", 21.3069, -157.8583),
+    ("Santa Ana", "CA", 33.7455, -117.8677), ("Riverside", "CA", 33.9806, -117.3755),
+    ("Corpus Christi", "TX", 27.8006, -97.3964), ("Lexington", "KY", 38.0406, -84.5037),
+    ("Stockton", "CA", 37.9577, -121.2908), ("Henderson", "NV", 36.0395, -114.9817),
+    ("Saint Paul", "MN", 44.9537, -93.0900), ("St. Louis", "MO", 38.6270, -90.1994),
+    ("Cincinnati", "OH", 39.1031, -84.5120), ("Pittsburgh", "PA", 40.4406, -79.9959),
+    ("Greensboro", "NC", 36.0726, -79.7920), ("Anchorage", "AK", 61.2181, -149.9003),
+    ("Plano", "TX", 33.0198, -96.6989), ("Lincoln", "NE", 40.8136, -96.7026),
+    ("Orlando", "FL", 28.5383, -81.3792), ("Irvine", "CA", 33.6846, -117.8265),
+    ("Newark", "NJ", 40.7357, -74.1724), ("Toledo", "OH", 41.6528, -83.5379),
+    ("Durham", "NC", 35.9940, -78.8986), ("Chula Vista", "CA", 32.6401, -117.0842),
+    ("Fort Wayne", "IN", 41.0793, -85.1394), ("Jersey City", "NJ", 40.7178, -74.0431),
+    ("St. Petersburg", "FL", 27.7676, -82.6403), ("Laredo", "TX", 27.5306, -99.4803),
+    ("Madison", "WI", 43.0731, -89.4012), ("Chandler", "AZ", 33.3062, -111.8413),
+    ("Buffalo", "NY", 42.8864, -78.8784), ("Lubbock", "TX", 33.5779, -101.8552),
+    ("Scottsdale", "AZ", 33.4942, -111.9261), ("Reno", "NV", 39.5296, -119.8138),
+    ("Glendale", "AZ", 33.5387, -112.1860), ("Gilbert", "AZ", 33.3528, -111.7890),
+    ("Winston-Salem", "NC", 36.0999, -80.2442), ("Irving", "TX", 32.8140, -96.9489),
+    ("Chesapeake", "VA", 36.7682, -76.2875), ("Norfolk", "VA", 36.8508, -76.2859),
+    ("Fremont", "CA", 37.5485, -121.9886), ("Garland", "TX", 32.9126, -96.6389),
+    ("Boise", "ID", 43.6150, -116.2023), ("Richmond", "VA", 37.5407, -77.4360),
+    ("Baton Rouge", "LA", 30.4515, -91.1871), ("Spokane", "WA", 47.6588, -117.4260),
+    ("Des Moines", "IA", 41.5868, -93.6250), ("Tacoma", "WA", 47.2529, -122.4443),
+    ("San Bernardino", "CA", 34.1083, -117.2898), ("Modesto", "CA", 37.6391, -120.9969),
+    ("Santa Clarita", "CA", 34.3917, -118.5426), ("Birmingham", "AL", 33.5186, -86.8104),
+    ("Oxnard", "CA", 34.1975, -119.1771), ("Fayetteville", "NC", 35.0527, -78.8784),
+    ("Rochester", "NY", 43.1566, -77.6088), ("Salt Lake City", "UT", 40.7608, -111.8910),
+    ("Grand Rapids", "MI", 42.9634, -85.6681), ("Huntsville", "AL", 34.7304, -86.5861),
+    ("Knoxville", "TN", 35.9606, -83.9207), ("Worcester", "MA", 42.2626, -71.8023),
+    ("Providence", "RI", 41.8240, -71.4128), ("Chattanooga", "TN", 35.0456, -85.3097),
+    ("Fort Lauderdale", "FL", 26.1224, -80.1373), ("Sunnyvale", "CA", 37.3688, -122.0363),
+    ("Santa Clara", "CA", 37.3541, -121.9552), ("Mountain View", "CA", 37.3861, -122.0839),
+    ("Palo Alto", "CA", 37.4419, -122.1430), ("Redwood City", "CA", 37.4852, -122.2364),
+    ("Menlo Park", "CA", 37.4530, -122.1817), ("Cupertino", "CA", 37.3230, -122.0322),
+    ("Berkeley", "CA", 37.8715, -122.2730), ("Pasadena", "CA", 34.1478, -118.1445),
+    ("Santa Monica", "CA", 34.0195, -118.4912), ("Bellevue", "WA", 47.6101, -122.2015),
+    ("Redmond", "WA", 47.6740, -122.1215), ("Kirkland", "WA", 47.6815, -122.2087),
+    ("Cambridge", "MA", 42.3736, -71.1097), ("Hartford", "CT", 41.7658, -72.6734),
+    ("Stamford", "CT", 41.0534, -73.5387), ("New Haven", "CT", 41.3083, -72.9279),
+    ("Boulder", "CO", 40.0150, -105.2705), ("Ann Arbor", "MI", 42.2808, -83.7430),
+    ("Columbia", "SC", 34.0007, -81.0348), ("Charleston", "SC", 32.7765, -79.9311),
+    ("Greenville", "SC", 34.8526, -82.3940), ("Savannah", "GA", 32.0809, -81.0912),
+    ("Little Rock", "AR", 34.7465, -92.2896), ("Jackson", "MS", 32.2988, -90.1848),
+    ("Manchester", "NH", 42.9956, -71.4548), ("Portland", "ME", 43.6591, -70.2568),
+    ("Burlington", "VT", 44.4759, -73.2121), ("Wilmington", "DE", 39.7391, -75.5398),
+    ("Charleston", "WV", 38.3498, -81.6326), ("Billings", "MT", 45.7833, -108.5007),
+    ("Fargo", "ND", 46.8772, -96.7898), ("Sioux Falls", "SD", 43.5446, -96.7311),
+    ("Cheyenne", "WY", 41.1400, -104.8202), ("Salem", "OR", 44.9429, -123.0351),
+    ("Eugene", "OR", 44.0521, -123.0868), ("Albany", "NY", 42.6526, -73.7562),
+    ("Syracuse", "NY", 43.0481, -76.1474), ("Trenton", "NJ", 40.2206, -74.7597),
+    ("Princeton", "NJ", 40.3573, -74.6672), ("Harrisburg", "PA", 40.2732, -76.8867),
+    ("Allentown", "PA", 40.6023, -75.4714), ("Dayton", "OH", 39.7589, -84.1916),
+    ("Akron", "OH", 41.0814, -81.5190), ("Tallahassee", "FL", 30.4383, -84.2807),
+    ("Boca Raton", "FL", 26.3683, -80.1289), ("West Palm Beach", "FL", 26.7153, -80.0534),
+    ("Arlington", "VA", 38.8816, -77.0910), ("Alexandria", "VA", 38.8048, -77.0469),
+    ("Reston", "VA", 38.9586, -77.3570), ("McLean", "VA", 38.9339, -77.1773),
+    ("Herndon", "VA", 38.9696, -77.3861), ("Bethesda", "MD", 38.9807, -77.1003),
+    ("Rockville", "MD", 39.0840, -77.1528), ("Columbia", "MD", 39.2037, -76.8610),
+    ("Frisco", "TX", 33.1507, -96.8236), ("McKinney", "TX", 33.1972, -96.6398),
+    ("Round Rock", "TX", 30.5083, -97.6789), ("The Woodlands", "TX", 30.1658, -95.4613),
+    ("Tempe", "AZ", 33.4255, -111.9400), ("Provo", "UT", 40.2338, -111.6585),
+    ("Lehi", "UT", 40.3916, -111.8508), ("Cary", "NC", 35.7915, -78.7811),
+    ("Chapel Hill", "NC", 35.9132, -79.0558), ("Overland Park", "KS", 38.9822, -94.6708),
+    ("Springfield", "IL", 39.7817, -89.6501), ("Springfield", "MO", 37.2090, -93.2923),
+    ("Springfield", "MA", 42.1015, -72.5898), ("Montgomery", "AL", 32.3792, -86.3077),
+    ("Mobile", "AL", 30.6954, -88.0399), ("Juneau", "AK", 58.3019, -134.4197),
+    ("San Juan", "PR", 18.4655, -66.1057),
+]
+
+# (city, country code, latitude, longitude)
+WORLD_CITIES = [
+    ("Toronto", "CA", 43.6532, -79.3832), ("Vancouver", "CA", 49.2827, -123.1207),
+    ("Montreal", "CA", 45.5017, -73.5673), ("Ottawa", "CA", 45.4215, -75.6972),
+    ("Calgary", "CA", 51.0447, -114.0719), ("Mexico City", "MX", 19.4326, -99.1332),
+    ("Guadalajara", "MX", 20.6597, -103.3496), ("Sao Paulo", "BR", -23.5505, -46.6333),
+    ("London", "GB", 51.5074, -0.1278), ("Manchester", "GB", 53.4808, -2.2426),
+    ("Edinburgh", "GB", 55.9533, -3.1883), ("Dublin", "IE", 53.3498, -6.2603),
+    ("Berlin", "DE", 52.5200, 13.4050), ("Munich", "DE", 48.1351, 11.5820),
+    ("Frankfurt", "DE", 50.1109, 8.6821), ("Hamburg", "DE", 53.5511, 9.9937),
+    ("Amsterdam", "NL", 52.3676, 4.9041), ("Paris", "FR", 48.8566, 2.3522),
+    ("Madrid", "ES", 40.4168, -3.7038), ("Barcelona", "ES", 41.3851, 2.1734),
+    ("Lisbon", "PT", 38.7223, -9.1393), ("Zurich", "CH", 47.3769, 8.5417),
+    ("Stockholm", "SE", 59.3293, 18.0686), ("Warsaw", "PL", 52.2297, 21.0122),
+    ("Bengaluru", "IN", 12.9716, 77.5946), ("Hyderabad", "IN", 17.3850, 78.4867),
+    ("Chennai", "IN", 13.0827, 80.2707), ("Pune", "IN", 18.5204, 73.8567),
+    ("Mumbai", "IN", 19.0760, 72.8777), ("New Delhi", "IN", 28.6139, 77.2090),
+    ("Gurugram", "IN", 28.4595, 77.0266), ("Noida", "IN", 28.5355, 77.3910),
+    ("Kolkata", "IN", 22.5726, 88.3639), ("Singapore", "SG", 1.3521, 103.8198),
+    ("Tokyo", "JP", 35.6762, 139.6503), ("Sydney", "AU", -33.8688, 151.2093),
+    ("Melbourne", "AU", -37.8136, 144.9631), ("Dubai", "AE", 25.2048, 55.2708),
+    ("Tel Aviv", "IL", 32.0853, 34.7818), ("Manila", "PH", 14.5995, 120.9842),
+]
+
+# Other names of gazetteer cities (alias -> city, region code)
+CITY_ALIASES = {
+    "nyc": ("New York", "US-NY"),
+    "new york city": ("New York", "US-NY"),
+    "manhattan": ("New York", "US-NY"),
+    "brooklyn": ("New York", "US-NY"),
+    "la": ("Los Angeles", "US-CA"),
+    "sf": ("San Francisco", "US-CA"),
+    "bay area": ("San Francisco", "US-CA"),
+    "sf bay area": ("San Francisco", "US-CA"),
+    "silicon valley": ("San Jose", "US-CA"),
+    "dfw": ("Dallas", "US-TX"),
+    "washington dc": ("Washington", "US-DC"),
+    "washington d.c.": ("Washington", "US-DC"),
+    "d.c.": ("Washington", "US-DC"),
+    "st paul": ("Saint Paul", "US-MN"),
+    "saint louis": ("St. Louis", "US-MO"),
+    "st louis": ("St. Louis", "US-MO"),
+    "st petersburg": ("St. Petersburg", "US-FL"),
+    "bangalore": ("Bengaluru", "IN"),
+    "delhi": ("New Delhi", "IN"),
+    "gurgaon": ("Gurugram", "IN"),
+    "bombay": ("Mumbai", "IN"),
+    "madras": ("Chennai", "IN"),
+    "calcutta": ("Kolkata", "IN"),
+    "munchen": ("Munich", "DE"),
+    "münchen": ("Munich", "DE"),
+    "zürich": ("Zurich", "CH"),
+    "são paulo": ("Sao Paulo", "BR"),
+}
+
+# Preference values meaning "anywhere, remotely" rather than a place
+REMOTE_NAMES = {"remote", "anywhere", "nationwide", "work from home", "wfh", "any", "any location"}
+
+
+class Place(NamedTuple):
+    """A resolved location: coordinates for a known city, only a region for a state or country"""
+    latitude: Optional[float]
+    longitude: Optional[float]
+    region: Optional[str]          # "US-TX", or a country code outside the US; None when unresolved
+    remote: bool = False           # a "Remote" location preference
+
+    @property
+    def precise(self) -> bool:
+        return self.latitude is not None
+
+
+UNRESOLVED = Place(None, None, None)
+
+
+def _key(text) -> str:
+    """Lower-cased text with whitespace collapsed and surrounding punctuation trimmed"""
+    if not text:
+        return ""
+    return " ".join(str(text).lower().split()).strip(" ,.;:-")
+
+
+def _build_lookups():
+    states: Dict[str, str] = {_key("d.c."): "US-DC"}
+    for code, name, _, _ in US_STATES:
+        states[code.lower()] = states[name.lower()] = f"US-{code}"
+    countries: Dict[str, str] = {}
+    for code, names in COUNTRIES.items():
+        for name in names:
+            countries[name] = code
+    cities: Dict[str, List[Place]] = {}
+    for name, code, lat, lon in US_CITIES:
+        cities.setdefault(_key(name), []).append(Place(lat, lon, f"US-{code}"))
+    for name, code, lat, lon in WORLD_CITIES:
+        cities.setdefault(_key(name), []).append(Place(lat, lon, code))
+    for alias, (name, region) in CITY_ALIASES.items():
+        cities[_key(alias)] = [place for place in cities[_key(name)] if place.region == region]
+    return states, countries, cities
+
+
+_STATES, _COUNTRIES, _CITIES = _build_lookups()
+_SEGMENTS = re.compile(r"\s*(?:/|;|\||&|\bor\b)\s*")
+_PARTS = re.compile(r",|\s+-\s+")
+_PARENTHESES = re.compile(r"\([^)]*\)")
+
+
+def _country(key: str) -> Optional[str]:
+    """Country code of a country name or ISO code"""
+    return _COUNTRIES.get(key) or (key.upper() if key.upper() in COUNTRIES else None)
+
+
+@lru_cache(maxsize=65536)
+def resolve(city: Optional[str], state: Optional[str] = None, country: Optional[str] = None) -> Place:
+    """
+    Place of a city / state / country triple, as stored on a location
+    preference. A known city gives coordinates; otherwise a US state or
+    non-US country gives a region only. The state and country pick between
+    cities sharing a name ("Portland, ME"), and "IN" may be Indiana or India.
+    """
+    city_key, state_key, country_key = _key(city), _key(state), _key(country)
+    if city_key in REMOTE_NAMES or (not city_key and state_key in REMOTE_NAMES):
+        return Place(None, None, None, remote=True)
+
+    hints = [region for region in (_STATES.get(state_key), _country(state_key)) if region]
+    in_country = _country(country_key)
+    if in_country:
+        hints = [region for region in hints if region.split("-")[0] == in_country] or [in_country]
+
+    for place in _CITIES.get(city_key, ()):
+        if not hints or place.region in hints or place.region.split("-")[0] in hints:
+            return place
+    for region in hints:
+        if region != "US":  # the whole country is no place in particular
+            return Place(None, None, region)
+    return UNRESOLVED
+
+
+@lru_cache(maxsize=65536)
+def resolve_location(text: Optional[str]) -> Place:
+    """
+    Place of a free-text job posting location ("Austin, TX", "Berlin",
+    "Texas"). The first place named wins in "Austin, TX / Dallas, TX";
+    parenthesized notes and remote markers are ignored.
+    """
+    for segment in _SEGMENTS.split(text or ""):
+        parts = [_key(part) for part in _PARTS.split(_PARENTHESES.sub(" ", segment))]
+        parts = [part for part in parts if part and part not in REMOTE_NAMES]
+        if not parts:
+            continue
+        if len(parts) == 1:
+            place = resolve(parts[0])
+            if place.region is None:
+                place = resolve(None, parts[0])
+        else:
+            place = resolve(parts[0], parts[1], parts[2] if len(parts) > 2 else None)
+        if place.region is not None:
+            return place
+    return UNRESOLVED
+
+
+def distance_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def places_meet(a: Place, b: Place, miles: float = GEO_MATCH_RADIUS_MILES) -> bool:
+    """
+    Two cities within `miles` of each other, or a bare state/country and
+    anything in it
+    """
+    if a.region is None or b.region is None:
+        return False
+    if a.precise and b.precise:
+        return distance_miles(a.latitude, a.longitude, b.latitude, b.longitude) <= miles
+    return a.region == b.region
+
+
+# ============ WRITE-TIME RESOLUTION ============
+
+def locate_posting(job_posting):
+    """Store the place of a JobPosting's location and its remote flag on the row"""
+    place = resolve_location(job_posting.location)
+    job_posting.latitude, job_posting.longitude, job_posting.region_code = place.latitude, place.longitude, place.region
+    job_posting.is_remote = enum_value(job_posting.worktype) == "remote"
+
+
+def locate_preference(location_preference):
+    """Store the place of a LocationPreference's city/state/country on the row"""
+    place = resolve(location_preference.city, location_preference.state, location_preference.country)
+    location_preference.latitude, location_preference.longitude = place.latitude, place.longitude
+    location_preference.region_code = place.region
+    location_preference.is_remote = place.remote
+
+
+# ============ GRID INDEX ============
+
+class GeoGrid:
+    """
+    Points by document ID, bucketed into cells `cell_miles` of latitude
+    across. within() visits only the cells overlapping the bounding box of
+    a circle and checks the exact distance of the points in them, so a
+    lookup touches a handful of cells instead of every point.
+    """
+
+    def __init__(self, cell_miles: float = GEO_MATCH_RADIUS_MILES):
+        self._cell = cell_miles / MILES_PER_DEGREE  # cell edge in degrees
+        self._cells: Dict[Tuple[int, int], Dict[int, List[Tuple[float, float]]]] = {}
+        self._cells_of: Dict[int, Set[Tuple[int, int]]] = {}
+
+    def __len__(self):
+        return len(self._cells_of)
+
+    def _cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self._cell), math.floor(lon / self._cell)
+
+    def add(self, doc_id: int, points: Iterable[Tuple[float, float]]):
+        """Index a document's points, replacing any it had"""
+        self.remove(doc_id)
+        cells = set()
+        for lat, lon in points:
+            cell = self._cell_of(lat, lon)
+            self._cells.setdefault(cell, {}).setdefault(doc_id, []).append((lat, lon))
+            cells.add(cell)
+        if cells:
+            self._cells_of[doc_id] = cells
+
+    def remove(self, doc_id: int) -> bool:
+        cells = self._cells_of.pop(doc_id, None)
+        if cells is None:
+            return False
+        for cell in cells:
+            docs = self._cells[cell]
+            del docs[doc_id]
+            if not docs:
+                del self._cells[cell]
+        return True
+
+    def within(self, lat: float, lon: float, miles: float = GEO_MATCH_RADIUS_MILES) -> Set[int]:
+        """IDs of documents with a point no more than `miles` from (lat, lon)"""
+        dlat = miles / MILES_PER_DEGREE
+        edge = min(abs(lat) + dlat, 90.0)  # longitude degrees are shortest at the poleward edge
+        dlon = miles / (MILES_PER_DEGREE * max(math.cos(math.radians(edge)), 1e-9))
+        if dlon >= 180:
+            spans = [(-180.0, 180.0)]
+        else:
+            spans = [(max(lon - dlon, -180.0), min(lon + dlon, 180.0))]
+            if lon - dlon < -180:
+                spans.append((lon - dlon + 360, 180.0))
+            if lon + dlon > 180:
+                spans.append((-180.0, lon + dlon - 360))
+
+        found: Set[int] = set()
+        row_lo, row_hi = math.floor((lat - dlat) / self._cell), math.floor((lat + dlat) / self._cell)
+        for west, east in spans:
+            col_lo, col_hi = math.floor(west / self._cell), math.floor(east / self._cell)
+            for row in range(row_lo, row_hi + 1):
+                for col in range(col_lo, col_hi + 1):
+                    for doc_id, points in self._cells.get((row, col), {}).items():
+                        if doc_id not in found and any(
+                            distance_miles(lat, lon, p_lat, p_lon) <= miles for p_lat, p_lon in points
+                        ):
+                            found.add(doc_id)
+        return found
@@ -0,0 +1,186 @@
+"""
+Request identity for TalentGraph V2
+Resolves the JWT user_id to a cached Principal (user, candidate and company
+scope) so routes don't repeat User/Candidate/Company lookups
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from fastapi import Depends, HTTPException
+from sqlmodel import Session, select
+
+from app.database import get_session
+from app.models import Candidate, Company, User, UserRole
+from app.security import get_current_user_id
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+
+class Principal(NamedTuple):
+    """Who is calling: the user plus their candidate or company account"""
+    user_id: int
+    email: str
+    full_name: Optional[str]
+    role: UserRole
+    is_active: bool
+    candidate_id: Optional[int] = None
+    company_id: Optional[int] = None
+    company_name: Optional[str] = None
+    parent_company_id: Optional[int] = None
+    org_id: Optional[int] = None
+    company_ids: Tuple[int, ...] = ()  # every company account in the organization
+
+    @property
+    def is_candidate(self) -> bool:
+        return self.role == UserRole.CANDIDATE
+
+    @property
+    def primary_company_id(self) -> Optional[int]:
+        return self.parent_company_id or self.company_id
+
+
+class PrincipalCache:
+    """
+    Thread-safe TTL + LRU cache of principals keyed by user_id.
+
+    Entries are dropped explicitly when a route changes a user's role,
+    status or organization, and expire after `ttl` seconds otherwise, which bounds
+    how long another worker process can serve a stale principal.
+    """
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS, maxsize: int = PRINCIPAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[int, Tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by every invalidation
+
+    def get(self, user_id: int) -> Tuple[Optional[Principal], int]:
+        """Cached principal (or None) and the generation to pass to put()"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, principal = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    return principal, self._generation
+                del self._entries[user_id]
+            return None, self._generation
+
+    def put(self, principal: Principal, generation: int):
+        """Store a principal unless an invalidation ran since it was read"""
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[principal.user_id] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_id, None)
+
+    def invalidate_org(self, org_id: Optional[int]):
+        """Drop every principal whose company scope is organization `org_id`"""
+        with self._lock:
+            self._generation += 1
+            stale = [
+                user_id for user_id, (_, principal) in self._entries.items()
+                if principal.org_id == org_id
+            ]
+            for user_id in stale:
+                del self._entries[user_id]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+# Shared per-process cache
+principal_cache = PrincipalCache()
+
+
+def load_principal(session: Session, user_id: int) -> Optional[Principal]:
+    """Resolve a principal from the database, bypassing the cache"""
+    row = session.execute(
+        select(User, Candidate.id, Company.id, Company.company_name, Company.parent_company_id, Company.org_id)
+        .outerjoin(Candidate, Candidate.user_id == User.id)
+        .outerjoin(Company, Company.user_id == User.id)
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    user, candidate_id, company_id, company_name, parent_company_id, org_id = row
+
+    company_ids: Tuple[int, ...] = ()
+    if company_id is not None:
+        if org_id is not None:
+            scope = Company.org_id == org_id
+        else:
+            # Not linked yet (created outside the API before migration v003 ran)
+            scope = Company.company_name == company_name
+        company_ids = tuple(session.exec(select(Company.id).where(scope)).all())
+
+    return Principal(
+        user_id=user.id,
+        email=user.email,
+        full_name=user.full_name,
+        role=UserRole(user.role),
+        is_active=user.is_active,
+        candidate_id=candidate_id,
+        company_id=company_id,
+        company_name=company_name,
+        parent_company_id=parent_company_id,
+        org_id=org_id,
+        company_ids=company_ids,
+    )
+
+
+def get_current_principal(
+    user_id: int = Depends(get_current_user_id),
+    session: Session = Depends(get_session)
+) -> Principal:
+    """Principal for the JWT user_id, from the cache when possible"""
+    principal, generation = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    principal = load_principal(session, user_id)
+    if principal is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    # Users still onboarding gain a candidate/company row on their next call,
+    # possibly in another process, so only complete principals are cached
+    if principal.candidate_id is not None or principal.company_id is not None:
+        principal_cache.put(principal, generation)
+    return principal
+
+
+def get_current_candidate(principal: Principal = Depends(get_current_principal)) -> Principal:
+    """Principal of a candidate with a candidate profile"""
+    if not principal.is_candidate:
+        raise HTTPException(status_code=403, detail="Candidates only")
+    if principal.candidate_id is None:
+        raise HTTPException(status_code=404, detail="Candidate profile not found")
+    return principal
+
+
+def get_current_company_scope(principal: Principal = Depends(get_current_principal)) -> Principal:
+    """Principal of a recruiter with a company profile; company_ids is their scope"""
+    if principal.is_candidate:
+        raise HTTPException(status_code=403, detail="Recruiters only")
+    if principal.company_id is None:
+        raise HTTPException(status_code=404, detail="Company profile not found")
+    return principal
@@ -5,11 +5,16 @@ Runs on port 8001
 
 import logging
 import sys
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from app.database import init_db
+from app.database import async_engine, async_replica_engine, engine, is_statement_timeout, liveness_monitor, statement_timeout
+from app.migrations import check_schema_version
+from app.match_scores import match_score_materializer
+from app.swipe_decks import swipe_decks
 import os
 
 # Load environment variables from .env file
@@ -26,26 +31,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize database on startup
+# Check the schema on startup; `python -m app.migrations upgrade` creates/migrates it
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("[STARTUP] TalentGraph V2 API starting...")
-    init_db()
-    logger.info("[STARTUP] Database initialized successfully")
+    check_schema_version(engine)
+    logger.info("[STARTUP] Database schema is up to date")
+    match_score_materializer.start()
+    swipe_decks.start()
+    if liveness_monitor:
+        liveness_monitor.start()
     yield
     # Shutdown
     logger.info("[SHUTDOWN] TalentGraph V2 API shutting down...")
-    pass
+    if liveness_monitor:
+        await liveness_monitor.stop()
+    swipe_decks.stop()
+    match_score_materializer.stop()
+    await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
 
 
 app = FastAPI(
     title="TalentGraph V2 API",
     description="Candidate-centric talent marketplace",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    dependencies=[statement_timeout("default")]  # routers override with their own group
 )
 
+
+@app.exception_handler(DBAPIError)
+async def database_error_handler(request: Request, exc: DBAPIError):
+    """Statement timeouts become 503s; every other database error stays a 500"""
+    if is_statement_timeout(exc):
+        logger.warning(f"[DATABASE] Statement timeout on {request.method} {request.url.path}")
+        return JSONResponse(status_code=503, content={"detail": "Database query timed out"})
+    raise exc
+
 # CORS Configuration
 origins = [
     "http://localhost:3001",
@@ -64,6 +89,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -88,7 +114,7 @@ def health():
 
 
 # ============ ROUTERS ============
-from app.routers import auth, candidates, company, job_postings, matches, recommendations, swipes, dashboard, applications, subscriptions, team
+from app.routers import admin, auth, candidates, company, job_postings, matches, recommendations, swipes, dashboard, applications, subscriptions, team
 
 logger.info("[STARTUP] Registering routers...")
 app.include_router(auth.router)
@@ -102,6 +128,7 @@ app.include_router(dashboard.router)
 app.include_router(applications.router)
 app.include_router(subscriptions.router)
 app.include_router(team.router)
+app.include_router(admin.router)
 logger.info("[STARTUP] All routers registered successfully")
 
 
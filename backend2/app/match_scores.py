@@ -0,0 +1,393 @@
+"""
+Materialized match scores for TalentGraph V2
+A background worker keeps MatchScore rows current as profiles and postings
+change, so recommendation routes read ranked pages from an index
+"""
+
+import csv
+import io
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import and_, delete, distinct, func, or_, union_all
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+
+from app.database import dialect_insert, engine, sync_from_primary
+from app.models import JobPosting, JobProfile, MatchScore
+from app.pagination import Page, Ranked, keyset_page, top_k_page
+from app.scoring import MATCH_THRESHOLD, ProfileScores, profile_features, profile_matrix, score_many
+from app.search_index import posting_index, profile_index
+
+logger = logging.getLogger(__name__)
+
+POSTING = "posting"
+PROFILE = "profile"
+
+def _after(after: Optional[Tuple[int, int]], key_column):
+    """Rows ranked strictly after (score, key) in ORDER BY score DESC, key ASC"""
+    score, key = after
+    return or_(MatchScore.score < score, and_(MatchScore.score == score, key_column > key))
+
+
+def _ranked(row) -> Ranked:
+    return Ranked(row.score, row.key, row.group, json.loads(row.details))
+
+
+def read_posting_page(session: Session, job_posting_id: int, limit: Optional[int],
+                      cursor: Optional[str] = None) -> Tuple[Page, int]:
+    """
+    One page of the best profile per candidate for a posting, plus the number
+    of distinct candidates at or above the threshold. Page items carry the
+    score breakdown as `item`.
+    """
+    def fetch(after, n):
+        query = select(
+            MatchScore.score, MatchScore.job_profile_id.label("key"),
+            MatchScore.candidate_id.label("group"), MatchScore.details,
+        ).where(MatchScore.job_posting_id == job_posting_id)
+        if after is not None:
+            query = query.where(_after(after, MatchScore.job_profile_id))
+        query = query.order_by(MatchScore.score.desc(), MatchScore.job_profile_id).limit(n)
+        return [_ranked(row) for row in session.exec(query).all()]
+
+    def groups_before(position):
+        return set(session.exec(
+            select(distinct(MatchScore.candidate_id))
+            .where(MatchScore.job_posting_id == job_posting_id)
+            .where(~_after(position, MatchScore.job_profile_id))
+        ).all())
+
+    page = keyset_page(fetch, limit, cursor, groups_before)
+    total = session.exec(
+        select(func.count(distinct(MatchScore.candidate_id))).where(MatchScore.job_posting_id == job_posting_id)
+    ).one()
+    return page, total
+
+
+def read_profile_page(session: Session, job_profile_id: int, limit: Optional[int],
+                      cursor: Optional[str] = None) -> Tuple[Page, int]:
+    """One page of active postings for a profile, plus how many there are"""
+    def fetch(after, n):
+        query = (
+            select(MatchScore.score, MatchScore.job_posting_id.label("key"), MatchScore.details)
+            .join(JobPosting, JobPosting.id == MatchScore.job_posting_id)
+            .where(MatchScore.job_profile_id == job_profile_id)
+            .where(JobPosting.is_active == True)
+        )
+        if after is not None:
+            query = query.where(_after(after, MatchScore.job_posting_id))
+        query = query.order_by(MatchScore.score.desc(), MatchScore.job_posting_id).limit(n)
+        return [Ranked(row.score, row.key, None, json.loads(row.details)) for row in session.exec(query).all()]
+
+    page = keyset_page(fetch, limit, cursor)
+    total = session.exec(
+        select(func.count())
+        .select_from(MatchScore)
+        .join(JobPosting, JobPosting.id == MatchScore.job_posting_id)
+        .where(MatchScore.job_profile_id == job_profile_id)
+        .where(JobPosting.is_active == True)
+    ).one()
+    return page, total
+
+
+def read_top_per_posting(session: Session, job_posting_ids: List[int], k: int) -> Dict[int, Tuple[List[Ranked], int]]:
+    """
+    Top `k` profiles and the total hit count for each posting. The top rows
+    come from one UNION ALL of per-posting index range scans with LIMIT k,
+    the totals from one grouped count.
+    """
+    if not job_posting_ids:
+        return {}
+    columns = (MatchScore.job_posting_id, MatchScore.job_profile_id, MatchScore.score, MatchScore.details)
+    per_posting = [
+        select(*columns)
+        .where(MatchScore.job_posting_id == job_posting_id)
+        .order_by(MatchScore.score.desc(), MatchScore.job_profile_id)
+        .limit(k)
+        .subquery()
+        for job_posting_id in job_posting_ids
+    ]
+    top_rows = session.execute(union_all(*(select(*sub.c) for sub in per_posting))).all()
+    totals = dict(session.execute(
+        select(MatchScore.job_posting_id, func.count())
+        .where(MatchScore.job_posting_id.in_(job_posting_ids))
+        .group_by(MatchScore.job_posting_id)
+    ).all())
+
+    result = {job_posting_id: ([], totals.get(job_posting_id, 0)) for job_posting_id in job_posting_ids}
+    for row in top_rows:
+        result[row.job_posting_id][0].append(Ranked(row.score, row.job_profile_id, None, json.loads(row.details)))
+    for top, _ in result.values():
+        top.sort(key=lambda entry: (-entry.score, entry.key))
+    return result
+
+
+def score_posting_page(session: Session, job_posting: JobPosting, limit: Optional[int], cursor: Optional[str]):
+    """
+    Live-scored equivalent of read_posting_page, used until the materialized
+    scores catch up
+    """
+    # Retrieve plausible profiles from the index, then score them in one vectorized pass
+    sync_from_primary(profile_index, profile_matrix)
+    candidate_ids = profile_index.candidates_for_posting(job_posting)
+    scored = profile_matrix.score(job_posting, candidate_ids)
+    logger.info(f"[RECOMMENDATIONS] Scored {len(scored)} of {len(profile_index)} job profiles")
+
+    # Keep only the best profile per candidate and only one page of those
+    hits = scored.above(MATCH_THRESHOLD)  # Lower threshold to show more candidates
+    page = top_k_page(
+        (Ranked(scored.score(i), int(scored.profile_ids[i]), int(scored.candidate_ids[i]), i) for i in hits),
+        limit, cursor,
+    )
+    items = [entry._replace(item=scored.details(entry.item)) for entry in page.items]
+    return Page(items, page.next_cursor), len(np.unique(scored.candidate_ids[hits]))
+
+
+def score_profile_page(session: Session, job_profile_id: int, limit: Optional[int], cursor: Optional[str]):
+    """
+    Live-scored equivalent of read_profile_page, used until the materialized
+    scores catch up
+    """
+    # Get active job postings the index says can reach the threshold
+    job_profile = session.get(JobProfile, job_profile_id)
+    features = profile_features(job_profile)
+    sync_from_primary(posting_index)
+    all_jobs = session.exec(
+        select(JobPosting).where(JobPosting.is_active == True, posting_index.posting_filter(features))
+    ).all()
+    logger.info(f"[CANDIDATE RECOMMENDATIONS] Evaluating {len(all_jobs)} of {len(posting_index)} jobs")
+
+    # Score every job, but only keep one page of the best ones
+    scored = [
+        Ranked(match_info["score"], job.id, item=match_info["details"])
+        for job, match_info in zip(all_jobs, score_many(features, all_jobs))
+        if match_info["score"] >= MATCH_THRESHOLD  # Only include jobs with some match (40%+ threshold)
+    ]
+    return top_k_page(scored, limit, cursor), len(scored)
+
+
+class MatchScoreMaterializer:
+    """
+    Background worker that recomputes MatchScore rows for changed postings
+    and profiles.
+
+    Every row is written once per deploy by rescore_matches.py, before the
+    app starts; the worker only recomputes what changes after that. Routes
+    call posting_changed() / profile_changed() after committing. Changes are
+    coalesced per row and applied on a worker thread with its own session.
+    While a change that affects a read is still queued, covers_posting() /
+    covers_profile() return False and routes fall back to live scoring, so a
+    worker always reads its own writes.
+    """
+
+    def __init__(self, bind=None):
+        self._bind = bind  # engine for the worker's sessions, app.database.engine by default
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Set[int]] = {POSTING: set(), PROFILE: set()}
+        self._busy: Optional[Tuple[str, int]] = None
+        self._ready = False
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        """Start the worker; the stored rows are taken as current"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._ready = True
+            self._thread = threading.Thread(target=self._run, name="match-score-materializer", daemon=True)
+            self._thread.start()
+        logger.info("[MATCH SCORES] Materializer started")
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        self._ready = False
+        logger.info("[MATCH SCORES] Materializer stopped")
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued change has been applied"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._idle() and self._ready, timeout)
+
+    # ---------- change notifications ----------
+
+    def posting_changed(self, job_posting_id: int):
+        self._enqueue(POSTING, job_posting_id)
+
+    def profile_changed(self, job_profile_id: int):
+        self._enqueue(PROFILE, job_profile_id)
+
+    def _enqueue(self, kind: str, row_id: int):
+        if self._thread is None:
+            return
+        with self._cond:
+            self._pending[kind].add(row_id)
+            self._cond.notify_all()
+
+    # ---------- freshness ----------
+
+    def covers_posting(self, job_posting_id: int) -> bool:
+        """True when the stored rows for this posting reflect every change seen by this process"""
+        with self._cond:
+            return (
+                self._ready and not self._pending[PROFILE] and job_posting_id not in self._pending[POSTING]
+                and not self._busy_with(PROFILE) and self._busy != (POSTING, job_posting_id)
+            )
+
+    def covers_profile(self, job_profile_id: int) -> bool:
+        with self._cond:
+            return (
+                self._ready and not self._pending[POSTING] and job_profile_id not in self._pending[PROFILE]
+                and not self._busy_with(POSTING) and self._busy != (PROFILE, job_profile_id)
+            )
+
+    def _busy_with(self, kind: str) -> bool:
+        return self._busy is not None and self._busy[0] == kind
+
+    def _idle(self) -> bool:
+        return self._busy is None and not any(self._pending.values())
+
+    # ---------- worker ----------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or any(self._pending.values()))
+                if self._stopping:
+                    return
+                kind = POSTING if self._pending[POSTING] else PROFILE
+                job = (kind, self._pending[kind].pop())
+                self._busy = job
+            try:
+                with Session(self._bind or engine) as session:
+                    if job[0] == POSTING:
+                        self.recompute_posting(session, job[1])
+                    else:
+                        self.recompute_profile(session, job[1])
+            except SQLAlchemyError as e:
+                # Another worker may be writing the same rows; the next change or rescore repairs them
+                logger.error(f"[MATCH SCORES] Failed to recompute {job[0]} {job[1]}: {e}")
+            except Exception:
+                logger.exception(f"[MATCH SCORES] Unexpected error recomputing {job[0]} {job[1]}")
+            finally:
+                with self._cond:
+                    self._busy = None
+                    self._cond.notify_all()
+
+    # ---------- recomputation ----------
+
+    def rebuild(self, session: Session):
+        """Recompute every posting's rows in this process, for scripts and tests; deploys run rescore_matches.py"""
+        posting_ids = session.exec(select(JobPosting.id)).all()
+        for job_posting_id in posting_ids:
+            self.recompute_posting(session, job_posting_id)
+        logger.info(f"[MATCH SCORES] Rebuilt scores for {len(posting_ids)} job postings")
+
+    def recompute_posting(self, session: Session, job_posting_id: int):
+        job_posting = session.get(JobPosting, job_posting_id)
+        session.exec(delete(MatchScore).where(MatchScore.job_posting_id == job_posting_id))
+        rows = []
+        if job_posting is not None:
+            profile_index.sync(session)
+            profile_matrix.sync(session)
+            scored = profile_matrix.score(job_posting, profile_index.candidates_for_posting(job_posting))
+            rows = posting_score_rows(job_posting_id, scored)
+        self._write(session, rows)
+
+    def recompute_profile(self, session: Session, job_profile_id: int):
+        job_profile = session.get(JobProfile, job_profile_id)
+        session.exec(delete(MatchScore).where(MatchScore.job_profile_id == job_profile_id))
+        rows = []
+        if job_profile is not None:
+            features = profile_features(job_profile)
+            posting_index.sync(session)
+            postings = session.exec(select(JobPosting).where(posting_index.posting_filter(features))).all()
+            rows = [
+                {
+                    "job_posting_id": job_posting.id,
+                    "job_profile_id": job_profile_id,
+                    "candidate_id": job_profile.candidate_id,
+                    "score": match_info["score"],
+                    "details": json.dumps(match_info["details"]),
+                }
+                for job_posting, match_info in zip(postings, score_many(features, postings))
+                if match_info["score"] >= MATCH_THRESHOLD
+            ]
+        self._write(session, rows)
+
+    @staticmethod
+    def _write(session: Session, rows: List[dict]):
+        # Upsert: another process recomputing the same pair must not fail this one
+        if rows:
+            insert = dialect_insert(session, MatchScore)
+            upsert = insert.on_conflict_do_update(
+                index_elements=["job_posting_id", "job_profile_id"],
+                set_={"candidate_id": insert.excluded.candidate_id, "score": insert.excluded.score,
+                      "details": insert.excluded.details, "computed_at": insert.excluded.computed_at},
+            )
+            session.execute(upsert, rows)
+        session.commit()
+
+
+def posting_score_rows(job_posting_id: int, scored: ProfileScores) -> List[dict]:
+    """MatchScore rows for the profiles in `scored` at or above the match threshold"""
+    return [
+        {
+            "job_posting_id": job_posting_id,
+            "job_profile_id": int(scored.profile_ids[i]),
+            "candidate_id": int(scored.candidate_ids[i]),
+            "score": scored.score(i),
+            "details": json.dumps(scored.details(i)),
+        }
+        for i in scored.above(MATCH_THRESHOLD)
+    ]
+
+
+MATCH_SCORE_COLUMNS = ("job_posting_id", "job_profile_id", "candidate_id", "score", "details", "computed_at")
+
+
+def write_scores(session: Session, rows: List[dict]):
+    """
+    Insert MatchScore rows in the session's transaction: one COPY on
+    PostgreSQL, a multi-row INSERT elsewhere
+    """
+    if not rows:
+        return
+    if session.get_bind().dialect.name != "postgresql":
+        session.execute(MatchScore.__table__.insert(), rows)
+        return
+    computed_at = datetime.utcnow().isoformat(sep=" ")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in MATCH_SCORE_COLUMNS[:-1]] + [computed_at])
+    buffer.seek(0)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {MatchScore.__tablename__} ({', '.join(MATCH_SCORE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def delete_profile_scores(session: Session, job_profile_id: int):
+    """Drop a profile's rows before the profile itself is deleted (same transaction)"""
+    session.exec(delete(MatchScore).where(MatchScore.job_profile_id == job_profile_id))
+
+
+# Shared per-process worker, started and stopped by the app lifespan
+match_score_materializer = MatchScoreMaterializer()
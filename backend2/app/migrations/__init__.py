@@ -0,0 +1,136 @@
+"""
+Versioned schema migrations for TalentGraph V2
+Each vNNN_<name>.py module in this package moves the schema up one version.
+`python -m app.migrations upgrade` applies pending versions once per deploy;
+app startup only checks the recorded version
+"""
+
+import importlib
+import logging
+import pkgutil
+import re
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+# Kept out of SQLModel.metadata so drop_all/create_all never touch it
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# pg_advisory_lock key held while upgrading, so concurrent deploys apply each version once
+MIGRATION_LOCK_KEY = 7420_0001
+
+_MODULE_NAME = re.compile(r"^v(\d+)_(\w+)$")
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+class SchemaVersionError(RuntimeError):
+    """The database schema is older or newer than this code expects"""
+
+
+def discover() -> List[Migration]:
+    """Every migration in this package, ordered by version"""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module.upgrade))
+    migrations.sort(key=lambda migration: migration.version)
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise SchemaVersionError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+
+def head_version() -> int:
+    migrations = discover()
+    return migrations[-1].version if migrations else 0
+
+
+def current_version(conn: Connection) -> int:
+    """Highest applied version, 0 for a database that has never been migrated"""
+    schema_version.create(conn, checkfirst=True)
+    return conn.execute(select(func.coalesce(func.max(schema_version.c.version), 0))).scalar()
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> int:
+    """
+    Apply every pending migration up to `target` (default: head), each in its
+    own transaction together with its schema_version row. Returns the version
+    the database ends at.
+    """
+    with engine.connect() as conn:
+        locked = conn.dialect.name == "postgresql"
+        if locked:
+            conn.execute(select(func.pg_advisory_lock(MIGRATION_LOCK_KEY)))
+        try:
+            with conn.begin():
+                version = current_version(conn)
+            for migration in discover():
+                if migration.version <= version or (target is not None and migration.version > target):
+                    continue
+                logger.info(f"[MIGRATE] Applying v{migration.version:03d} {migration.name}")
+                with conn.begin():
+                    migration.upgrade(conn)
+                    conn.execute(schema_version.insert().values(
+                        version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                    ))
+                version = migration.version
+            logger.info(f"[MIGRATE] Database at version {version}")
+            return version
+        finally:
+            if locked:
+                conn.execute(select(func.pg_advisory_unlock(MIGRATION_LOCK_KEY)))
+
+
+def stamp(engine: Engine, version: int):
+    """Record `version` as applied without running anything, e.g. after reset_db.py"""
+    names = {migration.version: migration.name for migration in discover()}
+    if version not in names:
+        raise SchemaVersionError(f"Unknown migration version {version}")
+    with engine.begin() as conn:
+        schema_version.create(conn, checkfirst=True)
+        conn.execute(schema_version.delete())
+        conn.execute(schema_version.insert(), [
+            {"version": v, "name": names[v], "applied_at": datetime.utcnow()}
+            for v in sorted(names) if v <= version
+        ])
+
+
+def check_schema_version(engine: Engine):
+    """
+    Startup check: one primary-key read. Raises SchemaVersionError when the
+    database is behind this code; a newer database (rolled-back deploy) is
+    only logged.
+    """
+    head = head_version()
+    try:
+        with engine.connect() as conn:
+            version = conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except DBAPIError:
+        # schema_version doesn't exist yet
+        version = 0
+    if version < head:
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, code expects {head}; "
+            f"run `python -m app.migrations upgrade`"
+        )
+    if version > head:
+        logger.warning(f"[MIGRATE] Database schema is at version {version}, newer than this code ({head})")
@@ -0,0 +1,45 @@
+"""
+Migration CLI, run once per deploy before the app starts:
+
+    python -m app.migrations upgrade [--to VERSION]
+    python -m app.migrations current
+    python -m app.migrations stamp VERSION
+"""
+
+import argparse
+import logging
+import sys
+
+from app.database import engine
+from app.migrations import current_version, discover, head_version, stamp, upgrade
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="TalentGraph V2 schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, default=None, help="stop at this version (default: head)")
+    commands.add_parser("current", help="show the applied and latest versions")
+    stamp_parser = commands.add_parser("stamp", help="record a version as applied without running it")
+    stamp_parser.add_argument("version", type=int)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "upgrade":
+        upgrade(engine, args.to)
+    elif args.command == "current":
+        with engine.begin() as conn:
+            version = current_version(conn)
+        print(f"[MIGRATE] Database at version {version}, head is {head_version()}")
+        for migration in discover():
+            marker = "x" if migration.version <= version else " "
+            print(f"  [{marker}] v{migration.version:03d} {migration.name}")
+    else:
+        stamp(engine, args.version)
+        print(f"[MIGRATE] Stamped version {args.version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+Schema operations for migrations
+Each helper checks the live schema first, so migrations can run against
+databases built by the v001 baseline or by older create_all startups
+"""
+
+from typing import Optional, Sequence
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+def _quote(conn: Connection, table: str) -> str:
+    # "match" is a keyword in some dialects
+    return conn.dialect.identifier_preparer.quote(table)
+
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    if not has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {_quote(conn, table)} ADD COLUMN {column} {ddl}"))
+
+
+def create_index(conn: Connection, name: str, table: str, columns: Sequence[str], unique: bool = False,
+                 where: Optional[str] = None):
+    """CREATE INDEX unless it exists; `where` makes it a partial index"""
+    conn.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {_quote(conn, table)} ({', '.join(columns)})"
+        + (f" WHERE {where}" if where else "")
+    ))
+
+
+def drop_index(conn: Connection, name: str):
+    conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
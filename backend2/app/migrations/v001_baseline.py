@@ -0,0 +1,15 @@
+"""
+Baseline: every table and index declared in app.models
+Creates the full current schema on an empty database and only the missing
+tables on one built by the old create_all startup, so later migrations
+must tolerate objects that already exist (see app.migrations.ops)
+"""
+
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401  registers every table
+
+
+def upgrade(conn: Connection):
+    SQLModel.metadata.create_all(conn)
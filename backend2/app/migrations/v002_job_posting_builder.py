@@ -0,0 +1,27 @@
+"""
+Job Posting Builder columns on jobposting and the c2c / w2 employment types
+(formerly migrate_job_postings.py)
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import add_column
+
+NEW_COLUMNS = [
+    "end_date",
+    "job_category",
+    "travel_requirements",
+    "visa_info",
+    "education_qualifications",
+    "certifications_required",
+    "pay_type",
+]
+
+
+def upgrade(conn: Connection):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TYPE employmenttype ADD VALUE IF NOT EXISTS 'c2c'"))
+        conn.execute(text("ALTER TYPE employmenttype ADD VALUE IF NOT EXISTS 'w2'"))
+    for column in NEW_COLUMNS:
+        add_column(conn, "jobposting", column, "VARCHAR")
@@ -0,0 +1,15 @@
+"""
+Indexed company.org_id, backfilled from company_name groups
+(formerly migrate_company_orgs.py)
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import add_column, create_index
+from app.organizations import backfill_organizations
+
+
+def upgrade(conn: Connection):
+    add_column(conn, "company", "org_id", "INTEGER REFERENCES organization(id)")
+    create_index(conn, "ix_company_org_id", "company", ["org_id"])
+    backfill_organizations(conn)
@@ -0,0 +1,64 @@
+"""
+Swipe / Match / Application lookup indexes and the one-match-per-triple,
+one-application-per-pair unique constraints (formerly
+migrate_interaction_indexes.py). Existing duplicates are merged first.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import create_index
+
+# Fold duplicate matches into the oldest row: any flag set on a duplicate
+# stays set, and the best score wins
+MERGE_MATCHES = """
+UPDATE "match" AS keep SET
+    candidate_liked = dup.candidate_liked,
+    company_liked = dup.company_liked,
+    candidate_asked_to_apply = dup.candidate_asked_to_apply,
+    company_asked_to_apply = dup.company_asked_to_apply,
+    match_percentage = dup.match_percentage,
+    updated_at = dup.updated_at
+FROM (
+    SELECT MIN(id) AS id,
+           BOOL_OR(candidate_liked) AS candidate_liked,
+           BOOL_OR(company_liked) AS company_liked,
+           BOOL_OR(candidate_asked_to_apply) AS candidate_asked_to_apply,
+           BOOL_OR(company_asked_to_apply) AS company_asked_to_apply,
+           MAX(match_percentage) AS match_percentage,
+           MAX(updated_at) AS updated_at
+    FROM "match"
+    GROUP BY candidate_id, job_posting_id, company_id
+    HAVING COUNT(*) > 1
+) AS dup
+WHERE keep.id = dup.id
+"""
+
+DELETE_DUPLICATE_MATCHES = """
+DELETE FROM "match" WHERE id NOT IN (
+    SELECT MIN(id) FROM "match" GROUP BY candidate_id, job_posting_id, company_id
+)
+"""
+
+# Keep the earliest application per candidate and posting
+DELETE_DUPLICATE_APPLICATIONS = """
+DELETE FROM application WHERE id NOT IN (
+    SELECT MIN(id) FROM application GROUP BY candidate_id, job_posting_id
+)
+"""
+
+
+def upgrade(conn: Connection):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(MERGE_MATCHES))
+    conn.execute(text(DELETE_DUPLICATE_MATCHES))
+    conn.execute(text(DELETE_DUPLICATE_APPLICATIONS))
+
+    create_index(conn, "uq_match_candidate_posting_company", "match",
+                 ["candidate_id", "job_posting_id", "company_id"], unique=True)
+    create_index(conn, "uq_application_candidate_posting", "application",
+                 ["candidate_id", "job_posting_id"], unique=True)
+    create_index(conn, "ix_swipe_candidate_posting_actor", "swipe",
+                 ["candidate_id", "job_posting_id", "company_id", "action_by", "action"])
+    create_index(conn, "ix_swipe_job_posting_id", "swipe", ["job_posting_id"])
+    create_index(conn, "ix_match_job_posting_id", "match", ["job_posting_id"])
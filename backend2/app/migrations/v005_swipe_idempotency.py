@@ -0,0 +1,26 @@
+"""
+One swipe per candidate / posting / company / actor / action, and the
+optional client idempotency key on swipes. Existing duplicate swipes are
+folded into the oldest one.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import add_column, create_index, drop_index
+
+DELETE_DUPLICATE_SWIPES = """
+DELETE FROM swipe WHERE id NOT IN (
+    SELECT MIN(id) FROM swipe GROUP BY candidate_id, job_posting_id, company_id, action_by, action
+)
+"""
+
+
+def upgrade(conn: Connection):
+    add_column(conn, "swipe", "idempotency_key", "VARCHAR(255)")
+    conn.execute(text(DELETE_DUPLICATE_SWIPES))
+    # Same columns as the v004 lookup index, now unique
+    drop_index(conn, "ix_swipe_candidate_posting_actor")
+    create_index(conn, "uq_swipe_candidate_posting_actor", "swipe",
+                 ["candidate_id", "job_posting_id", "company_id", "action_by", "action"], unique=True)
+    create_index(conn, "uq_swipe_idempotency_key", "swipe", ["idempotency_key"], unique=True)
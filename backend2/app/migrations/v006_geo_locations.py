@@ -0,0 +1,45 @@
+"""
+Coordinates, region and remote flag on job postings and location
+preferences, resolved from the existing rows through the app.geo gazetteer
+"""
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Connection
+
+from app.geo import resolve, resolve_location
+from app.migrations.ops import add_column, create_index
+from app.models import JobPosting, LocationPreference
+from app.values import enum_value
+
+GEO_COLUMNS = [
+    ("latitude", "FLOAT"),
+    ("longitude", "FLOAT"),
+    ("region_code", "VARCHAR"),
+    ("is_remote", "BOOLEAN NOT NULL DEFAULT FALSE"),
+]
+
+
+def upgrade(conn: Connection):
+    for table in ("jobposting", "locationpreference"):
+        for column, ddl in GEO_COLUMNS:
+            add_column(conn, table, column, ddl)
+        create_index(conn, f"ix_{table}_region_code", table, ["region_code"])
+
+    posting = JobPosting.__table__
+    for posting_id, location, worktype in conn.execute(
+        select(posting.c.id, posting.c.location, posting.c.worktype)
+    ).all():
+        place = resolve_location(location)
+        conn.execute(update(posting).where(posting.c.id == posting_id).values(
+            latitude=place.latitude, longitude=place.longitude, region_code=place.region,
+            is_remote=str(enum_value(worktype)).lower() == "remote",
+        ))
+
+    preference = LocationPreference.__table__
+    for preference_id, city, state, country in conn.execute(
+        select(preference.c.id, preference.c.city, preference.c.state, preference.c.country)
+    ).all():
+        place = resolve(city, state, country)
+        conn.execute(update(preference).where(preference.c.id == preference_id).values(
+            latitude=place.latitude, longitude=place.longitude, region_code=place.region, is_remote=place.remote,
+        ))
@@ -0,0 +1,30 @@
+"""
+Annualized base-currency salary columns on job postings and job profiles,
+computed from the existing rows through app.compensation
+"""
+
+import math
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Connection
+
+from app.compensation import annual_range
+from app.migrations.ops import add_column, create_index
+from app.models import JobPosting, JobProfile
+
+
+def upgrade(conn: Connection):
+    for model in (JobPosting, JobProfile):
+        table = model.__table__
+        for column in ("annual_salary_min", "annual_salary_max"):
+            add_column(conn, table.name, column, "FLOAT")
+            create_index(conn, f"ix_{table.name}_{column}", table.name, [column])
+
+        for row_id, salary_min, salary_max, currency, pay_type in conn.execute(select(
+            table.c.id, table.c.salary_min, table.c.salary_max, table.c.salary_currency, table.c.pay_type
+        )).all():
+            bounds = annual_range(salary_min, salary_max, currency, pay_type)
+            low, high = bounds if bounds is not None else (None, None)
+            conn.execute(update(table).where(table.c.id == row_id).values(
+                annual_salary_min=low, annual_salary_max=high if high is not None and math.isfinite(high) else None,
+            ))
@@ -0,0 +1,17 @@
+"""
+Idempotency keys scoped to the swiping actor: one key per candidate for
+candidate swipes and per company for recruiter swipes, instead of one
+table-wide key space
+"""
+
+from sqlalchemy.engine import Connection
+
+from app.migrations.ops import create_index, drop_index
+
+
+def upgrade(conn: Connection):
+    drop_index(conn, "uq_swipe_idempotency_key")
+    create_index(conn, "uq_swipe_candidate_idempotency_key", "swipe", ["candidate_id", "idempotency_key"],
+                 unique=True, where="action_by = 'candidate'")
+    create_index(conn, "uq_swipe_company_idempotency_key", "swipe", ["company_id", "idempotency_key"],
+                 unique=True, where="action_by = 'recruiter'")
@@ -5,9 +5,13 @@ Candidate-centric talent marketplace with enhanced job profiles and postings
 
 from typing import Optional, List
 from datetime import datetime
+from sqlalchemy import Index, UniqueConstraint, event, text
 from sqlmodel import SQLModel, Field, Relationship
 from enum import Enum
 
+from app.compensation import normalize_compensation
+from app.geo import locate_posting, locate_preference
+
 
 class UserRole(str, Enum):
     CANDIDATE = "candidate"
@@ -140,6 +144,11 @@ class LocationPreference(SQLModel, table=True):
     city: str
     state: str
     country: Optional[str] = None
+    # Resolved from city/state/country on every write (app.geo)
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    region_code: Optional[str] = Field(default=None, index=True)  # "US-TX", or a country code
+    is_remote: bool = Field(default=False)  # a "Remote" preference rather than a place
     
     # Relationships
     job_profile: "JobProfile" = Relationship(back_populates="location_preferences")
@@ -159,6 +168,9 @@ class JobProfile(SQLModel, table=True):
     salary_min: float
     salary_max: float
     salary_currency: CurrencyType
+    # salary_min/max per year in the base currency, kept on every write (app.compensation)
+    annual_salary_min: Optional[float] = Field(default=None, index=True)
+    annual_salary_max: Optional[float] = Field(default=None, index=True)  # NULL: no upper bound
     resume_id: Optional[int] = Field(default=None, foreign_key="resume.id")
     certification_ids: Optional[str] = None  # JSON stringified list of cert IDs
     visa_status: VisaStatus
@@ -209,10 +221,21 @@ class JobProfile(SQLModel, table=True):
 
 # ============ COMPANY MODELS ============
 
+class Organization(SQLModel, table=True):
+    """Tenant key shared by every company account of one organization"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str = Field(unique=True, index=True)  # company_name the accounts share
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    # Relationships
+    companies: List["Company"] = Relationship(back_populates="organization")
+
+
 class Company(SQLModel, table=True):
     """Company/Recruiter profile"""
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", unique=True)
+    org_id: Optional[int] = Field(default=None, foreign_key="organization.id", index=True)
     company_name: str
     company_email: str = Field(index=True)
     employee_type: str  # Admin, HR, Recruiter/Manager
@@ -224,6 +247,7 @@ class Company(SQLModel, table=True):
     
     # Relationships
     user: User = Relationship(back_populates="company")
+    organization: Optional[Organization] = Relationship(back_populates="companies")
     job_postings: List["JobPosting"] = Relationship(back_populates="company")
     matches: List["Match"] = Relationship(back_populates="company")
     swipes: List["Swipe"] = Relationship(back_populates="company")
@@ -259,6 +283,9 @@ class JobPosting(SQLModel, table=True):
     salary_min: float
     salary_max: float
     salary_currency: CurrencyType
+    # salary_min/max per year in the base currency, kept on every write (app.compensation)
+    annual_salary_min: Optional[float] = Field(default=None, index=True)
+    annual_salary_max: Optional[float] = Field(default=None, index=True)  # NULL: no upper bound
     job_description: str
     required_skills: Optional[str] = None  # JSON: [{"skill": "Python", "category": "technical"}, ...]
     # New fields for Job Posting Builder
@@ -269,6 +296,11 @@ class JobPosting(SQLModel, table=True):
     education_qualifications: Optional[str] = None  # JSON array
     certifications_required: Optional[str] = None  # JSON array
     pay_type: Optional[str] = None  # "hourly" or "annually"
+    # Resolved from location and worktype on every write (app.geo)
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    region_code: Optional[str] = Field(default=None, index=True)  # "US-TX", or a country code
+    is_remote: bool = Field(default=False)  # worktype is remote
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     is_active: bool = Field(default=True)
@@ -280,6 +312,27 @@ class JobPosting(SQLModel, table=True):
     posting_skills: List["JobPostingSkill"] = Relationship(back_populates="job_posting")
 
 
+# Derived columns are recomputed on every insert or update, whichever code path wrote the row
+@event.listens_for(JobPosting, "before_insert")
+@event.listens_for(JobPosting, "before_update")
+def _locate_job_posting(mapper, connection, job_posting):
+    locate_posting(job_posting)
+
+
+@event.listens_for(LocationPreference, "before_insert")
+@event.listens_for(LocationPreference, "before_update")
+def _locate_location_preference(mapper, connection, location_preference):
+    locate_preference(location_preference)
+
+
+@event.listens_for(JobPosting, "before_insert")
+@event.listens_for(JobPosting, "before_update")
+@event.listens_for(JobProfile, "before_insert")
+@event.listens_for(JobProfile, "before_update")
+def _normalize_salary(mapper, connection, row):
+    normalize_compensation(row)
+
+
 # ============ INTERACTION MODELS ============
 
 class Swipe(SQLModel, table=True):
@@ -288,9 +341,10 @@ class Swipe(SQLModel, table=True):
     candidate_id: int = Field(foreign_key="candidate.id", index=True)
     company_id: int = Field(foreign_key="company.id", index=True)
     job_profile_id: int = Field(foreign_key="jobprofile.id")
-    job_posting_id: int = Field(foreign_key="jobposting.id")
+    job_posting_id: int = Field(foreign_key="jobposting.id", index=True)
     action: str  # "like", "pass", "ask_to_apply"
     action_by: str  # "candidate" or "recruiter"
+    idempotency_key: Optional[str] = Field(default=None, max_length=255)  # Idempotency-Key header
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
@@ -298,13 +352,38 @@ class Swipe(SQLModel, table=True):
     company: Company = Relationship(back_populates="swipes")
 
 
+# One swipe per actor and action; also serves existence checks on candidate + posting,
+# optionally narrowed by company and actor/action
+Index(
+    "uq_swipe_candidate_posting_actor",
+    Swipe.candidate_id, Swipe.job_posting_id, Swipe.company_id, Swipe.action_by, Swipe.action,
+    unique=True,
+)
+# Retried requests carry the same key and are answered without writing again. Keys are
+# scoped to the actor: the swiping candidate, or the recruiter's company
+Index(
+    "uq_swipe_candidate_idempotency_key", Swipe.candidate_id, Swipe.idempotency_key, unique=True,
+    sqlite_where=text("action_by = 'candidate'"), postgresql_where=text("action_by = 'candidate'"),
+)
+Index(
+    "uq_swipe_company_idempotency_key", Swipe.company_id, Swipe.idempotency_key, unique=True,
+    sqlite_where=text("action_by = 'recruiter'"), postgresql_where=text("action_by = 'recruiter'"),
+)
+
+
 class Match(SQLModel, table=True):
     """Mutual match between candidate and recruiter"""
+    # One match per candidate / posting / company account; posting before company so
+    # candidate + posting lookups use the same index
+    __table_args__ = (
+        UniqueConstraint("candidate_id", "job_posting_id", "company_id", name="uq_match_candidate_posting_company"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     candidate_id: int = Field(foreign_key="candidate.id", index=True)
     company_id: int = Field(foreign_key="company.id", index=True)
     job_profile_id: int = Field(foreign_key="jobprofile.id")
-    job_posting_id: int = Field(foreign_key="jobposting.id")
+    job_posting_id: int = Field(foreign_key="jobposting.id", index=True)
     match_percentage: float = Field(default=0)
     match_reason: Optional[str] = None  # Why they matched
     candidate_liked: bool = Field(default=False)
@@ -321,8 +400,28 @@ class Match(SQLModel, table=True):
     job_posting: JobPosting = Relationship(back_populates="matches")
 
 
+class MatchScore(SQLModel, table=True):
+    """Materialized score for a job posting / job profile pair at or above the match threshold"""
+    __table_args__ = (UniqueConstraint("job_posting_id", "job_profile_id", name="uq_matchscore_posting_profile"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job_posting_id: int = Field(foreign_key="jobposting.id")
+    job_profile_id: int = Field(foreign_key="jobprofile.id")
+    candidate_id: int = Field(foreign_key="candidate.id")
+    score: int
+    details: str  # JSON breakdown as returned by app.scoring.score_pair
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Ranked reads: ORDER BY score DESC, id ASC for one posting or one profile
+Index("ix_matchscore_posting_rank", MatchScore.job_posting_id, MatchScore.score.desc(), MatchScore.job_profile_id)
+Index("ix_matchscore_profile_rank", MatchScore.job_profile_id, MatchScore.score.desc(), MatchScore.job_posting_id)
+
+
 class Application(SQLModel, table=True):
     """Application from candidate to job posting"""
+    __table_args__ = (UniqueConstraint("candidate_id", "job_posting_id", name="uq_application_candidate_posting"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     candidate_id: int = Field(foreign_key="candidate.id", index=True)
     job_posting_id: int = Field(foreign_key="jobposting.id", index=True)
@@ -0,0 +1,74 @@
+"""
+Organization (tenant) keys for TalentGraph V2
+Company accounts that share a company_name belong to one Organization, so
+team scoping is an indexed Company.org_id lookup instead of a name scan
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import literal, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.models import Company, Organization
+
+logger = logging.getLogger(__name__)
+
+
+def get_or_create_organization(session: Session, name: str) -> Organization:
+    """Organization for a company name, created if this is its first account"""
+    organization = session.exec(select(Organization).where(Organization.name == name)).first()
+    if organization is not None:
+        return organization
+    try:
+        with session.begin_nested():
+            organization = Organization(name=name)
+            session.add(organization)
+    except IntegrityError:
+        # Another request created it first
+        organization = session.exec(select(Organization).where(Organization.name == name)).one()
+    return organization
+
+
+def assign_organization(session: Session, company: Company) -> Optional[int]:
+    """
+    Point a company at its organization: the parent account's for team
+    members, otherwise the one for its company_name. Returns the previous
+    org_id. The caller commits.
+    """
+    previous = company.org_id
+    parent = session.get(Company, company.parent_company_id) if company.parent_company_id else None
+    if parent is not None and parent.org_id is not None:
+        company.org_id = parent.org_id
+    else:
+        company.org_id = get_or_create_organization(session, company.company_name).id
+    session.add(company)
+    return previous
+
+
+def backfill_organizations(conn: Connection) -> int:
+    """
+    Create organizations from company_name groups and link every company
+    without one. Runs inside the caller's transaction (migration v003).
+    """
+    organization = Organization.__table__
+    company = Company.__table__
+    unlinked_names = (
+        select(company.c.company_name, literal(datetime.utcnow()))
+        .where(company.c.org_id == None)
+        .where(company.c.company_name.not_in(select(organization.c.name)))
+        .distinct()
+    )
+    created = conn.execute(
+        organization.insert().from_select(["name", "created_at"], unlinked_names)
+    ).rowcount
+    conn.execute(
+        update(company)
+        .where(company.c.org_id == None)
+        .values(org_id=select(organization.c.id).where(organization.c.name == company.c.company_name).scalar_subquery())
+    )
+    logger.info(f"[ORGANIZATIONS] Created {created} organizations for unlinked companies")
+    return created
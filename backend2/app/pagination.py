@@ -0,0 +1,185 @@
+"""
+Top-K selection and keyset cursors for TalentGraph V2
+Ranks scored results with a bounded heap so recommendation routes only ever
+hold and serialize one page, deduplicating per group during the scan
+"""
+
+import base64
+import heapq
+import json
+import math
+from typing import Any, Callable, Hashable, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+# Page size when a cursor is passed without a limit
+DEFAULT_PAGE_SIZE = 50
+
+
+class Ranked(NamedTuple):
+    """
+    One scored result. Results are ordered by score descending, then key
+    ascending; `group` (e.g. candidate_id) collapses results to the best one
+    per group, and `item` is carried through untouched.
+    """
+    score: int
+    key: int
+    group: Optional[Hashable] = None
+    item: Any = None
+
+
+class Page(NamedTuple):
+    items: List[Ranked]
+    next_cursor: Optional[str]
+
+
+def page_limit(limit: Optional[int], cursor: Optional[str]) -> Optional[int]:
+    """
+    Page size of a request: None (every result, unpaged) when neither a limit
+    nor a cursor was passed, so clients that predate paging get the full list
+    """
+    if limit is None and cursor is not None:
+        return DEFAULT_PAGE_SIZE
+    return limit
+
+
+def encode_cursor(entry: Ranked) -> str:
+    """Opaque cursor pointing just past `entry`"""
+    raw = json.dumps([entry.score, entry.key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(score, key) of the last result on the previous page"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, key = json.loads(raw)
+        return int(score), int(key)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _rank(score: int, key: int) -> Tuple[int, int]:
+    return -score, key
+
+
+class TopK:
+    """
+    Bounded heap keeping the best `k` results seen so far.
+
+    The heap is ordered worst-first so the entry to evict is always at the
+    top. With grouping enabled a group holds at most one live entry; a better
+    entry for the same group retires the old one in place and the stale heap
+    slot is skipped when it surfaces.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: list = []
+        self._live = 0
+        self._best = {}
+        self._counter = 0
+
+    def push(self, entry: Ranked):
+        rank = _rank(entry.score, entry.key)
+        current = self._best.get(entry.group) if entry.group is not None else None
+        if current is not None:
+            # Still live, so it outranks the current worst and the new entry fits
+            if current[2] <= rank:
+                return
+            current[3] = False
+            self._live -= 1
+        elif self._live >= self.k:
+            self._prune()
+            if rank >= self._heap[0][2]:
+                return
+        # [negated rank for a worst-first heap, tiebreaker, rank, alive, entry]
+        slot = [(entry.score, -entry.key), self._counter, rank, True, entry]
+        self._counter += 1
+        heapq.heappush(self._heap, slot)
+        self._live += 1
+        if entry.group is not None:
+            self._best[entry.group] = slot
+        if self._live > self.k:
+            self._evict()
+
+    def _prune(self):
+        while self._heap and not self._heap[0][3]:
+            heapq.heappop(self._heap)
+
+    def _evict(self):
+        self._prune()
+        slot = heapq.heappop(self._heap)
+        self._live -= 1
+        group = slot[4].group
+        if group is not None and self._best.get(group) is slot:
+            del self._best[group]
+
+    def results(self) -> List[Ranked]:
+        """Live entries, best first"""
+        live = [slot for slot in self._heap if slot[3]]
+        live.sort(key=lambda slot: slot[2])
+        return [slot[4] for slot in live]
+
+
+def top_k_page(entries: Iterable[Ranked], limit: Optional[int], cursor: Optional[str] = None) -> Page:
+    """
+    One page of `entries` ranked by (score desc, key asc), at most one per
+    group, starting after `cursor`; all of them when `limit` is None. Groups
+    whose best entry ranks at or before the cursor were shown on an earlier
+    page and are skipped entirely, so the cursor is a stable keyset position
+    rather than an offset.
+    """
+    after = decode_cursor(cursor)
+    entries = list(entries) if after is not None else entries
+    seen = set()
+    if after is not None:
+        after_rank = _rank(*after)
+        seen = {e.group for e in entries if e.group is not None and _rank(e.score, e.key) <= after_rank}
+
+    heap = TopK(math.inf if limit is None else limit + 1)
+    for entry in entries:
+        if after is not None and (_rank(entry.score, entry.key) <= after_rank or entry.group in seen):
+            continue
+        heap.push(entry)
+
+    ranked = heap.results()
+    page = ranked[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(ranked) > len(page) and page else None
+    return Page(page, next_cursor)
+
+
+def keyset_page(fetch: Callable[[Optional[Tuple[int, int]], int], List[Ranked]], limit: Optional[int],
+                cursor: Optional[str] = None,
+                groups_before: Optional[Callable[[Tuple[int, int]], Set[Hashable]]] = None) -> Page:
+    """
+    Same page as top_k_page, read from a source that is already ranked, such
+    as an index scan. `fetch(after, n)` returns up to n entries strictly after
+    the (score, key) position `after`; `groups_before(position)` returns the
+    groups already shown up to that position. Reads in batches until a full
+    page of distinct groups is found, so duplicates cost extra rows, not a
+    full scan.
+    """
+    after = decode_cursor(cursor)
+    seen = set(groups_before(after)) if after is not None and groups_before is not None else set()
+    batch = 500 if limit is None else max(2 * (limit + 1), 50)
+    found: List[Ranked] = []
+    while limit is None or len(found) <= limit:
+        rows = fetch(after, batch)
+        for entry in rows:
+            if entry.group is not None:
+                if entry.group in seen:
+                    continue
+                seen.add(entry.group)
+            found.append(entry)
+            if limit is not None and len(found) > limit:
+                break
+        if len(rows) < batch:
+            break
+        after = (rows[-1].score, rows[-1].key)
+
+    page = found[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(found) > len(page) else None
+    return Page(page, next_cursor)
@@ -0,0 +1,199 @@
+"""
+Connection pool telemetry for TalentGraph V2
+Checkout waits, in-use and overflow counts, pre-ping and liveness failures
+for the sync and async engines, reported by GET /admin/pool
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+WAIT_SAMPLES = 2048  # recent checkout waits kept for percentiles
+
+
+class PoolTelemetry:
+    """Counters for one engine's pool, updated from pool internals and the liveness monitor"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.max_wait = 0.0
+        self.pre_ping_failures = 0
+        self.liveness_checks = 0
+        self.liveness_failures = 0
+        self.last_liveness_check: Optional[float] = None
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+            else:
+                self.checkouts += 1
+            self._waits.append(seconds)
+            self.max_wait = max(self.max_wait, seconds)
+
+    def record_ping_failure(self):
+        with self._lock:
+            self.pre_ping_failures += 1
+
+    def record_liveness(self, ok: bool):
+        with self._lock:
+            self.liveness_checks += 1
+            self.liveness_failures += 0 if ok else 1
+            self.last_liveness_check = time.time()
+
+    def snapshot(self, pool) -> dict:
+        """Current pool state plus counters; pools without a queue (SQLite) report None sizes"""
+        with self._lock:
+            waits = sorted(self._waits)
+            counters = {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "pre_ping_failures": self.pre_ping_failures,
+                "liveness_checks": self.liveness_checks,
+                "liveness_failures": self.liveness_failures,
+                "last_liveness_check": self.last_liveness_check,
+            }
+            max_wait = self.max_wait
+
+        def percentile(p: float) -> Optional[float]:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 3) if waits else None
+
+        overflow = pool.overflow() if hasattr(pool, "overflow") else None
+        return {
+            "engine": self.name,
+            "pool_class": type(pool).__name__,
+            "pool_size": pool.size() if hasattr(pool, "size") else None,
+            "max_overflow": getattr(pool, "_max_overflow", None),
+            "in_use": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "idle": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "overflow_in_use": max(overflow, 0) if overflow is not None else None,
+            "checkout_wait_ms": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(max_wait * 1000, 3),
+            },
+            **counters,
+        }
+
+
+def timed_pool_class(base: type, telemetry: PoolTelemetry) -> type:
+    """
+    Subclass of a QueuePool-style pool that times every checkout. The class
+    carries the telemetry, so pools recreated after dispose() keep reporting
+    into it.
+    """
+    local = threading.local()
+
+    class TimedPool(base):
+        def _do_get(self):
+            # QueuePool._do_get retries by recursion; only time the outer call
+            depth = getattr(local, "depth", 0)
+            local.depth = depth + 1
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except sa_exc.TimeoutError:
+                if depth == 0:
+                    telemetry.record_wait(time.perf_counter() - started, timed_out=True)
+                raise
+            finally:
+                local.depth = depth
+            if depth == 0:
+                telemetry.record_wait(time.perf_counter() - started)
+            return connection
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def count_ping_failures(dialect, telemetry: PoolTelemetry):
+    """Wrap dialect.do_ping (used by pool_pre_ping) to count failed pings"""
+    do_ping = dialect.do_ping
+
+    def ping(dbapi_connection):
+        try:
+            alive = do_ping(dbapi_connection)
+        except Exception:
+            telemetry.record_ping_failure()
+            raise
+        if not alive:
+            telemetry.record_ping_failure()
+        return alive
+
+    dialect.do_ping = ping
+
+
+class LivenessMonitor:
+    """
+    Periodic SELECT 1 on each engine, used instead of pool_pre_ping when
+    DB_LIVENESS=background. A failed check disposes the pool so every stale
+    connection is replaced at once instead of failing one request each.
+    Runs as a task on the app's event loop, which the async pool's
+    connections are bound to.
+    """
+
+    def __init__(self, interval: float, engines: List[Tuple[Union[Engine, AsyncEngine], PoolTelemetry]]):
+        self.interval = interval
+        self.engines = engines
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"[POOL] Background liveness checks every {self.interval:g}s")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    async def check(self):
+        for engine, telemetry in self.engines:
+            if isinstance(engine, AsyncEngine):
+                await self._check_async(engine, telemetry)
+            else:
+                await run_in_threadpool(self._check_sync, engine, telemetry)
+
+    async def _check_async(self, engine: AsyncEngine, telemetry: PoolTelemetry):
+        try:
+            async with engine.connect() as conn:
+                await conn.exec_driver_sql("SELECT 1")
+            telemetry.record_liveness(True)
+        except sa_exc.DBAPIError as e:
+            logger.warning(f"[POOL] {telemetry.name} liveness check failed, disposing pool: {e}")
+            telemetry.record_liveness(False)
+            await engine.dispose()
+
+    def _check_sync(self, engine: Engine, telemetry: PoolTelemetry):
+        try:
+            with engine.connect() as conn:
+                conn.exec_driver_sql("SELECT 1")
+            telemetry.record_liveness(True)
+        except sa_exc.DBAPIError as e:
+            logger.warning(f"[POOL] {telemetry.name} liveness check failed, disposing pool: {e}")
+            telemetry.record_liveness(False)
+            engine.dispose()
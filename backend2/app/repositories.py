@@ -0,0 +1,121 @@
+"""
+Batched read queries for TalentGraph V2 dashboards
+Loads the rows of a list endpoint together with their related records in a
+fixed number of joined or IN queries, whatever the number of rows
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import gather_queries
+from app.models import (
+    Application, Candidate, Certification, JobPosting, JobPostingSkill, JobProfile, LocationPreference, Resume, Skill
+)
+
+# Relations load_candidate_rows can fetch besides candidate, profile and posting
+PROFILE_DETAILS = ("skills", "location_preferences", "resumes", "certifications")
+
+
+class CandidateRows(NamedTuple):
+    """
+    Rows of a swipe/match/application query with everything they point at.
+    Child lists are keyed by job_profile_id (skills, location preferences)
+    or candidate_id (resumes, certifications).
+    """
+    rows: list
+    candidates: Dict[int, Candidate]
+    job_profiles: Dict[int, JobProfile]
+    job_postings: Dict[int, JobPosting]
+    skills: Dict[int, List[Skill]]
+    location_preferences: Dict[int, List[LocationPreference]]
+    resumes: Dict[int, List[Resume]]
+    certifications: Dict[int, List[Certification]]
+
+
+def _grouped(records: Iterable, key: str) -> Dict[int, list]:
+    groups = defaultdict(list)
+    for record in records:
+        groups[getattr(record, key)].append(record)
+    return groups
+
+
+async def load_candidate_rows(session: AsyncSession, query, details: Iterable[str] = PROFILE_DETAILS) -> CandidateRows:
+    """
+    Run `query` (a select of Swipe, Match or Application) and load the
+    candidates, job profiles, job postings and requested `details` of its
+    rows by the IDs it returned: 4 to 8 queries in total, all on the
+    session's one connection. Rows whose candidate, job profile or job
+    posting was deleted in between are left out.
+    """
+    base_rows = (await session.exec(query)).all()
+    candidate_ids = {row.candidate_id for row in base_rows}
+    job_profile_ids = {row.job_profile_id for row in base_rows}
+    relations = {
+        "candidates": select(Candidate).where(Candidate.id.in_(candidate_ids)),
+        "job_profiles": select(JobProfile).where(JobProfile.id.in_(job_profile_ids)),
+        "job_postings": select(JobPosting).where(JobPosting.id.in_({row.job_posting_id for row in base_rows})),
+        "skills": select(Skill).where(Skill.job_profile_id.in_(job_profile_ids)).order_by(Skill.id),
+        "location_preferences": select(LocationPreference)
+            .where(LocationPreference.job_profile_id.in_(job_profile_ids)).order_by(LocationPreference.id),
+        "resumes": select(Resume).where(Resume.candidate_id.in_(candidate_ids)).order_by(Resume.id),
+        "certifications": select(Certification)
+            .where(Certification.candidate_id.in_(candidate_ids)).order_by(Certification.id),
+    }
+    results = {}
+    if base_rows:
+        for name in ("candidates", "job_profiles", "job_postings", *details):
+            results[name] = (await session.exec(relations[name])).all()
+    candidates = {c.id: c for c in results.get("candidates", ())}
+    job_profiles = {p.id: p for p in results.get("job_profiles", ())}
+    job_postings = {p.id: p for p in results.get("job_postings", ())}
+    return CandidateRows(
+        rows=[
+            row for row in base_rows
+            if row.candidate_id in candidates and row.job_profile_id in job_profiles
+            and row.job_posting_id in job_postings
+        ],
+        candidates=candidates,
+        job_profiles=job_profiles,
+        job_postings=job_postings,
+        skills=_grouped(results.get("skills", ()), "job_profile_id"),
+        location_preferences=_grouped(results.get("location_preferences", ()), "job_profile_id"),
+        resumes=_grouped(results.get("resumes", ()), "candidate_id"),
+        certifications=_grouped(results.get("certifications", ()), "candidate_id"),
+    )
+
+
+class PostingRows(NamedTuple):
+    """
+    Rows of a joined query whose second entity is JobPosting, the skills of
+    those postings keyed by job_posting_id, and the ones `applied_by` applied to
+    """
+    rows: list
+    posting_skills: Dict[int, List[JobPostingSkill]]
+    applied_posting_ids: Set[int]
+
+
+async def load_posting_rows(session: AsyncSession, query, applied_by: Optional[int] = None) -> PostingRows:
+    """
+    Run `query`, e.g. select(Swipe, JobPosting, Company).join(...), and fetch
+    its postings' skills (and the candidate's applications to them)
+    concurrently: 2 or 3 queries in total.
+    """
+    posting_ids = query.with_only_columns(JobPosting.id).order_by(None)
+    queries = [
+        query,
+        select(JobPostingSkill).where(JobPostingSkill.job_posting_id.in_(posting_ids)).order_by(JobPostingSkill.id),
+    ]
+    if applied_by is not None:
+        queries.append(select(Application.job_posting_id).where(
+            Application.candidate_id == applied_by,
+            Application.job_posting_id.in_(posting_ids)
+        ))
+    rows, skills, *applied = await gather_queries(session, *queries)
+    return PostingRows(
+        rows=rows,
+        posting_skills=_grouped(skills, "job_posting_id"),
+        applied_posting_ids=set(applied[0]) if applied else set(),
+    )
@@ -0,0 +1,16 @@
+"""
+Admin routes
+Operational telemetry for the API, guarded by APP_ADMIN_TOKEN
+"""
+
+from fastapi import APIRouter, Depends
+from app.database import pool_status
+from app.security import require_admin_token
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/pool")
+def get_pool_status():
+    """Connection pool telemetry: checkout waits, in-use/overflow counts, ping and liveness failures"""
+    return pool_status()
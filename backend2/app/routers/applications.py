@@ -8,13 +8,13 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel
 from sqlmodel import Session, select
 from typing import List
-from app.database import get_session
-from app.models import Application, Candidate, Company, JobPosting, JobProfile, User
+from app.database import dialect_insert, get_session, pin_to_primary, statement_timeout
+from app.models import Application, JobPosting, JobProfile
 from app.schemas import ApplicationRead
-from app.security import get_current_user
+from app.identity import Principal, get_current_candidate, get_current_company_scope
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/applications", tags=["Applications"])
+router = APIRouter(prefix="/applications", tags=["Applications"], dependencies=[statement_timeout("interactions")])
 
 
 class ApplicationApplyRequest(BaseModel):
@@ -29,7 +29,7 @@ class ApplicationStatusRequest(BaseModel):
 @router.post("/apply", response_model=dict)
 def apply_to_job(
     data: ApplicationApplyRequest,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Candidate applies to a job posting"""
@@ -37,67 +37,47 @@ def apply_to_job(
     job_profile_id = data.job_profile_id
     logger.info(f"[APPLICATION] job_posting_id={job_posting_id}, job_profile_id={job_profile_id}")
     
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate profile not found")
-    
     job_profile = session.get(JobProfile, job_profile_id)
-    if not job_profile or job_profile.candidate_id != candidate.id:
+    if not job_profile or job_profile.candidate_id != principal.candidate_id:
         raise HTTPException(status_code=404, detail="Job profile not found")
     
     job_posting = session.get(JobPosting, job_posting_id)
     if not job_posting:
         raise HTTPException(status_code=404, detail="Job posting not found")
     
-    # Check if already applied
-    existing = session.exec(
-        select(Application)
-        .where(Application.candidate_id == candidate.id)
-        .where(Application.job_posting_id == job_posting_id)
-    ).first()
-    
-    if existing:
-        raise HTTPException(status_code=400, detail="Already applied to this job")
-    
-    # Create application
-    application = Application(
-        candidate_id=candidate.id,
-        job_posting_id=job_posting_id,
-        job_profile_id=job_profile_id,
-        status="applied"
+    # Insert unless already applied; uq_application_candidate_posting makes this race-free
+    result = session.execute(
+        dialect_insert(session, Application)
+        .values(
+            candidate_id=principal.candidate_id,
+            job_posting_id=job_posting_id,
+            job_profile_id=job_profile_id,
+            status="applied"
+        )
+        .on_conflict_do_nothing(index_elements=["candidate_id", "job_posting_id"])
     )
-    
-    session.add(application)
+    if not result.rowcount:
+        session.rollback()
+        raise HTTPException(status_code=400, detail="Already applied to this job")
+    application_id = result.inserted_primary_key[0]
     session.commit()
-    session.refresh(application)
+    pin_to_primary(principal.user_id)
     
     return {
         "message": "Application submitted successfully",
-        "application_id": application.id,
+        "application_id": application_id,
         "job_title": job_posting.job_title
     }
 
 
 @router.get("/my-applications", response_model=List[ApplicationRead])
 def get_my_applications(
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Get all applications for current candidate"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-    
     applications = session.exec(
-        select(Application).where(Application.candidate_id == candidate.id)
+        select(Application).where(Application.candidate_id == principal.candidate_id)
     ).all()
     
     return applications
@@ -107,26 +87,18 @@ def get_my_applications(
 def update_application_status(
     application_id: int,
     data: ApplicationStatusRequest,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Update application status (Recruiter only)"""
     status = data.status
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=403, detail="Recruiters only")
-    
     application = session.get(Application, application_id)
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     
     # Verify the job posting belongs to this company
     job_posting = session.get(JobPosting, application.job_posting_id)
-    if not job_posting or job_posting.company_id != company.id:
+    if not job_posting or job_posting.company_id != principal.company_id:
         raise HTTPException(status_code=403, detail="Unauthorized")
     
     # Valid statuses: applied, reviewed, shortlisted, rejected, offered
@@ -137,10 +109,11 @@ def update_application_status(
     application.status = status
     session.add(application)
     session.commit()
+    pin_to_primary(principal.user_id)
     
     return {
         "message": f"Application status updated to {status}",
-        "application_id": application.id,
+        "application_id": application_id,
         "new_status": status
     }
 
@@ -148,23 +121,16 @@ def update_application_status(
 @router.delete("/{application_id}", response_model=dict)
 def withdraw_application(
     application_id: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Candidate withdraws their application"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-    
     application = session.get(Application, application_id)
-    if not application or application.candidate_id != candidate.id:
+    if not application or application.candidate_id != principal.candidate_id:
         raise HTTPException(status_code=404, detail="Application not found")
     
     session.delete(application)
     session.commit()
+    pin_to_primary(principal.user_id)
     
     return {"message": "Application withdrawn successfully"}
@@ -5,7 +5,7 @@ Authentication routes - signup, login, token management
 import logging
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlmodel import Session, select
-from app.database import get_session
+from app.database import get_session, pin_to_primary
 from app.models import User, Candidate, Company, UserRole
 from app.schemas import (
     UserCreate, UserLogin,
@@ -13,6 +13,8 @@ from app.schemas import (
     CompanySignUp, CompanyLogin
 )
 from app.security import hash_password, verify_password, create_access_token, get_current_user
+from app.identity import principal_cache
+from app.organizations import assign_organization
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -89,7 +91,10 @@ def signup(user_data: UserCreate, session: Session = Depends(get_session)):
             employee_type=user_data.company_role.upper()
         )
         session.add(company)
+        assign_organization(session, company)
         session.commit()
+        pin_to_primary(new_user.id)
+        principal_cache.invalidate_org(company.org_id)
         logger.info(f"[SIGNUP] Company profile created for User ID {new_user.id}")
     
     token_data = {
@@ -313,7 +318,10 @@ def company_signup(user_data: CompanySignUp, session: Session = Depends(get_sess
         employee_type=user_data.company_role.upper()
     )
     session.add(company)
+    assign_organization(session, company)
     session.commit()
+    pin_to_primary(new_user.id)
+    principal_cache.invalidate_org(company.org_id)
     logger.info(f"[COMPANY_SIGNUP] Company profile created for User ID {new_user.id}")
     
     token_data = {
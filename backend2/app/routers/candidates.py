@@ -10,13 +10,18 @@ from typing import List, Optional
 from pathlib import Path
 import shutil
 from datetime import datetime
-from app.database import get_session
-from app.models import Candidate, JobProfile, User, Resume, Certification, Skill, LocationPreference
+from app.database import get_session, pin_to_primary
+from app.models import Candidate, JobProfile, Resume, Certification, Skill, LocationPreference
 from app.schemas import (
     CandidateRead, CandidateCreate, JobProfileRead, JobProfileCreate,
     ResumeRead, CertificationRead, SkillCreate, LocationPreferenceCreate
 )
-from app.security import get_current_user
+from app.identity import Principal, get_current_candidate, get_current_principal, principal_cache
+from app.scoring import profile_matrix
+from app.search_index import profile_index
+from app.match_scores import delete_profile_scores, match_score_materializer
+from app.swipe_decks import swipe_decks
+from app.skills import CERTIFICATIONS_CATALOG, SOFT_SKILLS_CATALOG, TECHNICAL_SKILLS_CATALOG
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/candidates", tags=["Candidates"])
@@ -29,30 +34,26 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 @router.post("/profile", response_model=dict)
 def create_candidate_profile(
     candidate_data: CandidateCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session)
 ):
     """Create candidate profile after signup"""
-    logger.info(f"[CANDIDATE PROFILE] Create profile request for user: {current_user['email']}")
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        logger.error(f"[CANDIDATE PROFILE] User not found: {current_user['email']}")
-        raise HTTPException(status_code=404, detail="User not found")
+    logger.info(f"[CANDIDATE PROFILE] Create profile request for user: {principal.email}")
     
     # Check if candidate already exists
-    existing = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if existing:
-        logger.warning(f"[CANDIDATE PROFILE] Profile already exists for user ID: {user.id}")
+    if principal.candidate_id is not None:
+        logger.warning(f"[CANDIDATE PROFILE] Profile already exists for user ID: {principal.user_id}")
         raise HTTPException(status_code=400, detail="Candidate profile already exists")
     
     candidate = Candidate(
-        user_id=user.id,
+        user_id=principal.user_id,
         **candidate_data.dict()
     )
     session.add(candidate)
     session.commit()
     session.refresh(candidate)
-    logger.info(f"[CANDIDATE PROFILE] Profile created successfully - Candidate ID: {candidate.id}, User: {user.email}")
+    principal_cache.invalidate(principal.user_id)
+    logger.info(f"[CANDIDATE PROFILE] Profile created successfully - Candidate ID: {candidate.id}, User: {principal.email}")
     
     return {
         "message": "Candidate profile created",
@@ -64,20 +65,12 @@ def create_candidate_profile(
 
 @router.get("/profile", response_model=CandidateRead)
 def get_candidate_profile(
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Get candidate's profile"""
-    logger.info(f"[CANDIDATE PROFILE] Get profile request for user: {current_user['email']}")
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        logger.error(f"[CANDIDATE PROFILE] User not found: {current_user['email']}")
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        logger.error(f"[CANDIDATE PROFILE] Candidate profile not found for user ID: {user.id}")
-        raise HTTPException(status_code=404, detail="Candidate profile not found")
+    logger.info(f"[CANDIDATE PROFILE] Get profile request for user: {principal.email}")
+    candidate = session.get(Candidate, principal.candidate_id)
     
     logger.info(f"[CANDIDATE PROFILE] Profile retrieved successfully - Candidate ID: {candidate.id}")
     return candidate
@@ -86,20 +79,12 @@ def get_candidate_profile(
 @router.put("/profile", response_model=dict)
 def update_candidate_profile(
     candidate_data: CandidateCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Update candidate profile"""
-    logger.info(f"[CANDIDATE PROFILE] Update profile request for user: {current_user['email']}")
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        logger.error(f"[CANDIDATE PROFILE] User not found: {current_user['email']}")
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        logger.error(f"[CANDIDATE PROFILE] Candidate profile not found for user ID: {user.id}")
-        raise HTTPException(status_code=404, detail="Candidate profile not found")
+    logger.info(f"[CANDIDATE PROFILE] Update profile request for user: {principal.email}")
+    candidate = session.get(Candidate, principal.candidate_id)
     
     # Update fields
     for key, value in candidate_data.dict().items():
@@ -116,20 +101,11 @@ def update_candidate_profile(
 @router.post("/job-profiles", response_model=dict)
 def create_job_profile(
     job_profile_data: JobProfileCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Create a new job profile (dating app style) with skills and location preferences"""
-    logger.info(f"[JOB PROFILE] Create job profile request for user: {current_user['email']}")
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        logger.error(f"[JOB PROFILE] User not found: {current_user['email']}")
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        logger.error(f"[JOB PROFILE] Candidate profile not found for user ID: {user.id}")
-        raise HTTPException(status_code=404, detail="Candidate profile not found")
+    logger.info(f"[JOB PROFILE] Create job profile request for user: {principal.email}")
     
     # Extract nested data
     skills_data = job_profile_data.dict().pop("skills", [])
@@ -138,13 +114,13 @@ def create_job_profile(
     
     # Create job profile
     job_profile = JobProfile(
-        candidate_id=candidate.id,
+        candidate_id=principal.candidate_id,
         **job_profile_data.dict(exclude={"skills", "location_preferences"})
     )
     session.add(job_profile)
     session.commit()
     session.refresh(job_profile)
-    logger.info(f"[JOB PROFILE] Job profile created - ID: {job_profile.id}, Candidate ID: {candidate.id}")
+    logger.info(f"[JOB PROFILE] Job profile created - ID: {job_profile.id}, Candidate ID: {principal.candidate_id}")
     
     # Add skills
     for skill_data in skills_data:
@@ -163,7 +139,11 @@ def create_job_profile(
         session.add(loc_pref)
     
     session.commit()
+    pin_to_primary(principal.user_id)
     session.refresh(job_profile)
+    profile_matrix.refresh(session, job_profile.id)
+    profile_index.refresh(session, job_profile.id)
+    match_score_materializer.profile_changed(job_profile.id)
     
     return {
         "message": "Job profile created",
@@ -174,25 +154,16 @@ def create_job_profile(
 
 @router.get("/job-profiles", response_model=List[JobProfileRead])
 def get_job_profiles(
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Get all job profiles for candidate"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-    
-    return candidate.job_profiles
+    return session.exec(select(JobProfile).where(JobProfile.candidate_id == principal.candidate_id)).all()
 
 
 @router.get("/skill-catalogs", response_model=dict)
 def get_candidate_skill_catalogs():
     """Get skill and certification catalogs for candidate job preferences"""
-    from app.routers.job_postings import TECHNICAL_SKILLS_CATALOG, SOFT_SKILLS_CATALOG, CERTIFICATIONS_CATALOG
     return {
         "technical_skills": sorted(TECHNICAL_SKILLS_CATALOG),
         "soft_skills": sorted(SOFT_SKILLS_CATALOG),
@@ -204,16 +175,12 @@ def get_candidate_skill_catalogs():
 def update_job_profile(
     job_profile_id: int,
     job_profile_data: JobProfileCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session)
 ):
     """Update a job profile with skills and location preferences"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     job_profile = session.get(JobProfile, job_profile_id)
-    if not job_profile or job_profile.candidate.user_id != user.id:
+    if not job_profile or job_profile.candidate_id != principal.candidate_id:
         raise HTTPException(status_code=404, detail="Job profile not found")
     
     # Update scalar fields (exclude nested relationships)
@@ -238,7 +205,12 @@ def update_job_profile(
     
     session.add(job_profile)
     session.commit()
+    pin_to_primary(principal.user_id)
     session.refresh(job_profile)
+    profile_matrix.refresh(session, job_profile.id)
+    profile_index.refresh(session, job_profile.id)
+    match_score_materializer.profile_changed(job_profile.id)
+    swipe_decks.profile_changed(job_profile.id)
     
     return {"message": "Job profile updated", "job_profile_id": job_profile.id}
 
@@ -246,20 +218,21 @@ def update_job_profile(
 @router.delete("/job-profiles/{job_profile_id}", response_model=dict)
 def delete_job_profile(
     job_profile_id: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session)
 ):
     """Delete a job profile"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     job_profile = session.get(JobProfile, job_profile_id)
-    if not job_profile or job_profile.candidate.user_id != user.id:
+    if not job_profile or job_profile.candidate_id != principal.candidate_id:
         raise HTTPException(status_code=404, detail="Job profile not found")
     
+    delete_profile_scores(session, job_profile_id)
     session.delete(job_profile)
     session.commit()
+    pin_to_primary(principal.user_id)
+    profile_matrix.remove(job_profile_id)
+    profile_index.remove(job_profile_id)
+    swipe_decks.profile_changed(job_profile_id)
     
     return {"message": "Job profile deleted"}
 
@@ -269,21 +242,13 @@ def delete_job_profile(
 @router.post("/resumes/upload", response_model=dict)
 async def upload_resume(
     file: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Upload a resume file"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate profile not found")
-    
     # Create unique filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{candidate.id}_{timestamp}_{file.filename}"
+    filename = f"{principal.candidate_id}_{timestamp}_{file.filename}"
     file_path = UPLOAD_DIR / "resumes" / filename
     file_path.parent.mkdir(exist_ok=True)
     
@@ -293,7 +258,7 @@ async def upload_resume(
     
     # Save to database
     resume = Resume(
-        candidate_id=candidate.id,
+        candidate_id=principal.candidate_id,
         filename=file.filename,
         storage_path=str(file_path)
     )
@@ -310,34 +275,22 @@ async def upload_resume(
 
 @router.get("/resumes", response_model=List[ResumeRead])
 def get_resumes(
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Get all resumes for current candidate"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-    
-    return candidate.resumes
+    return session.exec(select(Resume).where(Resume.candidate_id == principal.candidate_id)).all()
 
 
 @router.delete("/resumes/{resume_id}", response_model=dict)
 def delete_resume(
     resume_id: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session)
 ):
     """Delete a resume"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     resume = session.get(Resume, resume_id)
-    if not resume or resume.candidate.user_id != user.id:
+    if not resume or resume.candidate_id != principal.candidate_id:
         raise HTTPException(status_code=404, detail="Resume not found")
     
     # Delete file
@@ -358,21 +311,13 @@ async def upload_certification(
     issuer: Optional[str] = None,
     issued_date: Optional[str] = None,
     expiry_date: Optional[str] = None,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Upload a certification file"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate profile not found")
-    
     # Create unique filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{candidate.id}_{timestamp}_{file.filename}"
+    filename = f"{principal.candidate_id}_{timestamp}_{file.filename}"
     file_path = UPLOAD_DIR / "certifications" / filename
     file_path.parent.mkdir(exist_ok=True)
     
@@ -382,7 +327,7 @@ async def upload_certification(
     
     # Save to database
     certification = Certification(
-        candidate_id=candidate.id,
+        candidate_id=principal.candidate_id,
         name=name or file.filename,
         issuer=issuer,
         filename=file.filename,
@@ -403,34 +348,22 @@ async def upload_certification(
 
 @router.get("/certifications", response_model=List[CertificationRead])
 def get_certifications(
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
     session: Session = Depends(get_session)
 ):
     """Get all certifications for current candidate"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-    
-    return candidate.certifications
+    return session.exec(select(Certification).where(Certification.candidate_id == principal.candidate_id)).all()
 
 
 @router.delete("/certifications/{certification_id}", response_model=dict)
 def delete_certification(
     certification_id: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session)
 ):
     """Delete a certification"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     certification = session.get(Certification, certification_id)
-    if not certification or certification.candidate.user_id != user.id:
+    if not certification or certification.candidate_id != principal.candidate_id:
         raise HTTPException(status_code=404, detail="Certification not found")
     
     # Delete file
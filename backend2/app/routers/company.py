@@ -5,10 +5,11 @@ Recruiter/Admin company profile management
 
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlmodel import Session, select
-from app.database import get_session
-from app.models import Company, User
+from app.database import get_session, pin_to_primary
+from app.models import Company
 from app.schemas import CompanyRead, CompanyCreate
-from app.security import get_current_user
+from app.identity import Principal, get_current_company_scope, get_current_principal, principal_cache
+from app.organizations import assign_organization
 
 router = APIRouter(prefix="/company", tags=["Company"])
 
@@ -16,26 +17,25 @@ router = APIRouter(prefix="/company", tags=["Company"])
 @router.post("/profile", response_model=dict)
 def create_company_profile(
     company_data: CompanyCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session)
 ):
     """Create company profile (for recruiters/admins)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Check if company already exists
-    existing = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if existing:
+    if principal.company_id is not None:
         raise HTTPException(status_code=400, detail="Company profile already exists for this user")
     
     company = Company(
-        user_id=user.id,
+        user_id=principal.user_id,
         **company_data.dict()
     )
     session.add(company)
+    assign_organization(session, company)
     session.commit()
+    pin_to_primary(principal.user_id)
     session.refresh(company)
+    # Colleagues in the organization now include this account in their scope
+    principal_cache.invalidate_org(company.org_id)
     
     return {
         "message": "Company profile created",
@@ -47,41 +47,34 @@ def create_company_profile(
 
 @router.get("/profile", response_model=CompanyRead)
 def get_company_profile(
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Get company profile"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
-    return company
+    return session.get(Company, principal.company_id)
 
 
 @router.put("/profile", response_model=dict)
 def update_company_profile(
     company_data: CompanyCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Update company profile"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
+    company = session.get(Company, principal.company_id)
+    renamed = company_data.company_name != company.company_name
     
     for key, value in company_data.dict().items():
         setattr(company, key, value)
     
     session.add(company)
+    previous_org_id = assign_organization(session, company) if renamed else company.org_id
     session.commit()
+    pin_to_primary(principal.user_id)
     session.refresh(company)
+    if renamed:
+        # The account moved to another organization; both scopes changed
+        principal_cache.invalidate_org(previous_org_id)
+        principal_cache.invalidate_org(company.org_id)
     
     return {"message": "Company profile updated", "company_id": company.id}
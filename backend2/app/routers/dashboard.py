@@ -3,163 +3,87 @@ Dashboard routes for candidates and recruiters
 Recommendations, matches, applications, invites, shortlists
 """
 
+import asyncio
 import logging
-import json
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy import func
 from sqlmodel import Session, select, or_, and_
-from typing import List, Dict, Any
-from app.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Dict, Any, Optional
+from app.database import (
+    gather_queries, get_async_read_session, run_in_sync_session, statement_timeout, sync_from_primary
+)
 from app.models import (
-    User, Candidate, Company, JobPosting, JobProfile, 
-    Match, Application, Swipe, UserRole, Skill, LocationPreference
+    User, Candidate, Company, JobPosting, JobProfile,
+    Match, Application, Swipe
 )
 from app.security import get_current_user
+from app.identity import Principal, get_current_candidate, get_current_company_scope, get_current_principal
+from app.scoring import profile_matrix
+from app.match_scores import POSTING, PROFILE, match_score_materializer, read_profile_page, score_profile_page
+from app.feed_state import candidate_feed_state, posting_feed_state
+from app.swipe_decks import swipe_decks
+from app.streaming import ndjson_response, streamed, wants_ndjson
+from app.values import enum_value
+from app.pagination import page_limit
+from app.repositories import CandidateRows, PostingRows, load_candidate_rows, load_posting_rows
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
-
-
-def calculate_job_match_score(job_posting: JobPosting, job_profile: JobProfile, session: Session) -> dict:
-    """Calculate match score from candidate perspective"""
-    score = 0
-    details = {
-        "product_match": 0,
-        "skills_match": 0,
-        "experience_match": 0,
-        "salary_match": 0,
-        "location_match": 0
-    }
-    
-    # Product & Role match (35%)
-    if job_posting.product_vendor == job_profile.product_vendor:
-        if job_posting.product_type == job_profile.product_type:
-            details["product_match"] = 35
-            score += 35
-        else:
-            details["product_match"] = 20
-            score += 20
-    
-    # Skills match (25%)
-    try:
-        required_skills = json.loads(job_posting.required_skills) if job_posting.required_skills else []
-        candidate_skills = session.exec(
-            select(Skill).where(Skill.job_profile_id == job_profile.id)
-        ).all()
-        candidate_skill_names = [s.skill_name.lower() for s in candidate_skills]
-        
-        if required_skills and candidate_skills:
-            matched = 0
-            for req_skill in required_skills:
-                skill_lower = req_skill.lower() if isinstance(req_skill, str) else str(req_skill).lower()
-                for cand_skill in candidate_skill_names:
-                    if skill_lower in cand_skill or cand_skill in skill_lower:
-                        matched += 1
-                        break
-            skill_ratio = matched / len(required_skills) if required_skills else 0
-            details["skills_match"] = int(25 * skill_ratio)
-            score += details["skills_match"]
-    except:
-        pass
-    
-    # Experience match (20%)
-    try:
-        seniority_parts = job_posting.seniority_level.split("-")
-        min_years = int(seniority_parts[0].strip())
-        if job_profile.years_of_experience >= min_years:
-            details["experience_match"] = 20
-            score += 20
-    except:
-        details["experience_match"] = 10
-        score += 10
-    
-    # Salary match (10%)
-    try:
-        profile_min = float(job_profile.salary_min) if job_profile.salary_min else 0
-        posting_max = float(job_posting.salary_max) if job_posting.salary_max else float('inf')
-        if profile_min <= posting_max:
-            details["salary_match"] = 10
-            score += 10
-    except:
-        pass
-    
-    # Location match (10%)
-    location_prefs = session.exec(
-        select(LocationPreference).where(LocationPreference.job_profile_id == job_profile.id)
-    ).all()
-    
-    job_location = job_posting.location.lower() if job_posting.location else ""
-    
-    for loc_pref in location_prefs:
-        loc_city = (loc_pref.city or "").lower()
-        loc_state = (loc_pref.state or "").lower()
-        if loc_city in job_location or loc_state in job_location or "remote" in job_location:
-            details["location_match"] = 10
-            score += 10
-            break
-    
-    return {"score": min(score, 100), "details": details}
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"], dependencies=[statement_timeout("dashboard")])
 
 
 # ============ CANDIDATE DASHBOARD ============
 
 @router.get("/candidate/recommendations", response_model=List[Dict[str, Any]])
-def get_candidate_recommendations(
+async def get_candidate_recommendations(
+    response: Response,
     job_profile_id: int = Query(..., description="Job profile ID to get recommendations for"),
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Jobs per page; all jobs when no limit or cursor is passed"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from the previous page"),
+    principal: Principal = Depends(get_current_candidate),
+    session: AsyncSession = Depends(get_async_read_session)
 ):
-    """Get recommended jobs for a specific candidate job profile"""
+    """
+    Get recommended jobs for a specific candidate job profile, best match first.
+    Paged only when a limit or cursor is passed; the body stays a plain list
+    and the cursor for the next page is returned in the X-Next-Cursor header.
+    """
     logger.info(f"[CANDIDATE RECOMMENDATIONS] Getting recs for profile {job_profile_id}")
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user or user.role != UserRole.CANDIDATE:
-        raise HTTPException(status_code=403, detail="Candidates only")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate profile not found")
-    
     # Get the job profile
-    job_profile = session.get(JobProfile, job_profile_id)
-    if not job_profile or job_profile.candidate_id != candidate.id:
+    job_profile = await session.get(JobProfile, job_profile_id)
+    if not job_profile or job_profile.candidate_id != principal.candidate_id:
         raise HTTPException(status_code=404, detail="Job profile not found")
     
-    # Get all active job postings (broader search)
-    all_jobs = session.exec(select(JobPosting).where(JobPosting.is_active == True)).all()
-    logger.info(f"[CANDIDATE RECOMMENDATIONS] Evaluating {len(all_jobs)} active jobs")
+    limit = page_limit(limit, cursor)
+    if match_score_materializer.covers_profile(job_profile_id):
+        # Read the page straight from the materialized score index
+        page, total = await session.run_sync(read_profile_page, job_profile_id, limit, cursor)
+    else:
+        page, total = await run_in_sync_session(session, score_profile_page, job_profile_id, limit, cursor)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    page_ids = [entry.key for entry in page.items]
+    # Postings on the page with their companies, in one query
+    jobs_by_id = {
+        job.id: (job, company) for job, company in (await session.exec(
+            select(JobPosting, Company)
+            .outerjoin(Company, Company.id == JobPosting.company_id)
+            .where(JobPosting.id.in_(page_ids))
+        )).all()
+    } if page_ids else {}
+    
+    # The candidate's swipes and matches for the whole page
+    feed = await candidate_feed_state(session, principal.candidate_id, page_ids, swipe_actor="candidate")
     
     # Format response with match info
     recommendations = []
-    for job in all_jobs:
-        # Calculate match score
-        match_info = calculate_job_match_score(job, job_profile, session)
-        
-        # Only include jobs with some match (40%+ threshold)
-        if match_info["score"] < 40:
-            continue
-        
-        # Check if already interacted
-        existing_swipe = session.exec(
-            select(Swipe).where(
-                and_(
-                    Swipe.candidate_id == candidate.id,
-                    Swipe.job_posting_id == job.id,
-                    Swipe.action_by == "candidate"
-                )
-            )
-        ).first()
-        
-        # Get match if exists
-        match = session.exec(
-            select(Match).where(
-                and_(
-                    Match.candidate_id == candidate.id,
-                    Match.job_posting_id == job.id
-                )
-            )
-        ).first()
+    for entry in page.items:
+        job, company = jobs_by_id[entry.key]
+        match_info = {"score": entry.score, "details": entry.item}
         
-        # Get company info
-        company = session.get(Company, job.company_id)
+        # Already interacted, match if exists
+        existing_swipe = feed.swipes.get(job.id)
+        match = feed.matches.get(job.id)
         
         recommendations.append({
             "job_posting": {
@@ -168,11 +92,11 @@ def get_candidate_recommendations(
                 "company_id": job.company_id,
                 "company_name": company.company_name if company else "Unknown",
                 "location": job.location,
-                "worktype": job.worktype.value if job.worktype else None,
-                "employment_type": job.employment_type.value if job.employment_type else None,
+                "worktype": enum_value(job.worktype),
+                "employment_type": enum_value(job.employment_type),
                 "salary_min": job.salary_min,
                 "salary_max": job.salary_max,
-                "salary_currency": job.salary_currency.value if job.salary_currency else None,
+                "salary_currency": enum_value(job.salary_currency),
                 "job_description": job.job_description,
                 "seniority_level": job.seniority_level,
                 "required_skills": job.required_skills,
@@ -188,55 +112,117 @@ def get_candidate_recommendations(
             "recruiter_invited": match.company_asked_to_apply if match else False
         })
     
-    # Sort by match score
-    recommendations.sort(key=lambda x: x["match_percentage"], reverse=True)
-    logger.info(f"[CANDIDATE RECOMMENDATIONS] Returning {len(recommendations)} recommendations")
+    logger.info(f"[CANDIDATE RECOMMENDATIONS] Returning {len(recommendations)} of {total} recommendations")
     
     return recommendations
 
 
-@router.get("/candidate/recruiter-invites", response_model=List[Dict[str, Any]])
-def get_recruiter_invites(
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+async def _deal(session: AsyncSession, kind: str, deck_id: int, limit: int):
+    """Top cards of a swipe deck, building the deck on a miss"""
+    dealt = swipe_decks.next_cards(kind, deck_id, limit)
+    if dealt is None:
+        await run_in_sync_session(session, swipe_decks.fill, kind, deck_id)
+        dealt = swipe_decks.next_cards(kind, deck_id, limit) or ([], 0)
+    return dealt
+
+
+@router.get("/candidate/deck", response_model=Dict[str, Any])
+async def get_candidate_deck(
+    job_profile_id: int = Query(..., description="Job profile ID whose swipe deck to deal from"),
+    limit: int = Query(10, ge=1, le=50, description="Cards to deal"),
+    principal: Principal = Depends(get_current_candidate),
+    session: AsyncSession = Depends(get_async_read_session)
 ):
-    """Get all recruiter invites (ask_to_apply actions from recruiters)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user or user.role != UserRole.CANDIDATE:
-        raise HTTPException(status_code=403, detail="Candidates only")
+    """
+    Next unswiped jobs for a job profile, best match first, from the
+    precomputed swipe deck. Swiping removes a card from the deck.
+    """
+    job_profile = await session.get(JobProfile, job_profile_id)
+    if not job_profile or job_profile.candidate_id != principal.candidate_id:
+        raise HTTPException(status_code=404, detail="Job profile not found")
     
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate profile not found")
+    cards, remaining = await _deal(session, PROFILE, job_profile_id, limit)
+    posting_ids = [card.key for card in cards]
+    (job_rows,), feed = await asyncio.gather(
+        gather_queries(
+            session,
+            select(JobPosting, Company)
+            .join(Company, Company.id == JobPosting.company_id)
+            .where(JobPosting.id.in_(posting_ids), JobPosting.is_active == True),
+        ),
+        candidate_feed_state(session, principal.candidate_id, posting_ids, swipe_actor="candidate"),
+    )
+    jobs_by_id = {job.id: (job, company) for job, company in job_rows}
+    
+    # Drop cards closed or swiped (on another worker) since the deck was built
+    stale = [key for key in posting_ids if key not in jobs_by_id or key in feed.swipes]
+    if stale:
+        swipe_decks.remove(PROFILE, job_profile_id, stale)
     
+    deck = []
+    for card in cards:
+        if card.key in stale:
+            continue
+        job, company = jobs_by_id[card.key]
+        match = feed.matches.get(job.id)
+        deck.append({
+            "job_posting": {
+                "id": job.id,
+                "job_title": job.job_title,
+                "company_id": job.company_id,
+                "company_name": company.company_name,
+                "location": job.location,
+                "worktype": enum_value(job.worktype),
+                "employment_type": enum_value(job.employment_type),
+                "salary_min": job.salary_min,
+                "salary_max": job.salary_max,
+                "salary_currency": enum_value(job.salary_currency),
+                "job_description": job.job_description,
+                "seniority_level": job.seniority_level,
+                "required_skills": job.required_skills,
+                "product_vendor": job.product_vendor,
+                "product_type": job.product_type
+            },
+            "match_percentage": card.score,
+            "match_details": card.item,
+            "recruiter_interested": match.company_liked if match else False,
+            "recruiter_invited": match.company_asked_to_apply if match else False
+        })
+    
+    return {
+        "job_profile_id": job_profile_id,
+        "cards": deck,
+        "remaining": remaining - len(stale)
+    }
+
+
+@router.get("/candidate/recruiter-invites", response_model=List[Dict[str, Any]])
+async def get_recruiter_invites(
+    principal: Principal = Depends(get_current_candidate),
+    session: AsyncSession = Depends(get_async_read_session)
+):
+    """Get all recruiter invites (ask_to_apply actions from recruiters)"""
     # Get all ask_to_apply swipes from recruiters
-    invites_query = select(Swipe).where(
-        and_(
-            Swipe.candidate_id == candidate.id,
-            Swipe.action == "ask_to_apply",
-            Swipe.action_by == "recruiter"
+    # Swipe ⋈ posting ⋈ company, plus posting skills and the applied set
+    invites_query = (
+        select(Swipe, JobPosting, Company)
+        .join(JobPosting, JobPosting.id == Swipe.job_posting_id)
+        .join(Company, Company.id == Swipe.company_id)
+        .where(
+            and_(
+                Swipe.candidate_id == principal.candidate_id,
+                Swipe.action == "ask_to_apply",
+                Swipe.action_by == "recruiter"
+            )
         )
+        .order_by(Swipe.id)
     )
-    invites = session.exec(invites_query).all()
+    loaded = await load_posting_rows(session, invites_query, applied_by=principal.candidate_id)
     
     result = []
-    for invite in invites:
-        job_posting = session.get(JobPosting, invite.job_posting_id)
-        company = session.get(Company, invite.company_id)
-        
-        # Check if already applied
-        already_applied = session.exec(
-            select(Application).where(
-                Application.candidate_id == candidate.id,
-                Application.job_posting_id == invite.job_posting_id
-            )
-        ).first() is not None
-        
-        # Get posting skills
-        from app.models import JobPostingSkill
-        posting_skills = session.exec(
-            select(JobPostingSkill).where(JobPostingSkill.job_posting_id == job_posting.id)
-        ).all()
+    for invite, job_posting, company in loaded.rows:
+        posting_skills = loaded.posting_skills.get(job_posting.id, [])
+        already_applied = job_posting.id in loaded.applied_posting_ids
         
         result.append({
             "invite_id": invite.id,
@@ -281,18 +267,21 @@ def get_recruiter_invites(
 
 
 @router.get("/candidate/available-jobs", response_model=List[Dict[str, Any]])
-def get_available_jobs(
+async def get_available_jobs(
+    request: Request,
     current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_read_session)
 ):
-    """Get all available active jobs"""
-    # Get all active job postings
-    jobs = session.exec(select(JobPosting).where(JobPosting.is_active == True)).all()
+    """Get all available active jobs (streamed with Accept: application/x-ndjson)"""
+    # Get all active job postings with their company
+    query = (
+        select(JobPosting, Company)
+        .outerjoin(Company, Company.id == JobPosting.company_id)
+        .where(JobPosting.is_active == True)
+    )
     
-    result = []
-    for job in jobs:
-        company = session.get(Company, job.company_id)
-        result.append({
+    def job_preview(job: JobPosting, company: Optional[Company]) -> Dict[str, Any]:
+        return {
             "id": job.id,
             "job_title": job.job_title,
             "company_name": company.company_name if company else "Unknown",
@@ -307,124 +296,120 @@ def get_available_jobs(
             "product_type": job.product_type,
             "job_role": job.job_role,
             "created_at": job.created_at.isoformat()
-        })
+        }
     
-    return result
+    if wants_ndjson(request):
+        rows = await session.stream(streamed(query))
+        return ndjson_response(job_preview(job, company) async for job, company in rows)
+    rows = (await session.exec(query)).all()
+    
+    return [job_preview(job, company) for job, company in rows]
 
 
 @router.get("/candidate/applied-liked-jobs", response_model=Dict[str, Any])
-def get_applied_liked_jobs(
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+async def get_applied_liked_jobs(
+    principal: Principal = Depends(get_current_candidate),
+    session: AsyncSession = Depends(get_async_read_session)
 ):
     """Get jobs the candidate has applied to or liked"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user or user.role != UserRole.CANDIDATE:
-        raise HTTPException(status_code=403, detail="Candidates only")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate profile not found")
-    
-    # Get applications
-    applications = session.exec(
-        select(Application).where(Application.candidate_id == candidate.id)
-    ).all()
-    
-    # Get liked jobs (swipes)
-    liked_swipes = session.exec(
-        select(Swipe).where(
-            and_(
-                Swipe.candidate_id == candidate.id,
-                Swipe.action == "like",
-                Swipe.action_by == "candidate"
+    # Applications and liked jobs (swipes), each joined to posting and company,
+    # plus the skills of those postings
+    applied, liked = await asyncio.gather(
+        load_posting_rows(
+            session,
+            select(Application, JobPosting, Company)
+            .join(JobPosting, JobPosting.id == Application.job_posting_id)
+            .outerjoin(Company, Company.id == JobPosting.company_id)
+            .where(Application.candidate_id == principal.candidate_id)
+            .order_by(Application.id)
+        ),
+        load_posting_rows(
+            session,
+            select(Swipe, JobPosting, Company)
+            .join(JobPosting, JobPosting.id == Swipe.job_posting_id)
+            .outerjoin(Company, Company.id == JobPosting.company_id)
+            .where(
+                and_(
+                    Swipe.candidate_id == principal.candidate_id,
+                    Swipe.action == "like",
+                    Swipe.action_by == "candidate"
+                )
             )
-        )
-    ).all()
+            .order_by(Swipe.id)
+        ),
+    )
+    applied_posting_ids = {job.id for _, job, _ in applied.rows}
+    
+    def skills_of(loaded: PostingRows, job_id: int) -> List[Dict[str, Any]]:
+        return [
+            {"skill_name": sk.skill_name, "skill_category": sk.skill_category, "rating": sk.rating}
+            for sk in loaded.posting_skills.get(job_id, [])
+        ]
     
     applied_jobs = []
-    for app in applications:
-        job = session.get(JobPosting, app.job_posting_id)
-        if job:
-            company = session.get(Company, job.company_id)
-            # Skills
-            posting_skills = []
-            for sk in job.posting_skills:
-                posting_skills.append({
-                    "skill_name": sk.skill_name,
-                    "skill_category": sk.skill_category,
-                    "rating": sk.rating
-                })
-            applied_jobs.append({
-                "application_id": app.id,
-                "job_id": job.id,
-                "job_title": job.job_title,
-                "company_name": company.company_name if company else None,
-                "product_vendor": job.product_vendor,
-                "product_type": job.product_type,
-                "job_role": job.job_role,
-                "seniority_level": job.seniority_level,
-                "worktype": job.worktype,
-                "location": job.location,
-                "employment_type": job.employment_type,
-                "salary_min": job.salary_min,
-                "salary_max": job.salary_max,
-                "salary_currency": job.salary_currency,
-                "pay_type": job.pay_type,
-                "job_description": job.job_description,
-                "required_skills": job.required_skills,
-                "posting_skills": posting_skills,
-                "start_date": job.start_date,
-                "end_date": job.end_date,
-                "travel_requirements": job.travel_requirements,
-                "visa_info": job.visa_info,
-                "education_qualifications": job.education_qualifications,
-                "certifications_required": job.certifications_required,
-                "status": app.status,
-                "applied_at": app.applied_at.isoformat()
-            })
+    for app, job, company in applied.rows:
+        posting_skills = skills_of(applied, job.id)
+        applied_jobs.append({
+            "application_id": app.id,
+            "job_id": job.id,
+            "job_title": job.job_title,
+            "company_name": company.company_name if company else None,
+            "product_vendor": job.product_vendor,
+            "product_type": job.product_type,
+            "job_role": job.job_role,
+            "seniority_level": job.seniority_level,
+            "worktype": job.worktype,
+            "location": job.location,
+            "employment_type": job.employment_type,
+            "salary_min": job.salary_min,
+            "salary_max": job.salary_max,
+            "salary_currency": job.salary_currency,
+            "pay_type": job.pay_type,
+            "job_description": job.job_description,
+            "required_skills": job.required_skills,
+            "posting_skills": posting_skills,
+            "start_date": job.start_date,
+            "end_date": job.end_date,
+            "travel_requirements": job.travel_requirements,
+            "visa_info": job.visa_info,
+            "education_qualifications": job.education_qualifications,
+            "certifications_required": job.certifications_required,
+            "status": app.status,
+            "applied_at": app.applied_at.isoformat()
+        })
     
     liked_jobs = []
-    for swipe in liked_swipes:
-        job = session.get(JobPosting, swipe.job_posting_id)
-        if job:
-            company = session.get(Company, job.company_id)
-            posting_skills = []
-            for sk in job.posting_skills:
-                posting_skills.append({
-                    "skill_name": sk.skill_name,
-                    "skill_category": sk.skill_category,
-                    "rating": sk.rating
-                })
-            # Check if already applied
-            already_applied = any(a.job_posting_id == job.id for a in applications)
-            liked_jobs.append({
-                "job_id": job.id,
-                "job_title": job.job_title,
-                "company_name": company.company_name if company else None,
-                "product_vendor": job.product_vendor,
-                "product_type": job.product_type,
-                "job_role": job.job_role,
-                "seniority_level": job.seniority_level,
-                "worktype": job.worktype,
-                "location": job.location,
-                "employment_type": job.employment_type,
-                "salary_min": job.salary_min,
-                "salary_max": job.salary_max,
-                "salary_currency": job.salary_currency,
-                "pay_type": job.pay_type,
-                "job_description": job.job_description,
-                "required_skills": job.required_skills,
-                "posting_skills": posting_skills,
-                "start_date": job.start_date,
-                "end_date": job.end_date,
-                "travel_requirements": job.travel_requirements,
-                "visa_info": job.visa_info,
-                "education_qualifications": job.education_qualifications,
-                "certifications_required": job.certifications_required,
-                "already_applied": already_applied,
-                "liked_at": swipe.created_at.isoformat()
-            })
+    for swipe, job, company in liked.rows:
+        posting_skills = skills_of(liked, job.id)
+        # Check if already applied
+        already_applied = job.id in applied_posting_ids
+        liked_jobs.append({
+            "job_id": job.id,
+            "job_title": job.job_title,
+            "company_name": company.company_name if company else None,
+            "product_vendor": job.product_vendor,
+            "product_type": job.product_type,
+            "job_role": job.job_role,
+            "seniority_level": job.seniority_level,
+            "worktype": job.worktype,
+            "location": job.location,
+            "employment_type": job.employment_type,
+            "salary_min": job.salary_min,
+            "salary_max": job.salary_max,
+            "salary_currency": job.salary_currency,
+            "pay_type": job.pay_type,
+            "job_description": job.job_description,
+            "required_skills": job.required_skills,
+            "posting_skills": posting_skills,
+            "start_date": job.start_date,
+            "end_date": job.end_date,
+            "travel_requirements": job.travel_requirements,
+            "visa_info": job.visa_info,
+            "education_qualifications": job.education_qualifications,
+            "certifications_required": job.certifications_required,
+            "already_applied": already_applied,
+            "liked_at": swipe.created_at.isoformat()
+        })
     
     return {
         "applied_jobs": applied_jobs,
@@ -433,49 +418,34 @@ def get_applied_liked_jobs(
 
 
 @router.get("/candidate/matches", response_model=List[Dict[str, Any]])
-def get_candidate_matches(
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+async def get_candidate_matches(
+    principal: Principal = Depends(get_current_candidate),
+    session: AsyncSession = Depends(get_async_read_session)
 ):
     """Get mutual matches (both candidate and recruiter liked)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user or user.role != UserRole.CANDIDATE:
-        raise HTTPException(status_code=403, detail="Candidates only")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate profile not found")
-    
     # Get mutual matches
-    matches = session.exec(
-        select(Match).where(
+    # Match ⋈ posting ⋈ company ⋈ recruiter user, plus posting skills and the applied set
+    loaded = await load_posting_rows(
+        session,
+        select(Match, JobPosting, Company, User)
+        .join(JobPosting, JobPosting.id == Match.job_posting_id)
+        .join(Company, Company.id == Match.company_id)
+        .outerjoin(User, User.id == Company.user_id)
+        .where(
             and_(
-                Match.candidate_id == candidate.id,
+                Match.candidate_id == principal.candidate_id,
                 Match.candidate_liked == True,
                 Match.company_liked == True
             )
         )
-    ).all()
+        .order_by(Match.id),
+        applied_by=principal.candidate_id,
+    )
     
     result = []
-    for match in matches:
-        job_posting = session.get(JobPosting, match.job_posting_id)
-        company = session.get(Company, match.company_id)
-        company_user = session.get(User, company.user_id) if company else None
-        
-        # Check if candidate already applied to this job
-        already_applied = session.exec(
-            select(Application).where(
-                Application.candidate_id == candidate.id,
-                Application.job_posting_id == match.job_posting_id
-            )
-        ).first() is not None
-
-        # Get posting skills
-        from app.models import JobPostingSkill
-        posting_skills = session.exec(
-            select(JobPostingSkill).where(JobPostingSkill.job_posting_id == job_posting.id)
-        ).all()
+    for match, job_posting, company, company_user in loaded.rows:
+        posting_skills = loaded.posting_skills.get(job_posting.id, [])
+        already_applied = job_posting.id in loaded.applied_posting_ids
         
         result.append({
             "match_id": match.id,
@@ -517,89 +487,76 @@ def get_candidate_matches(
 
 # ============ RECRUITER DASHBOARD ============
 
+def _score_profiles(session: Session, job_posting: JobPosting, job_profile_ids: List[int]) -> Dict[int, int]:
+    sync_from_primary(profile_matrix)
+    scored = profile_matrix.score(job_posting, job_profile_ids)
+    return {int(profile_id): scored.score(i) for i, profile_id in enumerate(scored.profile_ids)}
+
+
+def _analytics_queries(job_posting_id: int):
+    """Recruiter likes/invites and applications for a posting, counted by _analytics"""
+    return (
+        select(Swipe).where(
+            and_(
+                Swipe.job_posting_id == job_posting_id,
+                Swipe.action.in_(["like", "ask_to_apply"]),
+                Swipe.action_by == "recruiter"
+            )
+        ),
+        select(Application).where(Application.job_posting_id == job_posting_id),
+    )
+
+
+def _analytics(shortlisted: List[Swipe], applications: List[Application]) -> Dict[str, int]:
+    return {
+        "shortlisted_count": len(shortlisted),
+        "required_count": 0,  # Placeholder - can be set in job posting
+        "interview_count": len([a for a in applications if a.status == "shortlisted"]),
+        "offered_count": len([a for a in applications if a.status == "offered"])
+    }
+
+
 @router.get("/recruiter/recommendations", response_model=Dict[str, Any])
-def get_recruiter_recommendations(
+async def get_recruiter_recommendations(
     job_posting_id: int = Query(..., description="Job posting ID to get candidate recommendations for"),
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    principal: Principal = Depends(get_current_company_scope),
+    session: AsyncSession = Depends(get_async_read_session)
 ):
     """Get recommended candidates for a specific job posting with match analytics"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user or user.role == UserRole.CANDIDATE:
-        raise HTTPException(status_code=403, detail="Recruiters only")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
-    # Get all company IDs with the same company name
-    company_ids = list(session.exec(
-        select(Company.id).where(Company.company_name == company.company_name)
-    ).all())
-    
     # Get the job posting
-    job_posting = session.get(JobPosting, job_posting_id)
-    if not job_posting or job_posting.company_id not in company_ids:
+    job_posting = await session.get(JobPosting, job_posting_id)
+    if not job_posting or job_posting.company_id not in principal.company_ids:
         raise HTTPException(status_code=404, detail="Job posting not found")
     
     # Get matching candidates (by product vendor/type/role in their job profiles)
+    # together with the analytics counts
     query = select(JobProfile).where(
         and_(
             JobProfile.product_vendor == job_posting.product_vendor,
             JobProfile.product_type == job_posting.product_type
         )
     )
-    matching_profiles = session.exec(query).all()
+    matching_profiles, shortlisted, applications = await gather_queries(
+        session, query, *_analytics_queries(job_posting_id)
+    )
     
-    # Get analytics counts
-    shortlisted_count = session.exec(
-        select(Swipe).where(
-            and_(
-                Swipe.job_posting_id == job_posting_id,
-                Swipe.action.in_(["like", "ask_to_apply"]),
-                Swipe.action_by == "recruiter"
-            )
-        )
-    ).all()
+    # Score them with the same engine as the other recommendation routes
+    score_by_profile = await run_in_sync_session(session, _score_profiles, job_posting, [p.id for p in matching_profiles])
     
-    applications_count = session.exec(
-        select(Application).where(Application.job_posting_id == job_posting_id)
-    ).all()
+    # Candidates, and recruiter swipes / applications on this posting, as sets
+    (candidate_rows,), feed = await asyncio.gather(
+        gather_queries(session, select(Candidate).where(Candidate.id.in_(query.with_only_columns(JobProfile.candidate_id)))),
+        posting_feed_state(session, job_posting_id, swipe_actor="recruiter"),
+    )
+    candidates_by_id = {c.id: c for c in candidate_rows}
     
     recommendations = []
     for profile in matching_profiles:
-        candidate = session.get(Candidate, profile.candidate_id)
+        candidate = candidates_by_id[profile.candidate_id]
         
-        # Check existing swipe
-        existing_swipe = session.exec(
-            select(Swipe).where(
-                and_(
-                    Swipe.candidate_id == candidate.id,
-                    Swipe.job_posting_id == job_posting_id,
-                    Swipe.action_by == "recruiter"
-                )
-            )
-        ).first()
-        
-        # Get match
-        match = session.exec(
-            select(Match).where(
-                and_(
-                    Match.candidate_id == candidate.id,
-                    Match.job_posting_id == job_posting_id
-                )
-            )
-        ).first()
-        
-        # Check application status
-        application = session.exec(
-            select(Application).where(
-                and_(
-                    Application.candidate_id == candidate.id,
-                    Application.job_posting_id == job_posting_id
-                )
-            )
-        ).first()
+        # Existing swipe and application status
+        existing_swipe = feed.swipes.get(candidate.id)
+        application = feed.applications.get(candidate.id)
         
         recommendations.append({
             "candidate": {
@@ -620,7 +577,7 @@ def get_recruiter_recommendations(
                 "visa_status": profile.visa_status,
                 "availability_date": profile.availability_date
             },
-            "match_percentage": match.match_percentage if match else 80.0,
+            "match_percentage": score_by_profile.get(profile.id, 0),
             "already_actioned": existing_swipe is not None,
             "action_taken": existing_swipe.action if existing_swipe else None,
             "has_applied": application is not None,
@@ -638,40 +595,135 @@ def get_recruiter_recommendations(
     return {
         "job_posting_id": job_posting_id,
         "job_title": job_posting.job_title,
-        "analytics": {
-            "shortlisted_count": len(shortlisted_count),
-            "required_count": 0,  # Placeholder - can be set in job posting
-            "interview_count": len([a for a in applications_count if a.status == "shortlisted"]),
-            "offered_count": len([a for a in applications_count if a.status == "offered"])
-        },
+        "analytics": _analytics(shortlisted, applications),
         "recommendations": recommendations
     }
 
 
-@router.get("/recruiter/shortlist", response_model=List[Dict[str, Any]])
-def get_recruiter_shortlist(
-    job_posting_id: int = Query(None, description="Filter by specific job posting"),
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+@router.get("/recruiter/deck", response_model=Dict[str, Any])
+async def get_recruiter_deck(
+    job_posting_id: int = Query(..., description="Job posting ID whose swipe deck to deal from"),
+    limit: int = Query(10, ge=1, le=50, description="Cards to deal"),
+    principal: Principal = Depends(get_current_company_scope),
+    session: AsyncSession = Depends(get_async_read_session)
 ):
-    """Get shortlisted candidates (liked or asked to apply)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user or user.role == UserRole.CANDIDATE:
-        raise HTTPException(status_code=403, detail="Recruiters only")
+    """
+    Next candidates not yet swiped on for a job posting, best matching
+    profile per candidate, from the precomputed swipe deck, with the same
+    analytics as /recruiter/recommendations
+    """
+    job_posting = await session.get(JobPosting, job_posting_id)
+    if not job_posting or job_posting.company_id not in principal.company_ids:
+        raise HTTPException(status_code=404, detail="Job posting not found")
     
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
+    cards, remaining = await _deal(session, POSTING, job_posting_id, limit)
+    candidate_ids = [card.group for card in cards]
+    (profile_rows, shortlisted, applications), feed = await asyncio.gather(
+        gather_queries(
+            session,
+            select(JobProfile, Candidate)
+            .join(Candidate, Candidate.id == JobProfile.candidate_id)
+            .where(JobProfile.id.in_([card.key for card in cards])),
+            *_analytics_queries(job_posting_id),
+        ),
+        posting_feed_state(session, job_posting_id, candidate_ids, swipe_actor="recruiter"),
+    )
+    profiles_by_id = {profile.id: (profile, candidate) for profile, candidate in profile_rows}
     
-    # Get all company IDs with the same company name
-    company_ids = list(session.exec(
-        select(Company.id).where(Company.company_name == company.company_name)
-    ).all())
+    # Drop cards deleted or swiped (on another worker) since the deck was built
+    stale = [card.group for card in cards if card.key not in profiles_by_id or card.group in feed.swipes]
+    if stale:
+        swipe_decks.remove(POSTING, job_posting_id, stale)
     
+    deck = []
+    for card in cards:
+        if card.group in stale:
+            continue
+        profile, candidate = profiles_by_id[card.key]
+        match = feed.matches.get(candidate.id)
+        application = feed.applications.get(candidate.id)
+        deck.append({
+            "candidate": {
+                "id": candidate.id,
+                "name": candidate.name,
+                "email": candidate.email,
+                "phone": candidate.phone,
+                "location_state": candidate.location_state
+            },
+            "job_profile": {
+                "id": profile.id,
+                "profile_name": profile.profile_name,
+                "job_role": profile.job_role,
+                "years_of_experience": profile.years_of_experience,
+                "worktype": enum_value(profile.worktype),
+                "employment_type": enum_value(profile.employment_type),
+                "salary_min": profile.salary_min,
+                "salary_max": profile.salary_max,
+                "visa_status": enum_value(profile.visa_status),
+                "availability_date": profile.availability_date
+            },
+            "match_percentage": card.score,
+            "match_details": card.item,
+            "candidate_interested": match.candidate_liked if match else False,
+            "has_applied": application is not None,
+            "application_status": application.status if application else None
+        })
+    
+    return {
+        "job_posting_id": job_posting_id,
+        "job_title": job_posting.job_title,
+        "analytics": _analytics(shortlisted, applications),
+        "cards": deck,
+        "remaining": remaining - len(stale)
+    }
+
+
+def _profile_details(loaded: CandidateRows, job_profile_id: int, candidate_id: int):
+    """Formatted skills, location preferences, resumes and certifications from a load_candidate_rows result"""
+    skills = loaded.skills.get(job_profile_id, [])
+    location_prefs = loaded.location_preferences.get(job_profile_id, [])
+    resumes = loaded.resumes.get(candidate_id, [])
+    certs = loaded.certifications.get(candidate_id, [])
+    skills_list = [
+        {"skill_name": sk.skill_name, "skill_category": sk.skill_category, "proficiency_level": sk.proficiency_level}
+        for sk in skills
+    ]
+    location_prefs_list = [{"city": lp.city, "state": lp.state, "country": lp.country} for lp in location_prefs]
+    resumes_list = [
+        {
+            "id": r.id,
+            "filename": r.filename,
+            "storage_path": r.storage_path,
+            "uploaded_at": r.uploaded_at.isoformat() if r.uploaded_at else None
+        }
+        for r in resumes
+    ]
+    certs_list = [
+        {
+            "id": ct.id,
+            "name": ct.name,
+            "issuer": ct.issuer,
+            "filename": ct.filename,
+            "storage_path": ct.storage_path,
+            "issued_date": ct.issued_date,
+            "expiry_date": ct.expiry_date
+        }
+        for ct in certs
+    ]
+    return skills_list, location_prefs_list, resumes_list, certs_list
+
+
+@router.get("/recruiter/shortlist", response_model=List[Dict[str, Any]])
+async def get_recruiter_shortlist(
+    job_posting_id: int = Query(None, description="Filter by specific job posting"),
+    principal: Principal = Depends(get_current_company_scope),
+    session: AsyncSession = Depends(get_async_read_session)
+):
+    """Get shortlisted candidates (liked or asked to apply)"""
     # Build query
     query = select(Swipe).where(
         and_(
-            Swipe.company_id.in_(company_ids),
+            Swipe.company_id.in_(principal.company_ids),
             Swipe.action.in_(["like", "ask_to_apply"]),
             Swipe.action_by == "recruiter"
         )
@@ -680,58 +732,17 @@ def get_recruiter_shortlist(
     if job_posting_id:
         query = query.where(Swipe.job_posting_id == job_posting_id)
     
-    shortlisted = session.exec(query).all()
+    # Swipes with their candidates, profiles, postings and profile details in one round
+    loaded = await load_candidate_rows(session, query)
     
     result = []
-    for swipe in shortlisted:
-        candidate = session.get(Candidate, swipe.candidate_id)
-        job_profile = session.get(JobProfile, swipe.job_profile_id)
-        job_posting = session.get(JobPosting, swipe.job_posting_id)
+    for swipe in loaded.rows:
+        candidate = loaded.candidates[swipe.candidate_id]
+        job_profile = loaded.job_profiles[swipe.job_profile_id]
+        job_posting = loaded.job_postings[swipe.job_posting_id]
 
-        # Skills
-        skills_list = []
-        if job_profile:
-            for sk in job_profile.skills:
-                skills_list.append({
-                    "skill_name": sk.skill_name,
-                    "skill_category": sk.skill_category,
-                    "proficiency_level": sk.proficiency_level
-                })
-
-        # Location preferences
-        location_prefs = []
-        if job_profile:
-            for lp in job_profile.location_preferences:
-                location_prefs.append({
-                    "city": lp.city,
-                    "state": lp.state,
-                    "country": lp.country
-                })
-
-        # Resumes
-        resumes_list = []
-        if candidate:
-            for r in candidate.resumes:
-                resumes_list.append({
-                    "id": r.id,
-                    "filename": r.filename,
-                    "storage_path": r.storage_path,
-                    "uploaded_at": r.uploaded_at.isoformat() if r.uploaded_at else None
-                })
-
-        # Certifications
-        certs_list = []
-        if candidate:
-            for ct in candidate.certifications:
-                certs_list.append({
-                    "id": ct.id,
-                    "name": ct.name,
-                    "issuer": ct.issuer,
-                    "filename": ct.filename,
-                    "storage_path": ct.storage_path,
-                    "issued_date": ct.issued_date,
-                    "expiry_date": ct.expiry_date
-                })
+        # Skills, location preferences, resumes and certifications
+        skills_list, location_prefs, resumes_list, certs_list = _profile_details(loaded, job_profile.id, candidate.id)
 
         result.append({
             "candidate": {
@@ -794,52 +805,32 @@ def get_recruiter_shortlist(
 
 
 @router.get("/recruiter/applications", response_model=List[Dict[str, Any]])
-def get_recruiter_applications(
+async def get_recruiter_applications(
     job_posting_id: int = Query(None, description="Filter by specific job posting"),
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    principal: Principal = Depends(get_current_company_scope),
+    session: AsyncSession = Depends(get_async_read_session)
 ):
     """Get all applications to recruiter's job postings"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user or user.role == UserRole.CANDIDATE:
-        raise HTTPException(status_code=403, detail="Recruiters only")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
-    # Get all company IDs with the same company name
-    company_ids = list(session.exec(
-        select(Company.id).where(Company.company_name == company.company_name)
-    ).all())
-    
-    # Get all job postings for this company
+    # Applications to one posting, or to every posting of this company
     if job_posting_id:
-        job_postings = [session.get(JobPosting, job_posting_id)]
-        if not job_postings[0] or job_postings[0].company_id not in company_ids:
+        job_posting = await session.get(JobPosting, job_posting_id)
+        if not job_posting or job_posting.company_id not in principal.company_ids:
             raise HTTPException(status_code=404, detail="Job posting not found")
+        query = select(Application).where(Application.job_posting_id == job_posting_id)
     else:
-        job_postings = session.exec(
-            select(JobPosting).where(JobPosting.company_id.in_(company_ids))
-        ).all()
-    
-    # Get applications for these postings
-    job_ids = [jp.id for jp in job_postings]
-    applications = session.exec(
-        select(Application).where(Application.job_posting_id.in_(job_ids))
-    ).all()
+        query = select(Application).where(Application.job_posting_id.in_(
+            select(JobPosting.id).where(JobPosting.company_id.in_(principal.company_ids))
+        ))
+    loaded = await load_candidate_rows(session, query, details=["skills"])
     
     result = []
-    for app in applications:
-        candidate = session.get(Candidate, app.candidate_id)
-        job_profile = session.get(JobProfile, app.job_profile_id)
-        job_posting = session.get(JobPosting, app.job_posting_id)
+    for app in loaded.rows:
+        candidate = loaded.candidates[app.candidate_id]
+        job_profile = loaded.job_profiles[app.job_profile_id]
+        job_posting = loaded.job_postings[app.job_posting_id]
         
-        # Gather skills for the profile
-        from app.models import Skill
-        skills = session.exec(
-            select(Skill).where(Skill.job_profile_id == job_profile.id)
-        ).all()
+        # Skills for the profile
+        skills = loaded.skills.get(job_profile.id, [])
         skills_list = [{"skill_name": s.skill_name, "skill_category": s.skill_category, "proficiency_level": s.proficiency_level} for s in skills]
         
         result.append({
@@ -889,85 +880,28 @@ def get_recruiter_applications(
 
 
 @router.get("/recruiter/matches", response_model=List[Dict[str, Any]])
-def get_recruiter_matches(
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+async def get_recruiter_matches(
+    principal: Principal = Depends(get_current_company_scope),
+    session: AsyncSession = Depends(get_async_read_session)
 ):
     """Get mutual matches for recruiter"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user or user.role == UserRole.CANDIDATE:
-        raise HTTPException(status_code=403, detail="Recruiters only")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
-    # Get all company IDs with the same company name
-    company_ids = list(session.exec(
-        select(Company.id).where(Company.company_name == company.company_name)
-    ).all())
-    
     # Get mutual matches
-    matches = session.exec(
-        select(Match).where(
-            and_(
-                Match.company_id.in_(company_ids),
-                Match.candidate_liked == True,
-                Match.company_liked == True
-            )
+    loaded = await load_candidate_rows(session, select(Match).where(
+        and_(
+            Match.company_id.in_(principal.company_ids),
+            Match.candidate_liked == True,
+            Match.company_liked == True
         )
-    ).all()
+    ))
     
     result = []
-    for match in matches:
-        candidate = session.get(Candidate, match.candidate_id)
-        job_profile = session.get(JobProfile, match.job_profile_id)
-        job_posting = session.get(JobPosting, match.job_posting_id)
-
-        # Skills
-        skills_list = []
-        if job_profile:
-            for sk in job_profile.skills:
-                skills_list.append({
-                    "skill_name": sk.skill_name,
-                    "skill_category": sk.skill_category,
-                    "proficiency_level": sk.proficiency_level
-                })
-
-        # Location preferences
-        location_prefs = []
-        if job_profile:
-            for lp in job_profile.location_preferences:
-                location_prefs.append({
-                    "city": lp.city,
-                    "state": lp.state,
-                    "country": lp.country
-                })
+    for match in loaded.rows:
+        candidate = loaded.candidates[match.candidate_id]
+        job_profile = loaded.job_profiles[match.job_profile_id]
+        job_posting = loaded.job_postings[match.job_posting_id]
 
-        # Resumes
-        resumes_list = []
-        if candidate:
-            for r in candidate.resumes:
-                resumes_list.append({
-                    "id": r.id,
-                    "filename": r.filename,
-                    "storage_path": r.storage_path,
-                    "uploaded_at": r.uploaded_at.isoformat() if r.uploaded_at else None
-                })
-
-        # Certifications
-        certs_list = []
-        if candidate:
-            for c in candidate.certifications:
-                certs_list.append({
-                    "id": c.id,
-                    "name": c.name,
-                    "issuer": c.issuer,
-                    "filename": c.filename,
-                    "storage_path": c.storage_path,
-                    "issued_date": c.issued_date,
-                    "expiry_date": c.expiry_date
-                })
+        # Skills, location preferences, resumes and certifications
+        skills_list, location_prefs, resumes_list, certs_list = _profile_details(loaded, job_profile.id, candidate.id)
 
         result.append({
             "match_id": match.id,
@@ -1035,34 +969,28 @@ def get_recruiter_matches(
 # ============================================================================
 
 @router.get("/team-members")
-def get_team_members(
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+async def get_team_members(
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_async_read_session)
 ):
     """Get team members for the current user's company with job posting counts.
     Admin sees: self + HR + Recruiter
     HR sees: self + Recruiter
     Recruiter sees: only self
     """
-    user_email = current_user.get("sub")
-    user_id = current_user.get("user_id")
-    user_role = current_user.get("role")
-    logger.info(f"[TEAM] Fetching team members for {user_email} (role: {user_role})")
-
-    # Get current user's company record
-    my_company = session.exec(
-        select(Company).where(Company.user_id == user_id)
-    ).first()
+    user_id = principal.user_id
+    user_role = principal.role.value
+    logger.info(f"[TEAM] Fetching team members for {principal.email} (role: {user_role})")
 
-    if not my_company:
+    if principal.company_id is None:
         return {"team_members": [], "my_role": user_role}
 
-    company_name = my_company.company_name
+    company_name = principal.company_name
 
-    # Find all company records with same company_name
-    all_company_records = session.exec(
-        select(Company).where(Company.company_name == company_name)
-    ).all()
+    # Find all company records in the organization
+    all_company_records = (await session.exec(
+        select(Company).where(Company.id.in_(principal.company_ids))
+    )).all()
 
     # Determine which roles the current user can see
     if user_role == "admin":
@@ -1078,14 +1006,14 @@ def get_team_members(
         if comp.employee_type.upper() not in visible_roles:
             continue
 
-        user = session.get(User, comp.user_id)
+        user = await session.get(User, comp.user_id)
         if not user:
             continue
 
         # Count job postings for this company record
-        job_count = len(session.exec(
-            select(JobPosting).where(JobPosting.company_id == comp.id)
-        ).all())
+        job_count = (await session.exec(
+            select(func.count()).select_from(JobPosting).where(JobPosting.company_id == comp.id)
+        )).one()
 
         team_members.append({
             "id": comp.id,
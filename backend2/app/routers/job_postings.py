@@ -3,69 +3,23 @@ Job Posting routes
 Recruiter/Admin job creation and management with skills support
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from sqlmodel import Session, select
 from typing import List
 from datetime import datetime
-from app.database import get_session
-from app.models import JobPosting, JobPostingSkill, Company, User
+from app.database import get_read_session, get_session, pin_to_primary
+from app.models import JobPosting, JobPostingSkill
 from app.schemas import JobPostingRead, JobPostingCreate, JobPostingSkillCreate, JobPostingSkillRead
 from app.security import get_current_user
+from app.identity import Principal, get_current_company_scope, get_current_principal
+from app.search_index import posting_index
+from app.match_scores import match_score_materializer
+from app.swipe_decks import swipe_decks
+from app.streaming import ndjson_response, streamed, wants_ndjson
+from app.skills import CERTIFICATIONS_CATALOG, SOFT_SKILLS_CATALOG, TECHNICAL_SKILLS_CATALOG
 
 router = APIRouter(prefix="/job-postings", tags=["Job Postings"])
 
-# ============ SKILL CATALOGS ============
-
-TECHNICAL_SKILLS_CATALOG = [
-    "Java", "Spring Boot", "Python", "Django", "Flask", "FastAPI",
-    "JavaScript", "TypeScript", "React", "Angular", "Vue.js", "Node.js",
-    "SQL", "PostgreSQL", "MySQL", "MongoDB", "Redis", "Elasticsearch",
-    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform",
-    "Kafka", "RabbitMQ", "GraphQL", "REST API", "gRPC",
-    "Git", "CI/CD", "Jenkins", "GitHub Actions",
-    "Machine Learning", "TensorFlow", "PyTorch", "Data Science",
-    "Oracle ERP", "SAP HANA", "SAP ABAP", "Salesforce", "ServiceNow",
-    "Oracle Cloud", "Oracle Fusion", "PeopleSoft", "JD Edwards",
-    "Power BI", "Tableau", "Looker", "Snowflake", "Databricks",
-    "C#", ".NET", "Go", "Rust", "Ruby", "PHP", "Swift", "Kotlin",
-    "React Native", "Flutter", "iOS", "Android",
-    "Microservices", "System Design", "DevOps", "SRE",
-    "Cybersecurity", "Penetration Testing", "SOC", "SIEM",
-    "Agile", "Scrum", "Jira", "Confluence",
-    "HTML", "CSS", "SASS", "Tailwind CSS", "Bootstrap",
-    "Linux", "Shell Scripting", "Networking", "TCP/IP",
-]
-
-SOFT_SKILLS_CATALOG = [
-    "Communication", "Leadership", "Problem Solving", "Time Management",
-    "Teamwork", "Adaptability", "Critical Thinking", "Creativity",
-    "Conflict Resolution", "Emotional Intelligence", "Decision Making",
-    "Negotiation", "Presentation Skills", "Mentoring", "Coaching",
-    "Strategic Thinking", "Project Management", "Stakeholder Management",
-    "Cross-functional Collaboration", "Client Relationship",
-    "Attention to Detail", "Analytical Thinking", "Initiative",
-    "Work Ethic", "Accountability", "Flexibility",
-    "Interpersonal Skills", "Active Listening", "Empathy",
-    "Delegation", "Influence", "Resilience",
-]
-
-CERTIFICATIONS_CATALOG = [
-    "AWS Solutions Architect", "AWS Developer Associate", "AWS DevOps Engineer",
-    "Azure Administrator", "Azure Solutions Architect", "Azure DevOps Engineer",
-    "GCP Cloud Engineer", "GCP Cloud Architect",
-    "Oracle Cloud Infrastructure", "Oracle Database Administrator",
-    "SAP Certified Application Associate", "SAP Certified Technology Associate",
-    "Salesforce Administrator", "Salesforce Developer",
-    "PMP", "PMI-ACP", "PRINCE2", "Scrum Master (CSM)", "SAFe Agilist",
-    "CISSP", "CISM", "CompTIA Security+", "CEH",
-    "Kubernetes Administrator (CKA)", "Docker Certified Associate",
-    "Terraform Associate", "ITIL v4 Foundation",
-    "Six Sigma Green Belt", "Six Sigma Black Belt",
-    "Google Analytics", "HubSpot Inbound Marketing",
-    "Cisco CCNA", "Cisco CCNP",
-    "Microsoft 365 Certified", "Power Platform Developer",
-]
-
 
 @router.get("/catalogs", response_model=dict)
 def get_skill_catalogs():
@@ -80,24 +34,16 @@ def get_skill_catalogs():
 @router.post("", response_model=dict)
 def create_job_posting(
     job_data: JobPostingCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Create a new job posting with skills (Recruiter only)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=403, detail="Company profile not found. Are you a recruiter?")
-    
     # Extract skills before creating posting
     skills_data = job_data.skills
     posting_dict = job_data.dict(exclude={"skills"})
     
     job_posting = JobPosting(
-        company_id=company.id,
+        company_id=principal.company_id,
         **posting_dict
     )
     session.add(job_posting)
@@ -116,6 +62,9 @@ def create_job_posting(
     
     if skills_data:
         session.commit()
+    posting_index.refresh(session, job_posting.id)
+    match_score_materializer.posting_changed(job_posting.id)
+    pin_to_primary(principal.user_id)
     
     return {
         "message": "Job posting created successfully",
@@ -125,46 +74,54 @@ def create_job_posting(
     }
 
 
+def _with_skills(session: Session, postings: List[JobPosting]):
+    """Postings as dicts with their skills, loaded in one IN query"""
+    skills_by_posting = {posting.id: [] for posting in postings}
+    if skills_by_posting:
+        skills = session.exec(
+            select(JobPostingSkill)
+            .where(JobPostingSkill.job_posting_id.in_(list(skills_by_posting)))
+            .order_by(JobPostingSkill.id)
+        ).all()
+        for skill in skills:
+            skills_by_posting[skill.job_posting_id].append(skill)
+    for posting in postings:
+        posting_dict = posting.dict()
+        posting_dict["posting_skills"] = [
+            {"id": s.id, "skill_name": s.skill_name, "skill_category": s.skill_category, "rating": s.rating}
+            for s in skills_by_posting[posting.id]
+        ]
+        yield posting_dict
+
+
 @router.get("", response_model=List[JobPostingRead])
 def get_job_postings(
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session),
+    request: Request,
+    principal: Principal = Depends(get_current_principal),
+    session: Session = Depends(get_read_session),
     active_only: bool = True
 ):
-    """Get all job postings with skills"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
+    """Get all job postings with skills (streamed with Accept: application/x-ndjson)"""
+    is_company = principal.company_id is not None
     
-    if company:
-        company_ids = session.exec(
-            select(Company.id).where(Company.company_name == company.company_name)
-        ).all()
-        query = select(JobPosting).where(JobPosting.company_id.in_(company_ids))
+    if is_company:
+        query = select(JobPosting).where(JobPosting.company_id.in_(principal.company_ids))
     else:
         query = select(JobPosting).where(JobPosting.is_active == True)
     
-    if active_only and company:
+    if active_only and is_company:
         query = query.where(JobPosting.is_active == True)
     
+    if wants_ndjson(request):
+        # Skills are loaded per batch of streamed postings
+        batches = session.exec(streamed(query)).partitions()
+        return ndjson_response(
+            (posting for batch in batches for posting in _with_skills(session, batch)), JobPostingRead
+        )
     postings = session.exec(query).all()
     
-    # Load skills for each posting
-    result = []
-    for posting in postings:
-        skills = session.exec(
-            select(JobPostingSkill).where(JobPostingSkill.job_posting_id == posting.id)
-        ).all()
-        posting_dict = posting.dict()
-        posting_dict["posting_skills"] = [
-            {"id": s.id, "skill_name": s.skill_name, "skill_category": s.skill_category, "rating": s.rating}
-            for s in skills
-        ]
-        result.append(posting_dict)
-    
-    return result
+    # Load skills for every posting at once
+    return list(_with_skills(session, postings))
 
 
 @router.get("/{job_id}", response_model=JobPostingRead)
@@ -194,25 +151,16 @@ def get_job_posting(
 def update_job_posting(
     job_id: int,
     job_data: JobPostingCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Update a job posting with skills (Recruiter only)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
     job_posting = session.get(JobPosting, job_id)
     if not job_posting:
         raise HTTPException(status_code=404, detail="Job posting not found")
     
     # Check company access (same company_name)
-    posting_company = session.get(Company, job_posting.company_id)
-    if posting_company.company_name != company.company_name:
+    if job_posting.company_id not in principal.company_ids:
         raise HTTPException(status_code=403, detail="Unauthorized - different company")
     
     # Update posting fields
@@ -244,6 +192,10 @@ def update_job_posting(
     
     if skills_data:
         session.commit()
+    posting_index.refresh(session, job_id)
+    match_score_materializer.posting_changed(job_id)
+    swipe_decks.posting_changed(job_id)
+    pin_to_primary(principal.user_id)
     
     return {"message": "Job posting updated", "job_id": job_posting.id}
 
@@ -251,30 +203,22 @@ def update_job_posting(
 @router.delete("/{job_id}", response_model=dict)
 def delete_job_posting(
     job_id: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Delete/archive a job posting (Recruiter only)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
     job_posting = session.get(JobPosting, job_id)
     if not job_posting:
         raise HTTPException(status_code=404, detail="Job posting not found")
     
-    posting_company = session.get(Company, job_posting.company_id)
-    if posting_company.company_name != company.company_name:
+    if job_posting.company_id not in principal.company_ids:
         raise HTTPException(status_code=403, detail="Unauthorized")
     
     # Soft delete - just mark as inactive
     job_posting.is_active = False
     session.add(job_posting)
     session.commit()
+    pin_to_primary(principal.user_id)
     
     return {"message": "Job posting archived"}
 
@@ -282,29 +226,21 @@ def delete_job_posting(
 @router.post("/{job_id}/toggle-active", response_model=dict)
 def toggle_job_posting_active(
     job_id: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Toggle job posting active status"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
     job_posting = session.get(JobPosting, job_id)
     if not job_posting:
         raise HTTPException(status_code=404, detail="Job posting not found")
     
-    posting_company = session.get(Company, job_posting.company_id)
-    if posting_company.company_name != company.company_name:
+    if job_posting.company_id not in principal.company_ids:
         raise HTTPException(status_code=403, detail="Unauthorized")
     
     job_posting.is_active = not job_posting.is_active
     session.add(job_posting)
     session.commit()
+    pin_to_primary(principal.user_id)
     
     return {
         "message": f"Job posting is now {'active' if job_posting.is_active else 'inactive'}",
@@ -345,6 +281,8 @@ def add_skill_to_posting(
     session.add(db_skill)
     session.commit()
     session.refresh(db_skill)
+    posting_index.refresh(session, job_id)
+    pin_to_primary(current_user["user_id"])
     
     return {"message": "Skill added", "skill_id": db_skill.id}
 
@@ -367,6 +305,8 @@ def update_skill_rating(
     skill.skill_category = skill_data.skill_category
     session.add(skill)
     session.commit()
+    posting_index.refresh(session, job_id)
+    pin_to_primary(current_user["user_id"])
     
     return {"message": "Skill updated"}
 
@@ -385,5 +325,7 @@ def delete_skill_from_posting(
     
     session.delete(skill)
     session.commit()
+    posting_index.refresh(session, job_id)
+    pin_to_primary(current_user["user_id"])
     
     return {"message": "Skill removed"}
@@ -3,71 +3,65 @@ Matches routes
 Mutual matches between candidates and recruiters
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from sqlmodel import Session, select
 from typing import List
-from app.database import get_session
-from app.models import Match, Swipe, Candidate, Company, JobProfile, JobPosting, User
+from app.database import get_read_session, get_session, pin_to_primary, statement_timeout
+from app.models import Match, Swipe, JobProfile, JobPosting
 from app.schemas import MatchRead
-from app.security import get_current_user
+from app.identity import Principal, get_current_principal
+from app.streaming import ndjson_response, streamed, wants_ndjson
 
-router = APIRouter(prefix="/matches", tags=["Matches"])
+router = APIRouter(prefix="/matches", tags=["Matches"], dependencies=[statement_timeout("interactions")])
 
 
 @router.get("", response_model=List[MatchRead])
 def get_matches(
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    request: Request,
+    principal: Principal = Depends(get_current_principal),
+    session: Session = Depends(get_read_session)
 ):
-    """Get all matches for current user"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    if user.role == "candidate":
-        candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-        if not candidate:
+    """Get all matches for current user (streamed with Accept: application/x-ndjson)"""
+    if principal.is_candidate:
+        if principal.candidate_id is None:
             raise HTTPException(status_code=404, detail="Candidate profile not found")
-        matches = session.exec(select(Match).where(Match.candidate_id == candidate.id)).all()
+        query = select(Match).where(Match.candidate_id == principal.candidate_id)
     else:
-        company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-        if not company:
+        if principal.company_id is None:
             raise HTTPException(status_code=404, detail="Company profile not found")
-        matches = session.exec(select(Match).where(Match.company_id == company.id)).all()
+        query = select(Match).where(Match.company_id == principal.company_id)
+    
+    if wants_ndjson(request):
+        return ndjson_response(session.exec(streamed(query)), MatchRead)
+    matches = session.exec(query).all()
     
     return matches
 
 
 @router.get("/mutual", response_model=List[MatchRead])
 def get_mutual_matches(
-    current_user: dict = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    principal: Principal = Depends(get_current_principal),
+    session: Session = Depends(get_read_session)
 ):
     """Get only mutual matches (both parties have interacted positively)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    if user.role == "candidate":
-        candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-        if not candidate:
+    if principal.is_candidate:
+        if principal.candidate_id is None:
             raise HTTPException(status_code=404, detail="Candidate profile not found")
         
         # Both candidate and company must have liked each other
         mutual = session.exec(
             select(Match)
-            .where(Match.candidate_id == candidate.id)
+            .where(Match.candidate_id == principal.candidate_id)
             .where(Match.candidate_liked == True)
             .where(Match.company_liked == True)
         ).all()
     else:
-        company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-        if not company:
+        if principal.company_id is None:
             raise HTTPException(status_code=404, detail="Company profile not found")
         
         mutual = session.exec(
             select(Match)
-            .where(Match.company_id == company.id)
+            .where(Match.company_id == principal.company_id)
             .where(Match.candidate_liked == True)
             .where(Match.company_liked == True)
         ).all()
@@ -78,32 +72,27 @@ def get_mutual_matches(
 @router.post("/{match_id}/like", response_model=dict)
 def like_match(
     match_id: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session)
 ):
     """Like a match"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     match = session.get(Match, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
     # Verify ownership
-    if user.role == "candidate":
-        candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-        if not candidate or match.candidate_id != candidate.id:
+    if principal.is_candidate:
+        if principal.candidate_id is None or match.candidate_id != principal.candidate_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
         match.candidate_liked = True
     else:
-        company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-        if not company or match.company_id != company.id:
+        if principal.company_id is None or match.company_id != principal.company_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
         match.company_liked = True
     
     session.add(match)
     session.commit()
+    pin_to_primary(principal.user_id)
     
     return {"message": "Match liked", "match_id": match.id}
 
@@ -111,31 +100,26 @@ def like_match(
 @router.post("/{match_id}/unlike", response_model=dict)
 def unlike_match(
     match_id: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session)
 ):
     """Unlike a match"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     match = session.get(Match, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    if user.role == "candidate":
-        candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-        if not candidate or match.candidate_id != candidate.id:
+    if principal.is_candidate:
+        if principal.candidate_id is None or match.candidate_id != principal.candidate_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
         match.candidate_liked = False
     else:
-        company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-        if not company or match.company_id != company.id:
+        if principal.company_id is None or match.company_id != principal.company_id:
             raise HTTPException(status_code=403, detail="Unauthorized")
         match.company_liked = False
     
     session.add(match)
     session.commit()
+    pin_to_primary(principal.user_id)
     
     return {"message": "Match unliked", "match_id": match.id}
 
@@ -143,24 +127,20 @@ def unlike_match(
 @router.post("/{match_id}/ask-to-apply", response_model=dict)
 def ask_to_apply(
     match_id: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session)
 ):
     """Recruiter asks candidate to apply"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     match = session.get(Match, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company or match.company_id != company.id:
+    if principal.company_id is None or match.company_id != principal.company_id:
         raise HTTPException(status_code=403, detail="Only recruiters can ask to apply")
     
     match.company_asked_to_apply = True
     session.add(match)
     session.commit()
+    pin_to_primary(principal.user_id)
     
     return {"message": "Asked candidate to apply", "match_id": match.id}
@@ -5,11 +5,11 @@ Credits, subscription plans, and company billing management
 
 import logging
 from datetime import datetime, timedelta
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from sqlmodel import Session, select
 from app.database import get_session
 from app.models import (
-    Company, User, SubscriptionPlan, CompanySubscription, 
+    Company, SubscriptionPlan, CompanySubscription, 
     CreditTransaction, UserRole
 )
 from app.schemas import (
@@ -18,7 +18,8 @@ from app.schemas import (
     CreditTransactionRead, CreditTransactionCreate,
     CompanyCreditsRead
 )
-from app.security import get_current_user
+from app.identity import Principal, get_current_company_scope, get_current_principal
+from app.streaming import ndjson_response, streamed, wants_ndjson
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/subscriptions", tags=["Subscriptions & Billing"])
@@ -31,12 +32,11 @@ router = APIRouter(prefix="/subscriptions", tags=["Subscriptions & Billing"])
 @router.post("/plans", response_model=dict)
 def create_subscription_plan(
     plan_data: SubscriptionPlanCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session)
 ):
     """Create a new subscription plan (Admin only)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user or user.role != UserRole.ADMIN:
+    if principal.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can create subscription plans"
@@ -96,21 +96,12 @@ def get_subscription_plan(
 
 @router.get("/my", response_model=CompanySubscriptionRead)
 def get_company_subscription(
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Get current company's subscription details"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
-    # Get primary company if this is a team member
-    if company.parent_company_id:
-        company = session.get(Company, company.parent_company_id)
+    # The primary company account holds the subscription and credits
+    company = session.get(Company, principal.primary_company_id)
     
     subscription = session.exec(
         select(CompanySubscription).where(CompanySubscription.company_id == company.id)
@@ -128,28 +119,19 @@ def get_company_subscription(
 @router.post("/purchase", response_model=dict)
 def purchase_subscription(
     subscription_data: CompanySubscriptionCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Purchase a new subscription for the company (Admin only)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
     # Check if user is admin
-    if user.role != UserRole.ADMIN:
+    if principal.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can purchase subscriptions"
         )
     
-    # Get primary company if this is a team member
-    if company.parent_company_id:
-        company = session.get(Company, company.parent_company_id)
+    # The primary company account holds the subscription and credits
+    company = session.get(Company, principal.primary_company_id)
     
     # Check if plan exists
     plan = session.get(SubscriptionPlan, subscription_data.plan_id)
@@ -215,28 +197,19 @@ def purchase_subscription(
 
 @router.post("/cancel", response_model=dict)
 def cancel_subscription(
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Cancel the company's subscription (Admin only)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
     # Check if user is admin
-    if user.role != UserRole.ADMIN:
+    if principal.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can cancel subscriptions"
         )
     
-    # Get primary company if this is a team member
-    if company.parent_company_id:
-        company = session.get(Company, company.parent_company_id)
+    # The primary company account holds the subscription and credits
+    company = session.get(Company, principal.primary_company_id)
     
     subscription = session.exec(
         select(CompanySubscription).where(CompanySubscription.company_id == company.id)
@@ -263,21 +236,12 @@ def cancel_subscription(
 
 @router.get("/credits/balance", response_model=CompanyCreditsRead)
 def get_credit_balance(
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Get current company's credit balance"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
-    # Get primary company if this is a team member
-    if company.parent_company_id:
-        company = session.get(Company, company.parent_company_id)
+    # The primary company account holds the subscription and credits
+    company = session.get(Company, principal.primary_company_id)
     
     subscription = session.exec(
         select(CompanySubscription).where(CompanySubscription.company_id == company.id)
@@ -302,7 +266,7 @@ def get_credit_balance(
 @router.post("/credits/purchase", response_model=dict)
 def purchase_credits(
     amount: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Purchase additional credits for the company (Admin only)"""
@@ -312,24 +276,15 @@ def purchase_credits(
             detail="Credit amount must be positive"
         )
     
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
     # Check if user is admin
-    if user.role != UserRole.ADMIN:
+    if principal.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can purchase credits"
         )
     
-    # Get primary company if this is a team member
-    if company.parent_company_id:
-        company = session.get(Company, company.parent_company_id)
+    # The primary company account holds the subscription and credits
+    company = session.get(Company, principal.primary_company_id)
     
     # Add credits
     company.current_credits += amount
@@ -355,25 +310,18 @@ def purchase_credits(
 
 @router.get("/credits/transactions", response_model=list[CreditTransactionRead])
 def get_credit_transactions(
-    current_user: dict = Depends(get_current_user),
+    request: Request,
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
-    """Get credit transaction history for the company"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    """Get credit transaction history for the company (streamed with Accept: application/x-ndjson)"""
+    # The primary company account holds the subscription and credits
+    company = session.get(Company, principal.primary_company_id)
     
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
-    # Get primary company if this is a team member
-    if company.parent_company_id:
-        company = session.get(Company, company.parent_company_id)
-    
-    transactions = session.exec(
-        select(CreditTransaction).where(CreditTransaction.company_id == company.id)
-    ).all()
+    query = select(CreditTransaction).where(CreditTransaction.company_id == company.id)
+    if wants_ndjson(request):
+        return ndjson_response(session.exec(streamed(query)), CreditTransactionRead)
+    transactions = session.exec(query).all()
     
     return transactions
 
@@ -382,7 +330,7 @@ def get_credit_transactions(
 def deduct_credits(
     amount: int,
     description: str = "Job posting",
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Deduct credits from company (internal use for job postings, etc.)"""
@@ -392,17 +340,8 @@ def deduct_credits(
             detail="Credit amount must be positive"
         )
     
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
-    # Get primary company if this is a team member
-    if company.parent_company_id:
-        company = session.get(Company, company.parent_company_id)
+    # The primary company account holds the subscription and credits
+    company = session.get(Company, principal.primary_company_id)
     
     # Check if company has enough credits
     if company.current_credits < amount:
@@ -1,18 +1,24 @@
 """
 Swipes routes
-Like/Pass interactions from candidates
+Like/Pass interactions from candidates and recruiters; send an Idempotency-Key
+header to make retries safe
 """
 
 import logging
-from fastapi import APIRouter, HTTPException, Depends, status, Body
-from pydantic import BaseModel
-from sqlmodel import Session, select
-from app.database import get_session
-from app.models import Swipe, Candidate, Company, JobPosting, JobProfile, User, Match
-from app.security import get_current_user
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Header
+from pydantic import BaseModel, Field
+from sqlmodel import Session
+from app.database import get_session, pin_to_primary, statement_timeout
+from app.identity import Principal, get_current_candidate, get_current_company_scope, get_current_principal
+from app.swipe_decks import swipe_decks
+from app.swipe_service import (
+    IDEMPOTENCY_KEY_MAX_LENGTH, SWIPE_BATCH_LIMIT, BatchSwipe,
+    candidate_target, record_swipe, record_swipe_batch, recruiter_target
+)
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/swipes", tags=["Swipes"])
+router = APIRouter(prefix="/swipes", tags=["Swipes"], dependencies=[statement_timeout("interactions")])
 
 
 class CandidateSwipeRequest(BaseModel):
@@ -26,77 +32,33 @@ class RecruiterSwipeRequest(BaseModel):
     job_posting_id: int
 
 
+class SwipeBatchItem(BaseModel):
+    action: Literal["like", "pass", "ask_to_apply"]
+    job_profile_id: int
+    job_posting_id: int
+    candidate_id: Optional[int] = None  # recruiter swipes only
+    idempotency_key: Optional[str] = Field(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH)
+
+
+class SwipeBatchRequest(BaseModel):
+    swipes: List[SwipeBatchItem] = Field(..., min_items=1, max_items=SWIPE_BATCH_LIMIT)
+
+
 @router.post("/like")
 def swipe_like(
     data: CandidateSwipeRequest,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
+    idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH),
     session: Session = Depends(get_session)
 ):
     """Candidate likes a job posting"""
-    job_profile_id = data.job_profile_id
-    job_posting_id = data.job_posting_id
-    logger.info(f"[CANDIDATE LIKE] job_profile_id={job_profile_id}, job_posting_id={job_posting_id}")
-    
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-    
-    job_profile = session.get(JobProfile, job_profile_id)
-    if not job_profile or job_profile.candidate_id != candidate.id:
-        raise HTTPException(status_code=404, detail="Job profile not found")
-    
-    job_posting = session.get(JobPosting, job_posting_id)
-    if not job_posting:
-        raise HTTPException(status_code=404, detail="Job posting not found")
-    
-    # Check for duplicate swipe
-    existing_swipe = session.exec(
-        select(Swipe)
-        .where(Swipe.candidate_id == candidate.id)
-        .where(Swipe.job_posting_id == job_posting_id)
-        .where(Swipe.action == "like")
-        .where(Swipe.action_by == "candidate")
-    ).first()
-    if existing_swipe:
+    logger.info(f"[CANDIDATE LIKE] job_profile_id={data.job_profile_id}, job_posting_id={data.job_posting_id}")
+    target = candidate_target(session, principal, data.job_profile_id, data.job_posting_id)
+    if not record_swipe(session, target, "like", "candidate", idempotency_key):
         return {"message": "Already liked this job posting", "action": "like"}
-    
-    # Create swipe
-    swipe = Swipe(
-        candidate_id=candidate.id,
-        company_id=job_posting.company_id,
-        job_profile_id=job_profile_id,
-        job_posting_id=job_posting_id,
-        action="like",
-        action_by="candidate"
-    )
-    
-    # Create or update match
-    existing_match = session.exec(
-        select(Match)
-        .where(Match.candidate_id == candidate.id)
-        .where(Match.company_id == job_posting.company_id)
-        .where(Match.job_posting_id == job_posting_id)
-    ).first()
-    
-    if existing_match:
-        existing_match.candidate_liked = True
-    else:
-        match = Match(
-            candidate_id=candidate.id,
-            company_id=job_posting.company_id,
-            job_profile_id=job_profile_id,
-            job_posting_id=job_posting_id,
-            candidate_liked=True,
-            match_percentage=80
-        )
-        session.add(match)
-    
-    session.add(swipe)
     session.commit()
+    pin_to_primary(principal.user_id)
+    swipe_decks.swiped(target.candidate_id, target.job_posting_id, "candidate")
     
     return {"message": "Liked job posting", "action": "like"}
 
@@ -104,41 +66,16 @@ def swipe_like(
 @router.post("/pass")
 def swipe_pass(
     data: CandidateSwipeRequest,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
+    idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH),
     session: Session = Depends(get_session)
 ):
     """Candidate passes on a job posting"""
-    job_profile_id = data.job_profile_id
-    job_posting_id = data.job_posting_id
-    
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-    
-    job_profile = session.get(JobProfile, job_profile_id)
-    if not job_profile or job_profile.candidate_id != candidate.id:
-        raise HTTPException(status_code=404, detail="Job profile not found")
-    
-    job_posting = session.get(JobPosting, job_posting_id)
-    if not job_posting:
-        raise HTTPException(status_code=404, detail="Job posting not found")
-    
-    # Create swipe
-    swipe = Swipe(
-        candidate_id=candidate.id,
-        company_id=job_posting.company_id,
-        job_profile_id=job_profile_id,
-        job_posting_id=job_posting_id,
-        action="pass",
-        action_by="candidate"
-    )
-    
-    session.add(swipe)
+    target = candidate_target(session, principal, data.job_profile_id, data.job_posting_id)
+    record_swipe(session, target, "pass", "candidate", idempotency_key)
     session.commit()
+    pin_to_primary(principal.user_id)
+    swipe_decks.swiped(target.candidate_id, target.job_posting_id, "candidate")
     
     return {"message": "Passed on job posting", "action": "pass"}
 
@@ -146,62 +83,16 @@ def swipe_pass(
 @router.post("/ask-to-apply")
 def ask_to_apply(
     data: CandidateSwipeRequest,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_candidate),
+    idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH),
     session: Session = Depends(get_session)
 ):
     """Candidate asks to apply for a job"""
-    job_profile_id = data.job_profile_id
-    job_posting_id = data.job_posting_id
-    
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    candidate = session.exec(select(Candidate).where(Candidate.user_id == user.id)).first()
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-    
-    job_profile = session.get(JobProfile, job_profile_id)
-    if not job_profile or job_profile.candidate_id != candidate.id:
-        raise HTTPException(status_code=404, detail="Job profile not found")
-    
-    job_posting = session.get(JobPosting, job_posting_id)
-    if not job_posting:
-        raise HTTPException(status_code=404, detail="Job posting not found")
-    
-    # Create swipe
-    swipe = Swipe(
-        candidate_id=candidate.id,
-        company_id=job_posting.company_id,
-        job_profile_id=job_profile_id,
-        job_posting_id=job_posting_id,
-        action="ask_to_apply",
-        action_by="candidate"
-    )
-    
-    # Create or update match
-    existing_match = session.exec(
-        select(Match)
-        .where(Match.candidate_id == candidate.id)
-        .where(Match.company_id == job_posting.company_id)
-        .where(Match.job_posting_id == job_posting_id)
-    ).first()
-    
-    if existing_match:
-        existing_match.candidate_asked_to_apply = True
-    else:
-        match = Match(
-            candidate_id=candidate.id,
-            company_id=job_posting.company_id,
-            job_profile_id=job_profile_id,
-            job_posting_id=job_posting_id,
-            candidate_asked_to_apply=True,
-            match_percentage=85
-        )
-        session.add(match)
-    
-    session.add(swipe)
+    target = candidate_target(session, principal, data.job_profile_id, data.job_posting_id)
+    record_swipe(session, target, "ask_to_apply", "candidate", idempotency_key)
     session.commit()
+    pin_to_primary(principal.user_id)
+    swipe_decks.swiped(target.candidate_id, target.job_posting_id, "candidate")
     
     return {"message": "Asked to apply for job", "action": "ask_to_apply"}
 
@@ -211,65 +102,17 @@ def ask_to_apply(
 @router.post("/recruiter/like")
 def recruiter_like(
     data: RecruiterSwipeRequest,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
+    idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH),
     session: Session = Depends(get_session)
 ):
     """Recruiter likes a candidate"""
     logger.info(f"[RECRUITER LIKE] candidate_id={data.candidate_id}, job_profile_id={data.job_profile_id}, job_posting_id={data.job_posting_id}")
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=403, detail="Recruiters only")
-    
-    # Get all company IDs with the same company name
-    company_ids = list(session.exec(
-        select(Company.id).where(Company.company_name == company.company_name)
-    ).all())
-    
-    candidate = session.get(Candidate, data.candidate_id)
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
-    
-    job_posting = session.get(JobPosting, data.job_posting_id)
-    if not job_posting or job_posting.company_id not in company_ids:
-        raise HTTPException(status_code=404, detail="Job posting not found")
-    
-    # Create swipe
-    swipe = Swipe(
-        candidate_id=data.candidate_id,
-        company_id=company.id,
-        job_profile_id=data.job_profile_id,
-        job_posting_id=data.job_posting_id,
-        action="like",
-        action_by="recruiter"
-    )
-    
-    # Create or update match
-    existing_match = session.exec(
-        select(Match)
-        .where(Match.candidate_id == data.candidate_id)
-        .where(Match.company_id == company.id)
-        .where(Match.job_posting_id == data.job_posting_id)
-    ).first()
-    
-    if existing_match:
-        existing_match.company_liked = True
-    else:
-        match = Match(
-            candidate_id=data.candidate_id,
-            company_id=company.id,
-            job_profile_id=data.job_profile_id,
-            job_posting_id=data.job_posting_id,
-            company_liked=True,
-            match_percentage=80
-        )
-        session.add(match)
-    
-    session.add(swipe)
+    target = recruiter_target(session, principal, data.candidate_id, data.job_profile_id, data.job_posting_id)
+    record_swipe(session, target, "like", "recruiter", idempotency_key)
     session.commit()
+    pin_to_primary(principal.user_id)
+    swipe_decks.swiped(target.candidate_id, target.job_posting_id, "recruiter")
     logger.info(f"[RECRUITER LIKE] Success - swipe recorded for candidate {data.candidate_id}")
     
     return {"message": "Liked candidate", "action": "like"}
@@ -278,40 +121,17 @@ def recruiter_like(
 @router.post("/recruiter/pass")
 def recruiter_pass(
     data: RecruiterSwipeRequest,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
+    idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH),
     session: Session = Depends(get_session)
 ):
     """Recruiter passes on a candidate"""
     logger.info(f"[RECRUITER PASS] candidate_id={data.candidate_id}, job_profile_id={data.job_profile_id}, job_posting_id={data.job_posting_id}")
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=403, detail="Recruiters only")
-    
-    # Get all company IDs with the same company name
-    company_ids = list(session.exec(
-        select(Company.id).where(Company.company_name == company.company_name)
-    ).all())
-    
-    job_posting = session.get(JobPosting, data.job_posting_id)
-    if not job_posting or job_posting.company_id not in company_ids:
-        raise HTTPException(status_code=404, detail="Job posting not found")
-    
-    # Create swipe
-    swipe = Swipe(
-        candidate_id=data.candidate_id,
-        company_id=company.id,
-        job_profile_id=data.job_profile_id,
-        job_posting_id=data.job_posting_id,
-        action="pass",
-        action_by="recruiter"
-    )
-    
-    session.add(swipe)
+    target = recruiter_target(session, principal, data.candidate_id, data.job_profile_id, data.job_posting_id)
+    record_swipe(session, target, "pass", "recruiter", idempotency_key)
     session.commit()
+    pin_to_primary(principal.user_id)
+    swipe_decks.swiped(target.candidate_id, target.job_posting_id, "recruiter")
     
     return {"message": "Passed on candidate", "action": "pass"}
 
@@ -319,60 +139,46 @@ def recruiter_pass(
 @router.post("/recruiter/ask-to-apply")
 def recruiter_ask_to_apply(
     data: RecruiterSwipeRequest,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
+    idempotency_key: Optional[str] = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH),
     session: Session = Depends(get_session)
 ):
     """Recruiter asks candidate to apply"""
     logger.info(f"[RECRUITER ASK-TO-APPLY] candidate_id={data.candidate_id}, job_profile_id={data.job_profile_id}, job_posting_id={data.job_posting_id}")
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=403, detail="Recruiters only")
-    
-    # Get all company IDs with the same company name
-    company_ids = list(session.exec(
-        select(Company.id).where(Company.company_name == company.company_name)
-    ).all())
-    
-    job_posting = session.get(JobPosting, data.job_posting_id)
-    if not job_posting or job_posting.company_id not in company_ids:
-        raise HTTPException(status_code=404, detail="Job posting not found")
-    
-    # Create swipe
-    swipe = Swipe(
-        candidate_id=data.candidate_id,
-        company_id=company.id,
-        job_profile_id=data.job_profile_id,
-        job_posting_id=data.job_posting_id,
-        action="ask_to_apply",
-        action_by="recruiter"
-    )
-    
-    # Create or update match
-    existing_match = session.exec(
-        select(Match)
-        .where(Match.candidate_id == data.candidate_id)
-        .where(Match.company_id == company.id)
-        .where(Match.job_posting_id == data.job_posting_id)
-    ).first()
-    
-    if existing_match:
-        existing_match.company_asked_to_apply = True
-    else:
-        match = Match(
-            candidate_id=data.candidate_id,
-            company_id=company.id,
-            job_profile_id=data.job_profile_id,
-            job_posting_id=data.job_posting_id,
-            company_asked_to_apply=True,
-            match_percentage=85
-        )
-        session.add(match)
-    
-    session.add(swipe)
+    target = recruiter_target(session, principal, data.candidate_id, data.job_profile_id, data.job_posting_id)
+    record_swipe(session, target, "ask_to_apply", "recruiter", idempotency_key)
     session.commit()
+    pin_to_primary(principal.user_id)
+    swipe_decks.swiped(target.candidate_id, target.job_posting_id, "recruiter")
     
     return {"message": "Asked candidate to apply", "action": "ask_to_apply"}
+
+
+# ============ BATCHED SWIPES ============
+
+@router.post("/batch")
+def swipe_batch(
+    data: SwipeBatchRequest,
+    principal: Principal = Depends(get_current_principal),
+    session: Session = Depends(get_session)
+):
+    """
+    Record a queue of swipes from a candidate or a recruiter in one
+    transaction. `results` line up with `swipes`; a failed item doesn't
+    stop the others.
+    """
+    principal = get_current_candidate(principal) if principal.is_candidate else get_current_company_scope(principal)
+    results = record_swipe_batch(session, principal, [BatchSwipe(**item.dict()) for item in data.swipes])
+    created = sum(1 for result in results if result["status"] == "created")
+    if created:
+        session.commit()
+        pin_to_primary(principal.user_id)
+        action_by = "candidate" if principal.is_candidate else "recruiter"
+        for result in results:
+            if result["status"] == "created":
+                item = data.swipes[result["index"]]
+                candidate_id = principal.candidate_id if principal.is_candidate else item.candidate_id
+                swipe_decks.swiped(candidate_id, item.job_posting_id, action_by)
+    logger.info(f"[SWIPE BATCH] user_id={principal.user_id} recorded {created} of {len(results)} swipes")
+    
+    return {"created": created, "results": results}
@@ -8,10 +8,12 @@ import secrets
 from datetime import datetime, timedelta
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlmodel import Session, select
-from app.database import get_session
+from app.database import get_session, pin_to_primary
 from app.models import Company, User, UserRole, JobPosting
 from app.schemas import TeamMemberRead, TeamInviteCreate, TeamInviteResponse
-from app.security import get_current_user, hash_password
+from app.security import hash_password
+from app.identity import Principal, get_current_company_scope, principal_cache
+from app.values import enum_value
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/company/team", tags=["Team Management"])
@@ -19,22 +21,12 @@ router = APIRouter(prefix="/company/team", tags=["Team Management"])
 
 @router.get("/members", response_model=list[TeamMemberRead])
 def get_team_members(
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Get all team members for the current company"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
     # Get primary company if this is a team member
-    primary_company_id = company.id
-    if company.parent_company_id:
-        primary_company_id = company.parent_company_id
+    primary_company_id = principal.primary_company_id
     
     # Get all team members (both primary and linked)
     team_companies = session.exec(
@@ -59,7 +51,7 @@ def get_team_members(
                 email=comp_user.email,
                 full_name=comp_user.full_name,
                 employee_type=comp.employee_type,
-                role=comp_user.role.value,
+                role=enum_value(comp_user.role),
                 jobs_posted=job_count
             ))
     
@@ -69,29 +61,17 @@ def get_team_members(
 @router.post("/invite", response_model=dict)
 def invite_team_member(
     invite_data: TeamInviteCreate,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Invite a new team member (Admin/HR only)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
     # Check if user is admin or hr
-    if user.role not in [UserRole.ADMIN, UserRole.HR]:
+    if principal.role not in [UserRole.ADMIN, UserRole.HR]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins and HR can invite team members"
         )
     
-    # Get primary company if this is a team member
-    if company.parent_company_id:
-        company = session.get(Company, company.parent_company_id)
-    
     # Check if email already exists
     existing_user = session.exec(select(User).where(User.email == invite_data.email.lower())).first()
     if existing_user:
@@ -114,7 +94,7 @@ def invite_team_member(
     # For now, we'll just return the token
     # In production, you'd want to send this via email and store it temporarily
     
-    logger.info(f"[TEAM] Invite generated for {invite_data.email} to company {company.id}")
+    logger.info(f"[TEAM] Invite generated for {invite_data.email} to company {principal.primary_company_id}")
     
     return {
         "message": f"Invitation sent to {invite_data.email}",
@@ -158,29 +138,17 @@ def accept_team_invite(
 def update_member_role(
     member_id: int,
     new_role: str,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Update a team member's role (Admin only)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
     # Check if user is admin
-    if user.role != UserRole.ADMIN:
+    if principal.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can update member roles"
         )
     
-    # Get primary company if this is a team member
-    if company.parent_company_id:
-        company = session.get(Company, company.parent_company_id)
-    
     # Get member company
     member_company = session.get(Company, member_id)
     if not member_company:
@@ -188,7 +156,7 @@ def update_member_role(
     
     # Verify member belongs to the same company
     member_primary = member_company.parent_company_id or member_company.id
-    if member_primary != company.id:
+    if member_primary != principal.primary_company_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Cannot update member from different company"
@@ -214,6 +182,8 @@ def update_member_role(
     session.add(member_user)
     session.add(member_company)
     session.commit()
+    pin_to_primary(principal.user_id)
+    principal_cache.invalidate(member_user.id)
     
     logger.info(f"[TEAM] Member {member_company.id} role updated to {new_role}")
     
@@ -227,29 +197,17 @@ def update_member_role(
 @router.delete("/members/{member_id}", response_model=dict)
 def remove_team_member(
     member_id: int,
-    current_user: dict = Depends(get_current_user),
+    principal: Principal = Depends(get_current_company_scope),
     session: Session = Depends(get_session)
 ):
     """Remove a team member from the company (Admin only)"""
-    user = session.exec(select(User).where(User.email == current_user["email"])).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    company = session.exec(select(Company).where(Company.user_id == user.id)).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company profile not found")
-    
     # Check if user is admin
-    if user.role != UserRole.ADMIN:
+    if principal.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can remove team members"
         )
     
-    # Get primary company if this is a team member
-    if company.parent_company_id:
-        company = session.get(Company, company.parent_company_id)
-    
     # Get member company
     member_company = session.get(Company, member_id)
     if not member_company:
@@ -257,7 +215,7 @@ def remove_team_member(
     
     # Verify member belongs to the same company
     member_primary = member_company.parent_company_id or member_company.id
-    if member_primary != company.id:
+    if member_primary != principal.primary_company_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Cannot remove member from different company"
@@ -275,8 +233,10 @@ def remove_team_member(
     member_user.is_active = False
     session.add(member_user)
     session.commit()
+    pin_to_primary(principal.user_id)
+    principal_cache.invalidate(member_user.id)
     
-    logger.info(f"[TEAM] Member {member_company.id} removed from company {company.id}")
+    logger.info(f"[TEAM] Member {member_company.id} removed from company {principal.primary_company_id}")
     
     return {
         "message": "Team member removed successfully",
@@ -0,0 +1,810 @@
+"""
+Match scoring engine for TalentGraph V2
+One set of weights and rules for every route: pre-parsed posting/profile
+features, batch scoring, and a columnar NumPy copy of every JobProfile so one
+job posting can be scored against all profiles in a single pass
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel
+from sqlalchemy import and_, case, func, or_
+from sqlmodel import Session, select
+
+from app.geo import EARTH_RADIUS_MILES, GEO_MATCH_RADIUS_MILES, Place, places_meet
+from app.models import JobPosting, JobProfile, Skill, LocationPreference, WorkType
+from app.skills import skill_dictionary
+from app.values import enum_value
+
+logger = logging.getLogger(__name__)
+
+MATCH_THRESHOLD = 40
+
+# Rows updated this long before the newest timestamp we have seen are re-read
+# on sync, so commits that land late from another worker are not missed
+SYNC_LOOKBACK = timedelta(seconds=30)
+
+_SCALAR_COLUMNS = {
+    "profile_id": np.int64,
+    "candidate_id": np.int64,
+    "active": np.bool_,
+    "vendor": np.int32,
+    "product_type": np.int32,
+    "job_role": np.int32,
+    "worktype": np.int32,
+    "remote_ok": np.bool_,
+    "years": np.float64,
+    "salary_min": np.float64,
+    "salary_max": np.float64,
+}
+
+
+class _Vocabulary:
+    """Interns strings to dense integer codes"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.tokens: List[str] = []
+
+    def add(self, token: str) -> int:
+        code = self.codes.get(token)
+        if code is None:
+            code = len(self.tokens)
+            self.codes[token] = code
+            self.tokens.append(token)
+        return code
+
+    def get(self, token) -> int:
+        return self.codes.get(token, -1)
+
+    def __len__(self):
+        return len(self.tokens)
+
+
+def parse_required_skills(raw: Optional[str]) -> list:
+    """Parse the JobPosting.required_skills JSON list; anything malformed counts as no skills"""
+    try:
+        required = json.loads(raw) if raw else []
+        return list(required) if required else []
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+
+def parse_min_years(seniority_level: Optional[str]) -> Optional[int]:
+    """Leading number of a "3-5" style seniority range, None if it is not numeric"""
+    try:
+        return int(seniority_level.split("-")[0].strip())
+    except (ValueError, IndexError, AttributeError):
+        return None
+
+
+def load_profile_skills(session: Session, ids: Optional[List[int]] = None) -> Dict[int, List[str]]:
+    """Skill names grouped by job profile, for all profiles or just `ids`"""
+    query = select(Skill.job_profile_id, Skill.skill_name)
+    if ids is not None:
+        query = query.where(Skill.job_profile_id.in_(ids))
+    grouped: Dict[int, List[str]] = {}
+    for profile_id, skill_name in session.exec(query).all():
+        grouped.setdefault(profile_id, []).append(skill_name)
+    return grouped
+
+
+def load_profile_locations(session: Session, ids: Optional[List[int]] = None) -> Dict[int, List[Place]]:
+    """Resolved location preferences grouped by job profile"""
+    query = select(
+        LocationPreference.job_profile_id, LocationPreference.latitude, LocationPreference.longitude,
+        LocationPreference.region_code, LocationPreference.is_remote,
+    )
+    if ids is not None:
+        query = query.where(LocationPreference.job_profile_id.in_(ids))
+    grouped: Dict[int, List[Place]] = {}
+    for profile_id, latitude, longitude, region, remote in session.exec(query).all():
+        grouped.setdefault(profile_id, []).append(Place(latitude, longitude, region, bool(remote)))
+    return grouped
+
+
+def preference_place(location_preference: LocationPreference) -> Place:
+    """Place of a loaded LocationPreference row"""
+    return Place(location_preference.latitude, location_preference.longitude,
+                 location_preference.region_code, bool(location_preference.is_remote))
+
+
+def accepts_remote(job_profile: JobProfile, places: Iterable[Place]) -> bool:
+    """Remote worktype, a remote_acceptance answer or a "Remote" location preference"""
+    return (
+        enum_value(job_profile.worktype) == "remote"
+        or bool(job_profile.remote_acceptance)
+        or any(place.remote for place in places)
+    )
+
+
+class ScoringWeights(BaseModel):
+    """
+    Points awarded by each scoring component. Totals are capped at 100.
+    Override with a JSON object in MATCH_SCORING_WEIGHTS, e.g. {"skills": 30}.
+    """
+    product_role: int = 35          # vendor, product type and role all match
+    product_type: int = 25          # vendor and product type match
+    product_vendor: int = 15        # vendor matches
+    skills: int = 25                # scaled by the share of required skills matched
+    experience: int = 20            # scaled by years / minimum years, capped
+    experience_unparsed: int = 10   # seniority_level is not numeric...
+    experience_unparsed_years: int = 3  # ...and the profile has at least this many years
+    salary_overlap: int = 10
+    salary_near: int = 5            # profile minimum within salary_near_ratio of the posting maximum
+    salary_near_ratio: float = 1.2
+    location: int = 10
+    worktype_bonus: int = 5
+
+    class Config:
+        allow_mutation = False
+
+    @property
+    def unindexed_max(self) -> int:
+        """Best possible score for a pair with no vendor, skill or location hit"""
+        return (
+            max(self.experience, self.experience_unparsed)
+            + max(self.salary_overlap, self.salary_near)
+            + self.worktype_bonus
+        )
+
+    @classmethod
+    def from_env(cls) -> "ScoringWeights":
+        raw = os.getenv("MATCH_SCORING_WEIGHTS")
+        return cls.parse_raw(raw) if raw else cls()
+
+
+WEIGHTS = ScoringWeights.from_env()
+
+
+def _salary_bounds(row) -> Optional[Tuple[float, float]]:
+    """
+    Annual base-currency (min, max) of a posting or profile, with an open
+    maximum as inf; None when the salary cannot be compared
+    """
+    if row.annual_salary_min is None:
+        return None
+    return row.annual_salary_min, row.annual_salary_max if row.annual_salary_max is not None else float("inf")
+
+
+class PostingFeatures(NamedTuple):
+    """A job posting parsed once for scoring"""
+    id: Optional[int]
+    updated_at: Optional[datetime]
+    vendor: Optional[str]
+    product_type: Optional[str]
+    job_role: Optional[str]
+    worktype: Optional[str]
+    required_skills: list            # as stored, reported back in matched_skills
+    required_ids: Tuple[FrozenSet[int], ...]  # skill_dictionary IDs of each required skill
+    min_years: Optional[int]
+    salary: Optional[Tuple[float, float]]
+    place: Place                     # resolved location, see app.geo
+    remote: bool
+
+    @classmethod
+    def from_posting(cls, job_posting: JobPosting) -> "PostingFeatures":
+        required = parse_required_skills(job_posting.required_skills)
+        return cls(
+            id=job_posting.id,
+            updated_at=job_posting.updated_at,
+            vendor=job_posting.product_vendor,
+            product_type=job_posting.product_type,
+            job_role=job_posting.job_role,
+            worktype=enum_value(job_posting.worktype),
+            required_skills=required,
+            required_ids=tuple(skill_dictionary.ids(s) for s in required),
+            min_years=parse_min_years(job_posting.seniority_level),
+            salary=_salary_bounds(job_posting),
+            place=Place(job_posting.latitude, job_posting.longitude, job_posting.region_code),
+            remote=bool(job_posting.is_remote),
+        )
+
+
+class ProfileFeatures(NamedTuple):
+    """A job profile with its skills and location preferences, parsed once for scoring"""
+    id: Optional[int]
+    candidate_id: Optional[int]
+    vendor: Optional[str]
+    product_type: Optional[str]
+    job_role: Optional[str]
+    worktype: Optional[str]
+    years: float
+    salary: Optional[Tuple[float, float]]
+    skill_ids: FrozenSet[int]        # skill_dictionary.covered_ids of the profile's skills
+    places: Tuple[Place, ...]        # one per location preference, resolved or not
+    remote_ok: bool
+
+    @classmethod
+    def from_profile(cls, job_profile: JobProfile, skill_names: Iterable[str],
+                     places: Iterable[Place]) -> "ProfileFeatures":
+        places = tuple(places)
+        return cls(
+            id=job_profile.id,
+            candidate_id=job_profile.candidate_id,
+            vendor=job_profile.product_vendor,
+            product_type=job_profile.product_type,
+            job_role=job_profile.job_role,
+            worktype=enum_value(job_profile.worktype),
+            years=job_profile.years_of_experience or 0,
+            salary=_salary_bounds(job_profile),
+            skill_ids=skill_dictionary.covered_ids(skill_names),
+            places=places,
+            remote_ok=accepts_remote(job_profile, places),
+        )
+
+
+class _PostingFeatureCache:
+    """PostingFeatures by posting ID, rebuilt when the row's updated_at moves"""
+
+    def __init__(self, max_size: int = 50000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: Dict[int, PostingFeatures] = {}
+
+    def get(self, job_posting: JobPosting) -> PostingFeatures:
+        cached = self._entries.get(job_posting.id)
+        if cached is not None and cached.updated_at == job_posting.updated_at:
+            return cached
+        features = PostingFeatures.from_posting(job_posting)
+        if job_posting.id is not None:
+            with self._lock:
+                if len(self._entries) >= self.max_size:
+                    self._entries.clear()
+                self._entries[job_posting.id] = features
+        return features
+
+
+_posting_features = _PostingFeatureCache()
+
+
+def posting_features(job_posting: Union[JobPosting, PostingFeatures]) -> PostingFeatures:
+    """Cached PostingFeatures for a posting row"""
+    if isinstance(job_posting, PostingFeatures):
+        return job_posting
+    return _posting_features.get(job_posting)
+
+
+def profile_features(job_profile: JobProfile) -> ProfileFeatures:
+    """ProfileFeatures from a profile row and its loaded skills / location_preferences"""
+    return ProfileFeatures.from_profile(
+        job_profile,
+        [s.skill_name for s in job_profile.skills],
+        [preference_place(loc) for loc in job_profile.location_preferences],
+    )
+
+
+def _experience_points(years: float, min_years: Optional[int], weights: ScoringWeights) -> int:
+    if min_years is None:
+        return weights.experience_unparsed if years >= weights.experience_unparsed_years else 0
+    if years >= min_years:
+        return weights.experience
+    if min_years > 0:
+        return int(weights.experience * min(years / min_years, 1))
+    return 0
+
+
+def _location_hit(posting: PostingFeatures, profile: ProfileFeatures) -> bool:
+    """
+    A remote posting suits any profile open to remote work or with a
+    location preference at all; otherwise a preference must meet the
+    posting's place (hybrid postings are located like onsite ones)
+    """
+    if posting.remote:
+        return profile.remote_ok or bool(profile.places)
+    return any(places_meet(posting.place, place) for place in profile.places)
+
+
+def score_pair(posting: PostingFeatures, profile: ProfileFeatures, weights: Optional[ScoringWeights] = None) -> dict:
+    """
+    Score one posting/profile pair:
+    - Product/Role match: 35%
+    - Skills match: 25%
+    - Experience match: 20%
+    - Salary match: 10%
+    - Location match: 10%
+    - Worktype bonus: +5
+    """
+    w = weights or WEIGHTS
+    details = {
+        "product_match": 0,
+        "skills_match": 0,
+        "experience_match": 0,
+        "salary_match": 0,
+        "location_match": 0,
+        "matched_skills": [],
+    }
+
+    if posting.vendor == profile.vendor:
+        if posting.product_type == profile.product_type:
+            details["product_match"] = w.product_role if posting.job_role == profile.job_role else w.product_type
+        else:
+            details["product_match"] = w.product_vendor
+
+    if posting.required_ids and profile.skill_ids:
+        for req_skill, req_ids in zip(posting.required_skills, posting.required_ids):
+            if not req_ids.isdisjoint(profile.skill_ids):
+                details["matched_skills"].append(req_skill)
+        details["skills_match"] = int(w.skills * (len(details["matched_skills"]) / len(posting.required_ids)))
+
+    details["experience_match"] = _experience_points(profile.years, posting.min_years, w)
+
+    if profile.salary is not None and posting.salary is not None:
+        (profile_min, profile_max), (posting_min, posting_max) = profile.salary, posting.salary
+        if profile_min <= posting_max and profile_max >= posting_min:
+            details["salary_match"] = w.salary_overlap
+        elif profile_min <= posting_max * w.salary_near_ratio:
+            details["salary_match"] = w.salary_near
+
+    if _location_hit(posting, profile):
+        details["location_match"] = w.location
+
+    score = sum(details[k] for k in ("product_match", "skills_match", "experience_match", "salary_match", "location_match"))
+    if posting.worktype == profile.worktype:
+        score += w.worktype_bonus
+    return {"score": min(score, 100), "details": details}
+
+
+def posting_score_bound(profile: ProfileFeatures, skill_hits: Iterable[int], location_hits: Iterable[int],
+                        weights: Optional[ScoringWeights] = None):
+    """
+    SQL expression at least score_pair(posting, profile) for every JobPosting
+    row. Product, salary and worktype points are computed exactly from the
+    posting's columns; skill and location points are given to the postings in
+    `skill_hits` / `location_hits` (supersets, e.g. from the search index) and
+    experience is taken at its best for the profile's years.
+    """
+    w = weights or WEIGHTS
+    same_vendor = JobPosting.product_vendor == profile.vendor
+    same_type = and_(same_vendor, JobPosting.product_type == profile.product_type)
+    product = case(
+        (and_(same_type, JobPosting.job_role == profile.job_role), w.product_role),
+        (same_type, w.product_type),
+        (same_vendor, w.product_vendor),
+        else_=0,
+    )
+    skill_hits, location_hits = list(skill_hits), list(location_hits)
+    skills = case((JobPosting.id.in_(skill_hits), w.skills), else_=0) if skill_hits else 0
+    location = case((JobPosting.id.in_(location_hits), w.location), else_=0) if location_hits else 0
+    experience = max(w.experience, w.experience_unparsed if profile.years >= w.experience_unparsed_years else 0)
+
+    salary = 0
+    if profile.salary is not None:
+        profile_min, profile_max = profile.salary
+        posting_min, posting_max = JobPosting.annual_salary_min, JobPosting.annual_salary_max  # NULL max: open
+        overlap = or_(posting_max == None, posting_max >= profile_min)
+        if profile_max != float("inf"):
+            overlap = and_(overlap, posting_min <= profile_max)
+        near = or_(posting_max == None, posting_max * w.salary_near_ratio >= profile_min)
+        salary = case(
+            (and_(posting_min != None, overlap), w.salary_overlap),
+            (and_(posting_min != None, near), w.salary_near),
+            else_=0,
+        )
+
+    if profile.worktype in WorkType._value2member_map_:
+        worktype = case((JobPosting.worktype == WorkType(profile.worktype), w.worktype_bonus), else_=0)
+    else:
+        worktype = w.worktype_bonus
+    return product + skills + location + salary + worktype + experience
+
+
+def score_many(subject: Union[PostingFeatures, ProfileFeatures], others: Iterable,
+               weights: Optional[ScoringWeights] = None) -> List[dict]:
+    """
+    Score one posting against many profiles, or one profile against many
+    postings. Results line up with `others`. Scoring a posting against every
+    stored profile is faster through profile_matrix.score().
+    """
+    if isinstance(subject, PostingFeatures):
+        return [score_pair(subject, profile, weights) for profile in others]
+    return [score_pair(posting_features(posting), subject, weights) for posting in others]
+
+
+def match_score(session: Session, job_posting: JobPosting, job_profile: JobProfile) -> dict:
+    """Score a single stored pair, loading the profile's skills and locations"""
+    skills = load_profile_skills(session, [job_profile.id]).get(job_profile.id, [])
+    locations = load_profile_locations(session, [job_profile.id]).get(job_profile.id, [])
+    return score_pair(posting_features(job_posting), ProfileFeatures.from_profile(job_profile, skills, locations))
+
+
+class ProfileScores:
+    """Component scores for a batch of profiles, aligned by position"""
+
+    def __init__(self, profile_ids, candidate_ids, product, skills, experience, salary, location, total,
+                 required_skills, skill_hits):
+        self.profile_ids = profile_ids
+        self.candidate_ids = candidate_ids
+        self.product = product
+        self.skills = skills
+        self.experience = experience
+        self.salary = salary
+        self.location = location
+        self.total = total
+        self._required_skills = required_skills
+        self._skill_hits = skill_hits
+
+    def __len__(self):
+        return len(self.profile_ids)
+
+    def above(self, threshold: int = MATCH_THRESHOLD) -> np.ndarray:
+        """Positions of profiles scoring at least `threshold`"""
+        return np.flatnonzero(self.total >= threshold)
+
+    def score(self, i: int) -> int:
+        return int(self.total[i])
+
+    def details(self, i: int) -> dict:
+        """Per-profile breakdown in the shape score_pair returns"""
+        return {
+            "product_match": int(self.product[i]),
+            "skills_match": int(self.skills[i]),
+            "experience_match": int(self.experience[i]),
+            "salary_match": int(self.salary[i]),
+            "location_match": int(self.location[i]),
+            "matched_skills": [
+                req for req, hits in zip(self._required_skills, self._skill_hits) if hits[i]
+            ],
+        }
+
+
+class TableMirror:
+    """
+    Base class for per-process, in-memory copies of a table.
+
+    Subclasses implement load(), _contains(), _apply() and _drop(). sync()
+    keeps the copy current across workers with one count/max(updated_at)
+    query: rows changed since the last sync are re-applied, and a full reload
+    only happens when rows were deleted by another process.
+    """
+
+    model = None
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._count = 0
+        self._watermark = None
+
+    def load(self, session: Session):
+        raise NotImplementedError
+
+    def sync(self, session: Session):
+        """Bring the copy up to date with the database"""
+        count, latest = session.exec(
+            select(func.count(self.model.id), func.max(self.model.updated_at))
+        ).one()
+        if not self._loaded:
+            self.load(session)
+            return
+        if count == self._count and latest == self._watermark:
+            return
+
+        if latest is not None and self._watermark is not None:
+            changed = session.exec(
+                select(self.model).where(self.model.updated_at >= self._watermark - SYNC_LOOKBACK)
+            ).all()
+            self._refresh(session, changed)
+        if count != self._count:
+            self.load(session)
+
+    def refresh(self, session: Session, row_id: int):
+        """Re-read one row after it was created or updated"""
+        row = session.get(self.model, row_id)
+        if row is None:
+            self.remove(row_id)
+            return
+        self._refresh(session, [row])
+
+    def remove(self, row_id: int):
+        """Forget a deleted row"""
+        with self._lock:
+            if self._drop(row_id):
+                self._count -= 1
+
+    def _refresh(self, session: Session, rows: list):
+        if not rows:
+            return
+        with self._lock:
+            self._count += sum(1 for row in rows if not self._contains(row.id))
+            self._apply(session, rows)
+            for row in rows:
+                self._bump_watermark(row)
+
+    def _mark_loaded(self, rows: list):
+        self._count = len(rows)
+        self._watermark = None
+        for row in rows:
+            self._bump_watermark(row)
+        self._loaded = True
+
+    def _bump_watermark(self, row):
+        if row.updated_at is not None and (self._watermark is None or row.updated_at > self._watermark):
+            self._watermark = row.updated_at
+
+    def _contains(self, row_id: int) -> bool:
+        raise NotImplementedError
+
+    def _apply(self, session: Session, rows: list):
+        raise NotImplementedError
+
+    def _drop(self, row_id: int) -> bool:
+        raise NotImplementedError
+
+
+class ProfileMatrix(TableMirror):
+    """
+    Columnar store of all job profiles for scoring one posting against all of them.
+
+    Scalar fields live in NumPy arrays indexed by row; skills are kept as
+    skill_dictionary IDs and location preferences as (latitude, longitude,
+    region code) entries, as per-row lists that are flattened into
+    (row, value) arrays when they change. Scoring a posting looks skill IDs
+    up in a boolean table and measures its distance to every located
+    preference in one pass, then broadcasts the results across every row.
+    """
+
+    model = JobProfile
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self._vendors = _Vocabulary()
+        self._types = _Vocabulary()
+        self._roles = _Vocabulary()
+        self._worktypes = _Vocabulary()
+        self._regions = _Vocabulary()
+
+        self._capacity = 0
+        self._size = 0
+        self._dead = 0
+        self._cols = {name: np.zeros(0, dtype=dtype) for name, dtype in _SCALAR_COLUMNS.items()}
+        self._row_of: Dict[int, int] = {}
+        self._row_skills: List[List[int]] = []
+        self._row_locations: List[List[tuple]] = []
+        self._links = None
+
+    # ---------- loading ----------
+
+    def load(self, session: Session):
+        """Rebuild the matrix from the database (three queries)"""
+        profiles = session.exec(select(JobProfile)).all()
+        skills = load_profile_skills(session, None)
+        locations = load_profile_locations(session, None)
+        with self._lock:
+            self._reset()
+            for profile in profiles:
+                self._write_row(profile, skills.get(profile.id, []), locations.get(profile.id, []))
+            self._mark_loaded(profiles)
+        logger.info(f"[SCORING] Profile matrix loaded with {len(profiles)} job profiles")
+
+    def _contains(self, row_id: int) -> bool:
+        return row_id in self._row_of
+
+    def _apply(self, session: Session, profiles: List[JobProfile]):
+        ids = [p.id for p in profiles]
+        skills = load_profile_skills(session, ids)
+        locations = load_profile_locations(session, ids)
+        with self._lock:
+            for profile in profiles:
+                self._write_row(profile, skills.get(profile.id, []), locations.get(profile.id, []))
+
+    def _drop(self, job_profile_id: int) -> bool:
+        row = self._row_of.pop(job_profile_id, None)
+        if row is None:
+            return False
+        self._cols["active"][row] = False
+        self._row_skills[row] = []
+        self._row_locations[row] = []
+        self._links = None
+        self._dead += 1
+        if self._dead > 1024 and self._dead * 2 > self._size:
+            self._compact()
+        return True
+
+    # ---------- row storage ----------
+
+    def _write_row(self, profile: JobProfile, skill_names: List[str], places: List[Place]):
+        row = self._row_of.get(profile.id)
+        if row is None:
+            row = self._size
+            self._grow(row + 1)
+            self._size += 1
+            self._row_of[profile.id] = row
+            self._row_skills.append([])
+            self._row_locations.append([])
+
+        cols = self._cols
+        cols["profile_id"][row] = profile.id
+        cols["candidate_id"][row] = profile.candidate_id
+        cols["active"][row] = True
+        cols["vendor"][row] = self._vendors.add(profile.product_vendor)
+        cols["product_type"][row] = self._types.add(profile.product_type)
+        cols["job_role"][row] = self._roles.add(profile.job_role)
+        cols["worktype"][row] = self._worktypes.add(enum_value(profile.worktype))
+        cols["remote_ok"][row] = accepts_remote(profile, places)
+        cols["years"][row] = profile.years_of_experience or 0
+        cols["salary_min"][row], cols["salary_max"][row] = (
+            _salary_bounds(profile) or (np.nan, np.nan)
+        )
+
+        self._row_skills[row] = sorted(skill_dictionary.covered_ids(skill_names))
+        self._row_locations[row] = [
+            (
+                place.latitude if place.precise else np.nan,
+                place.longitude if place.precise else np.nan,
+                self._regions.add(place.region) if place.region is not None else -1,
+            )
+            for place in places
+        ]
+        self._links = None
+
+    def _grow(self, size: int):
+        if size <= self._capacity:
+            return
+        capacity = max(size, self._capacity * 2, 256)
+        for name, column in self._cols.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._cols[name] = grown
+        self._capacity = capacity
+
+    def _compact(self):
+        keep = np.flatnonzero(self._cols["active"][:self._size])
+        for name, column in self._cols.items():
+            self._cols[name] = column[keep].copy()
+        self._row_skills = [self._row_skills[i] for i in keep]
+        self._row_locations = [self._row_locations[i] for i in keep]
+        self._size = self._capacity = len(keep)
+        self._row_of = {int(pid): row for row, pid in enumerate(self._cols["profile_id"])}
+        self._dead = 0
+        self._links = None
+
+    def _flatten_links(self):
+        """(row, code) arrays for the skills and location preferences of every row"""
+        if self._links is None:
+            self._links = self._gather_links(range(self._size))
+        return self._links
+
+    def _gather_links(self, rows) -> dict:
+        """(position, code) arrays for the skills and location preferences of `rows`"""
+        row_skills = [self._row_skills[row] for row in rows]
+        row_locations = [self._row_locations[row] for row in rows]
+        n = len(row_skills)
+        skill_counts = np.fromiter((len(s) for s in row_skills), dtype=np.int64, count=n)
+        loc_counts = np.fromiter((len(l) for l in row_locations), dtype=np.int64, count=n)
+        locs = list(itertools.chain.from_iterable(row_locations))
+        return {
+            "skill_rows": np.repeat(np.arange(n), skill_counts),
+            "skill_codes": np.fromiter(
+                itertools.chain.from_iterable(row_skills), dtype=np.int64, count=int(skill_counts.sum())
+            ),
+            "skill_counts": skill_counts,
+            "loc_rows": np.repeat(np.arange(n), loc_counts),
+            "loc_lats": np.fromiter((lat for lat, _, _ in locs), dtype=np.float64, count=len(locs)),
+            "loc_lons": np.fromiter((lon for _, lon, _ in locs), dtype=np.float64, count=len(locs)),
+            "loc_regions": np.fromiter((region for _, _, region in locs), dtype=np.int64, count=len(locs)),
+            "loc_counts": loc_counts,
+        }
+
+    def warm(self):
+        """
+        Build the whole-matrix arrays score() reuses now rather than on first
+        use, e.g. before forking workers that share them read-only
+        """
+        with self._lock:
+            self._flatten_links()
+
+    # ---------- scoring ----------
+
+    def score(self, job_posting: Union[JobPosting, PostingFeatures], profile_ids: Optional[Iterable[int]] = None,
+              weights: Optional[ScoringWeights] = None) -> ProfileScores:
+        """
+        Score `job_posting` against every active profile, or only against
+        `profile_ids` when a retrieval stage has already narrowed the field.
+        Vectorized form of score_pair, component by component.
+        """
+        w = weights or WEIGHTS
+        posting = posting_features(job_posting)
+        with self._lock:
+            selected = None
+            if profile_ids is not None:
+                selected = sorted(self._row_of[pid] for pid in set(profile_ids) if pid in self._row_of)
+            if selected is None or 4 * len(selected) > self._size:
+                # Large selections reuse the cached whole-matrix arrays
+                cols = {name: column[:self._size] for name, column in self._cols.items()}
+                links = self._flatten_links()
+                rows = np.flatnonzero(cols["active"]) if selected is None else np.array(selected, dtype=np.int64)
+            else:
+                cols = {name: column[selected] for name, column in self._cols.items()}
+                links = self._gather_links(selected)
+                rows = np.arange(len(selected))
+            n = len(cols["profile_id"])
+
+            # Product & Role match
+            same_vendor = cols["vendor"] == self._vendors.get(posting.vendor)
+            same_type = same_vendor & (cols["product_type"] == self._types.get(posting.product_type))
+            same_role = same_type & (cols["job_role"] == self._roles.get(posting.job_role))
+            product = np.where(
+                same_role, w.product_role,
+                np.where(same_type, w.product_type, np.where(same_vendor, w.product_vendor, 0)),
+            )
+
+            # Skills match
+            skill_hits = []
+            for req_ids in posting.required_ids:
+                wanted = np.zeros(len(skill_dictionary), dtype=np.bool_)
+                wanted[list(req_ids)] = True
+                hit_rows = links["skill_rows"][wanted[links["skill_codes"]]]
+                skill_hits.append(np.bincount(hit_rows, minlength=n) > 0)
+            if posting.required_ids:
+                matched = np.sum(skill_hits, axis=0)
+                skills = (w.skills * (matched / len(posting.required_ids))).astype(np.int64)
+            else:
+                skills = np.zeros(n, dtype=np.int64)
+
+            # Experience match
+            years = cols["years"]
+            min_years = posting.min_years
+            if min_years is None:
+                experience = np.where(years >= w.experience_unparsed_years, w.experience_unparsed, 0)
+            elif min_years > 0:
+                partial = np.trunc(w.experience * np.minimum(years / min_years, 1)).astype(np.int64)
+                experience = np.where(years >= min_years, w.experience, partial)
+            else:
+                experience = np.where(years >= min_years, w.experience, 0)
+
+            # Salary match (NaN bounds never compare true)
+            if posting.salary is None:
+                salary = np.zeros(n, dtype=np.int64)
+            else:
+                posting_min, posting_max = posting.salary
+                overlap = (cols["salary_min"] <= posting_max) & (cols["salary_max"] >= posting_min)
+                near = cols["salary_min"] <= posting_max * w.salary_near_ratio
+                salary = np.where(overlap, w.salary_overlap, np.where(near, w.salary_near, 0))
+
+            # Location match (NaN coordinates are preferences without a city)
+            place = posting.place
+            region = self._regions.get(place.region)
+            if posting.remote:
+                located = cols["remote_ok"] | (links["loc_counts"] > 0)
+            elif region < 0 and not place.precise:
+                located = np.zeros(n, dtype=np.bool_)
+            else:
+                entry_hits = links["loc_regions"] == region if region >= 0 else np.zeros(len(links["loc_rows"]), dtype=np.bool_)
+                if place.precise:
+                    lats = links["loc_lats"]
+                    near = _distances_miles(place.latitude, place.longitude, lats, links["loc_lons"]) <= GEO_MATCH_RADIUS_MILES
+                    entry_hits = np.where(np.isnan(lats), entry_hits, near)
+                located = np.bincount(links["loc_rows"][entry_hits], minlength=n) > 0
+            location = np.where(located, w.location, 0)
+
+            # Worktype bonus
+            bonus = np.where(cols["worktype"] == self._worktypes.get(posting.worktype), w.worktype_bonus, 0)
+            total = np.minimum(product + skills + experience + salary + location + bonus, 100)
+
+            return ProfileScores(
+                cols["profile_id"][rows], cols["candidate_id"][rows], product[rows], skills[rows],
+                experience[rows], salary[rows], location[rows], total[rows],
+                posting.required_skills, [hits[rows] for hits in skill_hits],
+            )
+
+
+def _distances_miles(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """app.geo.distance_miles from one point to many"""
+    phi1, phi2 = np.radians(lat), np.radians(lats)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+# Shared per-process instance used by the recommendation routes
+profile_matrix = ProfileMatrix()
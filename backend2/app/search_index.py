@@ -0,0 +1,250 @@
+"""
+In-process inverted index for TalentGraph V2
+Maps normalized vendor/type/role/skill/region tokens, and located places on a
+grid, to job profile and job posting IDs so recommendation routes only score
+plausible pairs
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select
+
+from app.geo import GEO_MATCH_RADIUS_MILES, GeoGrid, Place
+from app.models import JobPosting, JobPostingSkill, JobProfile
+from app.scoring import (
+    MATCH_THRESHOLD, WEIGHTS, ProfileFeatures, TableMirror, accepts_remote, load_profile_locations,
+    load_profile_skills, parse_required_skills, posting_features, posting_score_bound
+)
+from app.skills import skill_dictionary
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_token(value) -> str:
+    """Lower-cased, trimmed token; non-strings are stringified like the scorers do"""
+    if value is None:
+        return ""
+    return (value if isinstance(value, str) else str(value)).strip().lower()
+
+
+def _place_tokens(places: Iterable[Place]) -> Tuple[List[tuple], List[Tuple[float, float]]]:
+    """
+    Tokens and grid points for a document's places: every resolved place is
+    indexed under ("region", code), and cities go on the grid while bare
+    states/countries are also indexed under ("wide", code)
+    """
+    tokens, points = [], []
+    for place in places:
+        if place.region is None:
+            continue
+        tokens.append(("region", place.region))
+        if place.precise:
+            points.append((place.latitude, place.longitude))
+        else:
+            tokens.append(("wide", place.region))
+    return tokens, points
+
+
+class _TokenIndex(TableMirror):
+    """
+    field -> token -> ids postings, plus the reverse map used to retract a
+    document's old tokens when it is re-indexed, and a grid of the
+    documents' located places.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self._ids: Dict[str, Dict[str, Set[int]]] = defaultdict(lambda: defaultdict(set))
+        self._tokens_of: Dict[int, List[tuple]] = {}
+        self._grid = GeoGrid(GEO_MATCH_RADIUS_MILES)
+
+    def __len__(self):
+        return len(self._tokens_of)
+
+    def _contains(self, doc_id: int) -> bool:
+        return doc_id in self._tokens_of
+
+    def _index(self, doc_id: int, tokens: Iterable[tuple], points: Iterable[Tuple[float, float]] = ()):
+        self._drop(doc_id)
+        tokens = list(set(tokens))
+        for field, token in tokens:
+            self._ids[field][token].add(doc_id)
+        self._tokens_of[doc_id] = tokens
+        self._grid.add(doc_id, points)
+
+    def _drop(self, doc_id: int) -> bool:
+        self._grid.remove(doc_id)
+        tokens = self._tokens_of.pop(doc_id, None)
+        if tokens is None:
+            return False
+        for field, token in tokens:
+            ids = self._ids[field][token]
+            ids.discard(doc_id)
+            if not ids:
+                del self._ids[field][token]
+        return True
+
+    def lookup(self, field: str, token) -> Set[int]:
+        """IDs indexed under exactly this (normalized) token"""
+        with self._lock:
+            return set(self._ids[field].get(normalize_token(token), ()))
+
+    def lookup_all(self, field: str, tokens: Iterable) -> Set[int]:
+        """Union of IDs indexed under any of `tokens`, used as is (e.g. skill IDs)"""
+        with self._lock:
+            found: Set[int] = set()
+            for token in tokens:
+                found |= self._ids[field].get(token, set())
+            return found
+
+    def near(self, place: Place) -> Set[int]:
+        """
+        IDs of documents with a place meeting `place` (app.geo.places_meet):
+        grid cells around a city plus the bare regions containing it, or
+        everything in the region for a bare state/country
+        """
+        if place.region is None:
+            return set()
+        if not place.precise:
+            return self.lookup_all("region", [place.region])
+        with self._lock:
+            found = self._grid.within(place.latitude, place.longitude, GEO_MATCH_RADIUS_MILES)
+        return found | self.lookup_all("wide", [place.region])
+
+
+class ProfileIndex(_TokenIndex):
+    """Inverted index over JobProfile, Skill and LocationPreference"""
+
+    model = JobProfile
+
+    def load(self, session: Session):
+        profiles = session.exec(select(JobProfile)).all()
+        skills = load_profile_skills(session)
+        locations = load_profile_locations(session)
+        with self._lock:
+            self._reset()
+            for profile in profiles:
+                self._index(profile.id, *self._tokens(profile, skills.get(profile.id, []), locations.get(profile.id, [])))
+            self._mark_loaded(profiles)
+        logger.info(f"[SEARCH INDEX] Indexed {len(profiles)} job profiles")
+
+    def _apply(self, session: Session, profiles: List[JobProfile]):
+        ids = [p.id for p in profiles]
+        skills = load_profile_skills(session, ids)
+        locations = load_profile_locations(session, ids)
+        with self._lock:
+            for profile in profiles:
+                self._index(profile.id, *self._tokens(profile, skills.get(profile.id, []), locations.get(profile.id, [])))
+
+    @staticmethod
+    def _tokens(profile: JobProfile, skill_names: List[str], places: List[Place]):
+        tokens = [
+            ("vendor", normalize_token(profile.product_vendor)),
+            ("type", normalize_token(profile.product_type)),
+            ("role", normalize_token(profile.job_role)),
+        ]
+        tokens += [("skill", skill_id) for skill_id in skill_dictionary.covered_ids(skill_names)]
+        place_tokens, points = _place_tokens(places)
+        tokens += place_tokens
+        if places or accepts_remote(profile, places):
+            tokens.append(("remote_ok", ""))
+        return tokens, points
+
+    def candidates_for_posting(self, job_posting: JobPosting) -> Optional[Set[int]]:
+        """
+        Profiles that can reach the match threshold for `job_posting`.
+        Without a vendor, skill or location hit a profile scores at most
+        WEIGHTS.unindexed_max (experience + salary + worktype, 35 by default),
+        so the union of those three hit sets contains every profile scoring
+        >= MATCH_THRESHOLD. Returns None (score everything) when the weights
+        make that bound unsafe.
+        """
+        if WEIGHTS.unindexed_max >= MATCH_THRESHOLD:
+            return None
+        found = self.lookup("vendor", job_posting.product_vendor)
+        found |= self.lookup_all(
+            "skill", skill_dictionary.ids_of_all(parse_required_skills(job_posting.required_skills))
+        )
+
+        posting = posting_features(job_posting)
+        if posting.remote:
+            found |= self.lookup("remote_ok", "")
+        else:
+            found |= self.near(posting.place)
+        return found
+
+
+class PostingIndex(_TokenIndex):
+    """Inverted index over JobPosting and JobPostingSkill"""
+
+    model = JobPosting
+
+    def load(self, session: Session):
+        postings = session.exec(select(JobPosting)).all()
+        skills = self._posting_skills(session, None)
+        with self._lock:
+            self._reset()
+            for posting in postings:
+                self._index(posting.id, *self._tokens(posting, skills.get(posting.id, [])))
+            self._mark_loaded(postings)
+        logger.info(f"[SEARCH INDEX] Indexed {len(postings)} job postings")
+
+    def _apply(self, session: Session, postings: List[JobPosting]):
+        skills = self._posting_skills(session, [p.id for p in postings])
+        with self._lock:
+            for posting in postings:
+                self._index(posting.id, *self._tokens(posting, skills.get(posting.id, [])))
+
+    @staticmethod
+    def _posting_skills(session: Session, ids) -> Dict[int, List[str]]:
+        query = select(JobPostingSkill.job_posting_id, JobPostingSkill.skill_name)
+        if ids is not None:
+            query = query.where(JobPostingSkill.job_posting_id.in_(ids))
+        grouped: Dict[int, List[str]] = {}
+        for posting_id, skill_name in session.exec(query).all():
+            grouped.setdefault(posting_id, []).append(skill_name)
+        return grouped
+
+    @staticmethod
+    def _tokens(posting: JobPosting, posting_skills: List[str]):
+        tokens = [
+            ("vendor", normalize_token(posting.product_vendor)),
+            ("type", normalize_token(posting.product_type)),
+            ("role", normalize_token(posting.job_role)),
+        ]
+        skill_ids = skill_dictionary.ids_of_all(parse_required_skills(posting.required_skills) + posting_skills)
+        tokens += [("skill", skill_id) for skill_id in skill_ids]
+        features = posting_features(posting)
+        if features.remote:
+            tokens.append(("remote", ""))
+            return tokens, []
+        place_tokens, points = _place_tokens([features.place])
+        return tokens + place_tokens, points
+
+    def posting_hits(self, profile: ProfileFeatures) -> Tuple[Set[int], Set[int]]:
+        """Postings that may share a skill with `profile`, and those that may match its locations"""
+        located: Set[int] = set()
+        if profile.places or profile.remote_ok:
+            located |= self.lookup("remote", "")
+        for place in profile.places:
+            located |= self.near(place)
+        return self.lookup_all("skill", profile.skill_ids), located
+
+    def posting_filter(self, profile: ProfileFeatures):
+        """
+        SQL condition for the postings that can reach the match threshold for
+        `profile`: posting_score_bound() with this index's skill and location
+        hits, so product, salary and worktype points are decided in the
+        database and only postings that can score >= MATCH_THRESHOLD are loaded
+        """
+        return posting_score_bound(profile, *self.posting_hits(profile)) >= MATCH_THRESHOLD
+
+
+# Shared per-process instances, kept current by the candidate and job posting routes
+profile_index = ProfileIndex()
+posting_index = PostingIndex()
@@ -2,6 +2,7 @@
 Security utilities: JWT, password hashing, token validation.
 """
 
+import hmac
 import os
 import jwt
 from datetime import datetime, timedelta
@@ -19,6 +20,8 @@ if not JWT_SECRET:
         raise RuntimeError("APP_JWT_SECRET must be set in non-development environments")
 JWT_ALGORITHM = "HS256"
 JWT_EXP_HOURS = int(os.getenv("APP_JWT_EXP_HOURS", "24"))
+# Shared secret for operations endpoints (/admin/*); they are disabled when unset
+ADMIN_TOKEN = os.getenv("APP_ADMIN_TOKEN")
 
 # Password hashing - Argon2 (matching original backend)
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
@@ -92,3 +95,14 @@ async def get_current_user_id(current_user: dict = Depends(get_current_user)) ->
             detail="Invalid token: no user_id"
         )
     return user_id
+
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Check the X-Admin-Token header against APP_ADMIN_TOKEN."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token"
+        )
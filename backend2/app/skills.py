@@ -0,0 +1,265 @@
+"""
+Skill dictionary for TalentGraph V2
+Canonical skills seeded from the catalogs, with aliases and integer IDs, and an
+Aho-Corasick matcher that maps free-text skill names to sets of those IDs
+"""
+
+import threading
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Tuple
+
+# ============ SKILL CATALOGS ============
+# IDs follow catalog order; append new entries at the end
+
+TECHNICAL_SKILLS_CATALOG = [
+    "Java", "Spring Boot", "Python", "Django", "Flask", "FastAPI",
+    "JavaScript", "TypeScript", "React", "Angular", "Vue.js", "Node.js",
+    "SQL", "PostgreSQL", "MySQL", "MongoDB", "Redis", "Elasticsearch",
+    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform",
+    "Kafka", "RabbitMQ", "GraphQL", "REST API", "gRPC",
+    "Git", "CI/CD", "Jenkins", "GitHub Actions",
+    "Machine Learning", "TensorFlow", "PyTorch", "Data Science",
+    "Oracle ERP", "SAP HANA", "SAP ABAP", "Salesforce", "ServiceNow",
+    "Oracle Cloud", "Oracle Fusion", "PeopleSoft", "JD Edwards",
+    "Power BI", "Tableau", "Looker", "Snowflake", "Databricks",
+    "C#", ".NET", "Go", "Rust", "Ruby", "PHP", "Swift", "Kotlin",
+    "React Native", "Flutter", "iOS", "Android",
+    "Microservices", "System Design", "DevOps", "SRE",
+    "Cybersecurity", "Penetration Testing", "SOC", "SIEM",
+    "Agile", "Scrum", "Jira", "Confluence",
+    "HTML", "CSS", "SASS", "Tailwind CSS", "Bootstrap",
+    "Linux", "Shell Scripting", "Networking", "TCP/IP",
+]
+
+SOFT_SKILLS_CATALOG = [
+    "Communication", "Leadership", "Problem Solving", "Time Management",
+    "Teamwork", "Adaptability", "Critical Thinking", "Creativity",
+    "Conflict Resolution", "Emotional Intelligence", "Decision Making",
+    "Negotiation", "Presentation Skills", "Mentoring", "Coaching",
+    "Strategic Thinking", "Project Management", "Stakeholder Management",
+    "Cross-functional Collaboration", "Client Relationship",
+    "Attention to Detail", "Analytical Thinking", "Initiative",
+    "Work Ethic", "Accountability", "Flexibility",
+    "Interpersonal Skills", "Active Listening", "Empathy",
+    "Delegation", "Influence", "Resilience",
+]
+
+CERTIFICATIONS_CATALOG = [
+    "AWS Solutions Architect", "AWS Developer Associate", "AWS DevOps Engineer",
+    "Azure Administrator", "Azure Solutions Architect", "Azure DevOps Engineer",
+    "GCP Cloud Engineer", "GCP Cloud Architect",
+    "Oracle Cloud Infrastructure", "Oracle Database Administrator",
+    "SAP Certified Application Associate", "SAP Certified Technology Associate",
+    "Salesforce Administrator", "Salesforce Developer",
+    "PMP", "PMI-ACP", "PRINCE2", "Scrum Master (CSM)", "SAFe Agilist",
+    "CISSP", "CISM", "CompTIA Security+", "CEH",
+    "Kubernetes Administrator (CKA)", "Docker Certified Associate",
+    "Terraform Associate", "ITIL v4 Foundation",
+    "Six Sigma Green Belt", "Six Sigma Black Belt",
+    "Google Analytics", "HubSpot Inbound Marketing",
+    "Cisco CCNA", "Cisco CCNP",
+    "Microsoft 365 Certified", "Power Platform Developer",
+]
+
+# Other spellings of catalog entries (alias -> catalog name)
+SKILL_ALIASES = {
+    "golang": "Go",
+    "js": "JavaScript",
+    "ecmascript": "JavaScript",
+    "ts": "TypeScript",
+    "reactjs": "React",
+    "react.js": "React",
+    "angularjs": "Angular",
+    "vue": "Vue.js",
+    "vuejs": "Vue.js",
+    "node": "Node.js",
+    "nodejs": "Node.js",
+    "spring": "Spring Boot",
+    "postgres": "PostgreSQL",
+    "mongo": "MongoDB",
+    "elastic search": "Elasticsearch",
+    "amazon web services": "AWS",
+    "microsoft azure": "Azure",
+    "google cloud": "GCP",
+    "google cloud platform": "GCP",
+    "k8s": "Kubernetes",
+    "rest": "REST API",
+    "rest apis": "REST API",
+    "restful api": "REST API",
+    "restful apis": "REST API",
+    "ci cd": "CI/CD",
+    "ci-cd": "CI/CD",
+    "continuous integration": "CI/CD",
+    "ml": "Machine Learning",
+    "oci": "Oracle Cloud Infrastructure",
+    "oracle fusion cloud": "Oracle Fusion",
+    "jde": "JD Edwards",
+    "powerbi": "Power BI",
+    "c sharp": "C#",
+    "dotnet": ".NET",
+    "asp.net": ".NET",
+    "scss": "SASS",
+    "tailwind": "Tailwind CSS",
+    "bash": "Shell Scripting",
+    "site reliability engineering": "SRE",
+    "security operations center": "SOC",
+    "csm": "Scrum Master (CSM)",
+    "certified scrum master": "Scrum Master (CSM)",
+    "cka": "Kubernetes Administrator (CKA)",
+    "security+": "CompTIA Security+",
+    "ccna": "Cisco CCNA",
+    "ccnp": "Cisco CCNP",
+    "itil": "ITIL v4 Foundation",
+    "itil v4": "ITIL v4 Foundation",
+    "pmi acp": "PMI-ACP",
+}
+
+
+def normalize_skill(value) -> str:
+    """Lower-cased skill text with runs of whitespace collapsed; non-strings are stringified"""
+    if value is None:
+        return ""
+    return " ".join((value if isinstance(value, str) else str(value)).lower().split())
+
+
+def _joins(text: str, i: int) -> bool:
+    """True when a match boundary at position i would split a word"""
+    return 0 < i < len(text) and text[i - 1].isalnum() and text[i].isalnum()
+
+
+class _Automaton:
+    """Aho-Corasick automaton over the dictionary terms"""
+
+    def __init__(self, terms: Dict[str, int]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]  # (term length, skill ID) ending at each state
+        for term, skill_id in terms.items():
+            state = 0
+            for ch in term:
+                state = self._goto[state].get(ch) or self._new_state(state, ch)
+            self._out[state].append((len(term), skill_id))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def _new_state(self, parent: int, ch: str) -> int:
+        state = len(self._goto)
+        self._goto.append({})
+        self._fail.append(0)
+        self._out.append([])
+        self._goto[parent][ch] = state
+        return state
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """(start, end, skill ID) of every term occurrence in `text`, in one pass"""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, skill_id in self._out[state]:
+                yield i + 1 - length, i + 1, skill_id
+
+
+class SkillDictionary:
+    """
+    Canonical skills with integer IDs.
+
+    A skill text that is exactly a catalog skill or alias gets that skill's
+    ID from ids(); any other text is interned under an ID of its own the
+    first time it is seen, so "PL/SQL" or "Oracle Fusion Financials" is not
+    met by "SQL" or "Oracle Fusion SCM", while identical free-text skills
+    still match each other. covered_ids() of a candidate's skill adds the
+    catalog skills it names as whole words, preferring the longest match
+    ("React Native" is not also "React", "Google Analytics" is not "Go"),
+    and the skills inside a certification ("AWS Solutions Architect" covers
+    "AWS"). A required skill is met when its ids() intersect the candidate's
+    covered_ids().
+    """
+
+    def __init__(self, catalogs: Iterable[str], aliases: Dict[str, str], certifications: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        terms: Dict[str, int] = {}
+        for name in catalogs:
+            terms[normalize_skill(name)] = self._intern(name)
+        self._certifications = set()
+        for name in certifications:
+            terms[normalize_skill(name)] = self._intern(name)
+            self._certifications.add(terms[normalize_skill(name)])
+        for alias, name in aliases.items():
+            terms[normalize_skill(alias)] = self._ids[normalize_skill(name)]
+        self._terms = terms
+        self._automaton = _Automaton(terms)
+        self._tagged: Dict[str, Tuple[FrozenSet[int], FrozenSet[int]]] = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _intern(self, name: str) -> int:
+        key = normalize_skill(name)
+        skill_id = self._ids.get(key)
+        if skill_id is None:
+            skill_id = self._ids[key] = len(self.names)
+            self.names.append(name)
+        return skill_id
+
+    def _tag(self, text) -> Tuple[FrozenSet[int], FrozenSet[int]]:
+        """(required, covered) skill IDs of one skill text"""
+        key = normalize_skill(text)
+        tagged = self._tagged.get(key)
+        if tagged is not None:
+            return tagged
+        matches = sorted(
+            (start, -end, skill_id) for start, end, skill_id in self._automaton.find(key)
+            if not _joins(key, start) and not _joins(key, end)
+        )
+        covered = set()
+        end, outer = 0, None
+        for start, neg_end, skill_id in matches:
+            if start >= end:
+                covered.add(skill_id)
+                end, outer = -neg_end, skill_id
+            elif outer in self._certifications:
+                covered.add(skill_id)
+        with self._lock:
+            if key in self._terms:
+                required = {self._terms[key]}
+            else:
+                required = {self._intern(key)} if key else set()
+            tagged = self._tagged[key] = (frozenset(required), frozenset(covered | required))
+        return tagged
+
+    def ids(self, text) -> FrozenSet[int]:
+        """ID a required skill `text` is matched by"""
+        return self._tag(text)[0]
+
+    def ids_of_all(self, texts: Iterable) -> FrozenSet[int]:
+        """Union of ids() over several skill names"""
+        found = set()
+        for text in texts:
+            found |= self._tag(text)[0]
+        return frozenset(found)
+
+    def covered_ids(self, texts: Iterable) -> FrozenSet[int]:
+        """IDs of every skill named in or contained in any of `texts` (a candidate's skills)"""
+        found = set()
+        for text in texts:
+            found |= self._tag(text)[1]
+        return frozenset(found)
+
+
+# Shared per-process dictionary used by the scorers and the search index
+skill_dictionary = SkillDictionary(
+    TECHNICAL_SKILLS_CATALOG + SOFT_SKILLS_CATALOG, SKILL_ALIASES, CERTIFICATIONS_CATALOG
+)
@@ -0,0 +1,58 @@
+"""
+NDJSON streaming for TalentGraph V2 list endpoints
+Clients that send `Accept: application/x-ndjson` get one JSON object per line,
+encoded as rows arrive from a server-side cursor instead of one big array
+"""
+
+import json
+import os
+from typing import Any, AsyncIterable, Iterable, Optional, Type, Union
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON = "application/x-ndjson"
+
+# Rows fetched from the cursor per round-trip while streaming
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+if STREAM_BATCH_SIZE < 1:
+    raise RuntimeError("STREAM_BATCH_SIZE must be at least 1")
+
+
+def wants_ndjson(request: Request) -> bool:
+    """True when the client asked for application/x-ndjson"""
+    return NDJSON in request.headers.get("accept", "")
+
+
+def streamed(query):
+    """`query` set up to read from a server-side cursor STREAM_BATCH_SIZE rows at a time"""
+    return query.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+
+
+def _line(item: Any, model: Optional[Type[BaseModel]]) -> str:
+    if model is not None:
+        # Same filtering and validation as the route's response_model
+        item = model.parse_obj(item.dict() if isinstance(item, BaseModel) else item)
+    # Encoded like JSONResponse, one object per line
+    return json.dumps(
+        jsonable_encoder(item), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ) + "\n"
+
+
+def ndjson_response(items: Union[Iterable, AsyncIterable], model: Optional[Type[BaseModel]] = None) -> StreamingResponse:
+    """
+    Stream `items` (a generator over a streamed() query, sync or async) as
+    NDJSON, validating each through `model` when given. The route's session
+    stays open until the last line is sent.
+    """
+    if hasattr(items, "__aiter__"):
+        async def lines():
+            async for item in items:
+                yield _line(item, model)
+    else:
+        def lines():
+            for item in items:
+                yield _line(item, model)
+    return StreamingResponse(lines(), media_type=NDJSON)
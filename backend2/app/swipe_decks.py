@@ -0,0 +1,256 @@
+"""
+Swipe decks for TalentGraph V2
+A ranked queue of the next unswiped cards per job profile and per job posting,
+so deck routes deal cards without scoring; a worker thread refills low decks
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.match_scores import (
+    POSTING, PROFILE, match_score_materializer, read_posting_page, read_profile_page,
+    score_posting_page, score_profile_page
+)
+from app.models import JobPosting, JobProfile, Swipe
+from app.pagination import Ranked
+
+logger = logging.getLogger(__name__)
+
+# Cards kept per deck, and the count below which a deck is refilled in the background
+SWIPE_DECK_SIZE = int(os.getenv("SWIPE_DECK_SIZE", "100"))
+SWIPE_DECK_LOW_WATERMARK = int(os.getenv("SWIPE_DECK_LOW_WATERMARK", "25"))
+if not 0 <= SWIPE_DECK_LOW_WATERMARK < SWIPE_DECK_SIZE:
+    raise RuntimeError("SWIPE_DECK_LOW_WATERMARK must be below SWIPE_DECK_SIZE")
+# Decks are rebuilt after this long so new and edited postings/profiles reach them
+SWIPE_DECK_MAX_AGE_SECONDS = float(os.getenv("SWIPE_DECK_MAX_AGE_SECONDS", "300"))
+# Least recently dealt decks are dropped beyond this many per process
+SWIPE_DECK_MAX_DECKS = int(os.getenv("SWIPE_DECK_MAX_DECKS", "10000"))
+
+DeckKey = Tuple[str, int]
+
+
+class Deck:
+    """
+    Cards of one deck in rank order. Profile decks are keyed by
+    job_posting_id, posting decks by candidate_id (best profile per
+    candidate), so a swipe removes its card in O(1).
+    """
+
+    def __init__(self, candidate_id: Optional[int], cards: "OrderedDict[int, Ranked]", exhausted: bool):
+        self.candidate_id = candidate_id  # owner of a profile deck
+        self.cards = cards
+        self.exhausted = exhausted  # every ranked card fitted, refilling early finds nothing new
+        self.filled_at = time.monotonic()
+
+    def needs_refill(self) -> bool:
+        if time.monotonic() - self.filled_at > SWIPE_DECK_MAX_AGE_SECONDS:
+            return True
+        return not self.exhausted and len(self.cards) < SWIPE_DECK_LOW_WATERMARK
+
+
+def _ranked_cards(session: Session, kind: str, deck_id: int) -> Optional[Tuple[Optional[int], List[Tuple[int, Ranked]], bool]]:
+    """
+    (owner candidate_id, [(card key, entry)], exhausted) for a deck, best
+    first, without the ones already swiped; None when the profile or posting
+    is gone
+    """
+    if kind == PROFILE:
+        job_profile = session.get(JobProfile, deck_id)
+        if job_profile is None:
+            return None
+        swiped = set(session.exec(
+            select(Swipe.job_posting_id)
+            .where(Swipe.candidate_id == job_profile.candidate_id, Swipe.action_by == "candidate")
+        ).all())
+        limit = SWIPE_DECK_SIZE + len(swiped)
+        if match_score_materializer.covers_profile(deck_id):
+            page, total = read_profile_page(session, deck_id, limit)
+        else:
+            page, total = score_profile_page(session, deck_id, limit, None)
+        cards = [(entry.key, entry) for entry in page.items if entry.key not in swiped]
+        owner = job_profile.candidate_id
+    else:
+        job_posting = session.get(JobPosting, deck_id)
+        if job_posting is None:
+            return None
+        swiped = set(session.exec(
+            select(Swipe.candidate_id)
+            .where(Swipe.job_posting_id == deck_id, Swipe.action_by == "recruiter")
+        ).all())
+        limit = SWIPE_DECK_SIZE + len(swiped)
+        if match_score_materializer.covers_posting(deck_id):
+            page, total = read_posting_page(session, deck_id, limit)
+        else:
+            page, total = score_posting_page(session, job_posting, limit, None)
+        cards = [(entry.group, entry) for entry in page.items if entry.group not in swiped]
+        owner = None
+    return owner, cards[:SWIPE_DECK_SIZE], total <= limit
+
+
+class SwipeDecks:
+    """
+    Per-process swipe decks.
+
+    Deck routes call next_cards() and fill() the deck on a miss; swipe
+    routes call swiped() after committing, which pops the card from every
+    deck holding it. Decks that run low or grow old are queued for a refill
+    on a worker thread with its own session. Swipes recorded while a deck is
+    being built are replayed onto it, and routes drop cards that another
+    worker's swipes made stale, so a dealt card is never one already swiped.
+    """
+
+    def __init__(self, bind=None):
+        self._bind = bind  # engine for the worker's sessions, app.database.engine by default
+        self._cond = threading.Condition()
+        self._decks: "OrderedDict[DeckKey, Deck]" = OrderedDict()
+        self._profile_decks: Dict[int, Set[int]] = {}  # candidate_id -> job_profile_ids with a deck
+        self._pending: Dict[DeckKey, None] = {}  # refills in request order
+        self._in_flight: List[Set[Tuple[str, int, int]]] = []  # swipes seen by each running fill()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="swipe-deck-refill", daemon=True)
+            self._thread.start()
+        logger.info("[SWIPE DECKS] Refill worker started")
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        logger.info("[SWIPE DECKS] Refill worker stopped")
+
+    # ---------- dealing ----------
+
+    def next_cards(self, kind: str, deck_id: int, n: int) -> Optional[Tuple[List[Ranked], int]]:
+        """
+        The top `n` cards and the deck size, or None when there is no usable
+        deck yet (fill() it first)
+        """
+        key = (kind, deck_id)
+        with self._cond:
+            deck = self._decks.get(key)
+            if deck is None:
+                return None
+            if deck.needs_refill():
+                if self._thread is None:
+                    self._discard(key)
+                    return None
+                self._request_refill(key)
+            self._decks.move_to_end(key)
+            return list(islice(deck.cards.values(), n)), len(deck.cards)
+
+    def fill(self, session: Session, kind: str, deck_id: int) -> bool:
+        """Build a deck in `session`; False (and no deck) when the profile or posting is gone"""
+        key = (kind, deck_id)
+        seen: Set[Tuple[str, int, int]] = set()
+        with self._cond:
+            self._in_flight.append(seen)
+        try:
+            ranked = _ranked_cards(session, kind, deck_id)
+        finally:
+            with self._cond:
+                self._in_flight.remove(seen)
+        with self._cond:
+            self._discard(key)
+            if ranked is None:
+                return False
+            owner, cards, exhausted = ranked
+            if kind == PROFILE:
+                replay = {job_posting_id for actor, candidate_id, job_posting_id in seen
+                          if actor == "candidate" and candidate_id == owner}
+                self._profile_decks.setdefault(owner, set()).add(deck_id)
+            else:
+                replay = {candidate_id for actor, candidate_id, job_posting_id in seen
+                          if actor == "recruiter" and job_posting_id == deck_id}
+            self._decks[key] = Deck(owner, OrderedDict(card for card in cards if card[0] not in replay), exhausted)
+            while len(self._decks) > SWIPE_DECK_MAX_DECKS:
+                self._discard(next(iter(self._decks)))
+        return True
+
+    # ---------- changes ----------
+
+    def swiped(self, candidate_id: int, job_posting_id: int, action_by: str):
+        """Pop a committed swipe's card from the candidate's or the posting's decks"""
+        with self._cond:
+            for seen in self._in_flight:
+                seen.add((action_by, candidate_id, job_posting_id))
+            if action_by == "candidate":
+                for job_profile_id in self._profile_decks.get(candidate_id, ()):
+                    self._remove((PROFILE, job_profile_id), job_posting_id)
+            else:
+                self._remove((POSTING, job_posting_id), candidate_id)
+
+    def remove(self, kind: str, deck_id: int, card_keys):
+        """Drop cards a route found stale (swiped on another worker, posting closed)"""
+        with self._cond:
+            for card_key in card_keys:
+                self._remove((kind, deck_id), card_key)
+
+    def posting_changed(self, job_posting_id: int):
+        """Rebuild the posting's own deck on next use; profile decks pick the change up on refill"""
+        with self._cond:
+            self._discard((POSTING, job_posting_id))
+
+    def profile_changed(self, job_profile_id: int):
+        with self._cond:
+            self._discard((PROFILE, job_profile_id))
+
+    def _remove(self, key: DeckKey, card_key: int):
+        deck = self._decks.get(key)
+        if deck is not None and deck.cards.pop(card_key, None) is not None and deck.needs_refill():
+            self._request_refill(key)
+
+    def _discard(self, key: DeckKey):
+        deck = self._decks.pop(key, None)
+        if deck is not None and key[0] == PROFILE:
+            profile_ids = self._profile_decks.get(deck.candidate_id, set())
+            profile_ids.discard(key[1])
+            if not profile_ids:
+                self._profile_decks.pop(deck.candidate_id, None)
+
+    def _request_refill(self, key: DeckKey):
+        if self._thread is not None and key not in self._pending:
+            self._pending[key] = None
+            self._cond.notify_all()
+
+    # ---------- worker ----------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or self._pending)
+                if self._stopping:
+                    return
+                key = next(iter(self._pending))
+                del self._pending[key]
+            try:
+                with Session(self._bind or engine) as session:
+                    self.fill(session, *key)
+            except SQLAlchemyError as e:
+                # The deck keeps its current cards; the next deal asks again
+                logger.error(f"[SWIPE DECKS] Failed to refill {key[0]} deck {key[1]}: {e}")
+            except Exception:
+                logger.exception(f"[SWIPE DECKS] Unexpected error refilling {key[0]} deck {key[1]}")
+
+
+# Shared per-process decks, started and stopped by the app lifespan
+swipe_decks = SwipeDecks()
@@ -0,0 +1,364 @@
+"""
+Swipe write path for TalentGraph V2
+Validates a swipe with one query and records it with its Match flag in one
+transaction; duplicate taps and retried requests (same Idempotency-Key) write
+nothing. record_swipe_batch does the same for a whole queue of swipes.
+"""
+
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, tuple_, update
+from sqlmodel import Session, select
+
+from app.database import dialect_insert
+from app.identity import Principal
+from app.models import Candidate, JobPosting, JobProfile, Match, Swipe
+from app.scoring import (
+    ProfileFeatures, load_profile_locations, load_profile_skills, match_score, posting_features, score_pair
+)
+
+# Match flag set by each (actor, action); passes only record the swipe
+MATCH_FLAGS = {
+    ("candidate", "like"): "candidate_liked",
+    ("candidate", "ask_to_apply"): "candidate_asked_to_apply",
+    ("recruiter", "like"): "company_liked",
+    ("recruiter", "ask_to_apply"): "company_asked_to_apply",
+}
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+SWIPE_BATCH_LIMIT = 500
+
+
+class SwipeTarget(NamedTuple):
+    """The candidate / company account / profile / posting a swipe is recorded against"""
+    candidate_id: int
+    company_id: int
+    job_profile_id: int
+    job_posting_id: int
+
+
+def candidate_target(session: Session, principal: Principal, job_profile_id: int, job_posting_id: int) -> SwipeTarget:
+    """Check the job profile is the candidate's and the posting exists, in one query"""
+    profile_owner, posting_company_id = session.execute(select(
+        select(JobProfile.candidate_id).where(JobProfile.id == job_profile_id).scalar_subquery(),
+        select(JobPosting.company_id).where(JobPosting.id == job_posting_id).scalar_subquery(),
+    )).one()
+    if profile_owner is None or profile_owner != principal.candidate_id:
+        raise HTTPException(status_code=404, detail="Job profile not found")
+    if posting_company_id is None:
+        raise HTTPException(status_code=404, detail="Job posting not found")
+    return SwipeTarget(principal.candidate_id, posting_company_id, job_profile_id, job_posting_id)
+
+
+def recruiter_target(session: Session, principal: Principal, candidate_id: int, job_profile_id: int,
+                     job_posting_id: int) -> SwipeTarget:
+    """Check the candidate exists and the posting is in the recruiter's scope, in one query"""
+    candidate_found, posting_company_id = session.execute(select(
+        select(Candidate.id).where(Candidate.id == candidate_id).scalar_subquery(),
+        select(JobPosting.company_id).where(JobPosting.id == job_posting_id).scalar_subquery(),
+    )).one()
+    if candidate_found is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    if posting_company_id is None or posting_company_id not in principal.company_ids:
+        raise HTTPException(status_code=404, detail="Job posting not found")
+    return SwipeTarget(candidate_id, principal.company_id, job_profile_id, job_posting_id)
+
+
+def _match_percentage(session: Session, job_posting_id: int, job_profile_id: int) -> int:
+    """Score for a new Match, 0 if the job profile no longer exists"""
+    job_posting = session.get(JobPosting, job_posting_id)
+    job_profile = session.get(JobProfile, job_profile_id)
+    return match_score(session, job_posting, job_profile)["score"] if job_profile else 0
+
+
+def _upsert_match(session: Session, target: SwipeTarget, flag: str, now: datetime):
+    """
+    Set `flag` on the Match for (candidate, posting, company), creating it if
+    needed. The insert is an ON CONFLICT upsert on uq_match_candidate_posting_company,
+    so concurrent swipes can't create duplicates. The match score is only
+    computed when no row exists yet.
+    """
+    updated = session.execute(
+        update(Match)
+        .where(Match.candidate_id == target.candidate_id)
+        .where(Match.job_posting_id == target.job_posting_id)
+        .where(Match.company_id == target.company_id)
+        .values({flag: True, "updated_at": now})
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if updated:
+        return
+    session.execute(
+        dialect_insert(session, Match)
+        .values(
+            **target._asdict(),
+            match_percentage=_match_percentage(session, target.job_posting_id, target.job_profile_id),
+            created_at=now,
+            updated_at=now,
+            **{flag: True},
+        )
+        .on_conflict_do_update(
+            index_elements=["candidate_id", "job_posting_id", "company_id"],
+            set_={flag: True, "updated_at": now},
+        )
+    )
+
+
+def record_swipe(session: Session, target: SwipeTarget, action: str, action_by: str,
+                 idempotency_key: Optional[str] = None) -> bool:
+    """
+    Insert the swipe and set its Match flag in the session's transaction.
+    Returns False without writing when this swipe already exists (a double
+    tap) or `idempotency_key` was already used for it; a key already used for
+    a different swipe is a 422. The caller commits.
+    """
+    now = datetime.utcnow()
+    inserted = session.execute(
+        dialect_insert(session, Swipe)
+        .values(**target._asdict(), action=action, action_by=action_by,
+                idempotency_key=idempotency_key, created_at=now)
+        .on_conflict_do_nothing()  # uq_swipe_candidate_posting_actor or the actor's idempotency key index
+    ).rowcount
+    if not inserted:
+        if idempotency_key is not None:
+            previous = session.exec(select(Swipe).where(
+                Swipe.idempotency_key == idempotency_key,
+                _key_scope(action_by, target.candidate_id, target.company_id),
+            )).first()
+            if previous is not None and (
+                SwipeTarget(previous.candidate_id, previous.company_id, previous.job_profile_id, previous.job_posting_id),
+                previous.action, previous.action_by,
+            ) != (target, action, action_by):
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different swipe")
+        return False
+
+    flag = MATCH_FLAGS.get((action_by, action))
+    if flag:
+        _upsert_match(session, target, flag, now)
+    return True
+
+
+# ============ BATCHES ============
+
+class BatchSwipe(NamedTuple):
+    """One queued swipe; candidate_id is only read for recruiter swipes"""
+    action: str
+    job_profile_id: int
+    job_posting_id: int
+    candidate_id: Optional[int] = None
+    idempotency_key: Optional[str] = None
+
+
+def _swipe_key(target: SwipeTarget, action_by: str, action: str) -> tuple:
+    # Columns of uq_swipe_candidate_posting_actor
+    return target.candidate_id, target.job_posting_id, target.company_id, action_by, action
+
+
+def _key_scope(action_by: str, candidate_id: Optional[int], company_id: Optional[int]):
+    """Swipes sharing the actor's idempotency keys: the candidate's, or those of the recruiter's company"""
+    actor = Swipe.candidate_id == candidate_id if action_by == "candidate" else Swipe.company_id == company_id
+    return and_(Swipe.action_by == action_by, actor)
+
+
+def _used_keys(session: Session, action_by: str, principal: Principal, idempotency_keys: set) -> Dict[str, tuple]:
+    """_swipe_key of the swipe each of the actor's idempotency keys was used for"""
+    if not idempotency_keys:
+        return {}
+    return {
+        row[0]: tuple(row[1:]) for row in session.execute(
+            select(Swipe.idempotency_key, Swipe.candidate_id, Swipe.job_posting_id, Swipe.company_id,
+                   Swipe.action_by, Swipe.action)
+            .where(Swipe.idempotency_key.in_(idempotency_keys))
+            .where(_key_scope(action_by, principal.candidate_id, principal.company_id))
+        ).all()
+    }
+
+
+def _insert_swipes(session: Session, rows: List[dict]) -> set:
+    """
+    Insert swipe rows, skipping conflicts, and return the _swipe_key of each
+    row actually written: one multi-row INSERT ... RETURNING on PostgreSQL,
+    row by row elsewhere (SQLAlchemy 1.4 has no RETURNING for SQLite)
+    """
+    insert = dialect_insert(session, Swipe)
+    if session.get_bind().dialect.name == "postgresql":
+        return set(session.execute(
+            insert.values(rows).on_conflict_do_nothing()
+            .returning(Swipe.candidate_id, Swipe.job_posting_id, Swipe.company_id, Swipe.action_by, Swipe.action)
+        ).all())
+    return {
+        (row["candidate_id"], row["job_posting_id"], row["company_id"], row["action_by"], row["action"])
+        for row in rows if session.execute(insert.values(row).on_conflict_do_nothing()).rowcount
+    }
+
+
+def _batch_targets(session: Session, principal: Principal, swipes: List[BatchSwipe]) -> List[object]:
+    """
+    SwipeTarget per swipe, or the 404 detail for swipes the caller may not
+    make, checked against ownership sets loaded in two queries
+    """
+    posting_ids = {swipe.job_posting_id for swipe in swipes}
+    posting_companies = dict(session.execute(
+        select(JobPosting.id, JobPosting.company_id).where(JobPosting.id.in_(posting_ids))
+    ).all())
+    targets = []
+    if principal.is_candidate:
+        own_profiles = set(session.exec(select(JobProfile.id).where(
+            JobProfile.candidate_id == principal.candidate_id,
+            JobProfile.id.in_({swipe.job_profile_id for swipe in swipes}),
+        )).all())
+        for swipe in swipes:
+            if swipe.job_profile_id not in own_profiles:
+                targets.append("Job profile not found")
+            elif swipe.job_posting_id not in posting_companies:
+                targets.append("Job posting not found")
+            else:
+                targets.append(SwipeTarget(principal.candidate_id, posting_companies[swipe.job_posting_id],
+                                           swipe.job_profile_id, swipe.job_posting_id))
+        return targets
+
+    candidates = set(session.exec(select(Candidate.id).where(
+        Candidate.id.in_({swipe.candidate_id for swipe in swipes if swipe.candidate_id is not None})
+    )).all())
+    for swipe in swipes:
+        if swipe.candidate_id not in candidates:
+            targets.append("Candidate not found")
+        elif posting_companies.get(swipe.job_posting_id) not in principal.company_ids:
+            targets.append("Job posting not found")
+        else:
+            targets.append(SwipeTarget(swipe.candidate_id, principal.company_id,
+                                       swipe.job_profile_id, swipe.job_posting_id))
+    return targets
+
+
+def _match_percentages(session: Session, pairs: List[Tuple[int, int]]) -> Dict[Tuple[int, int], int]:
+    """Scores for new Matches keyed by (job_posting_id, job_profile_id), 0 for deleted profiles"""
+    posting_ids = {posting_id for posting_id, _ in pairs}
+    profile_ids = list({profile_id for _, profile_id in pairs})
+    postings = {p.id: p for p in session.exec(select(JobPosting).where(JobPosting.id.in_(posting_ids))).all()}
+    profiles = {p.id: p for p in session.exec(select(JobProfile).where(JobProfile.id.in_(profile_ids))).all()}
+    skills = load_profile_skills(session, profile_ids)
+    locations = load_profile_locations(session, profile_ids)
+    scores = {}
+    for posting_id, profile_id in pairs:
+        profile = profiles.get(profile_id)
+        scores[posting_id, profile_id] = score_pair(
+            posting_features(postings[posting_id]),
+            ProfileFeatures.from_profile(profile, skills.get(profile_id, []), locations.get(profile_id, [])),
+        )["score"] if profile else 0
+    return scores
+
+
+def _upsert_matches(session: Session, flagged: Dict[tuple, Tuple[SwipeTarget, set]], now: datetime):
+    """
+    Batch form of _upsert_match: one UPDATE per flag for existing Matches,
+    then one multi-row upsert for the new ones
+    """
+    triples = list(flagged)
+    existing = set(session.execute(
+        select(Match.candidate_id, Match.job_posting_id, Match.company_id)
+        .where(tuple_(Match.candidate_id, Match.job_posting_id, Match.company_id).in_(triples))
+    ).all())
+    for flag in MATCH_FLAGS.values():
+        to_update = [triple for triple in triples if triple in existing and flag in flagged[triple][1]]
+        if to_update:
+            session.execute(
+                update(Match)
+                .where(tuple_(Match.candidate_id, Match.job_posting_id, Match.company_id).in_(to_update))
+                .values({flag: True, "updated_at": now})
+                .execution_options(synchronize_session=False)
+            )
+
+    new = [flagged[triple] for triple in triples if triple not in existing]
+    if not new:
+        return
+    scores = _match_percentages(session, [(target.job_posting_id, target.job_profile_id) for target, _ in new])
+    insert = dialect_insert(session, Match)
+    session.execute(
+        insert.values([
+            {
+                **target._asdict(),
+                "match_percentage": scores[target.job_posting_id, target.job_profile_id],
+                "created_at": now,
+                "updated_at": now,
+                **{flag: flag in flags for flag in MATCH_FLAGS.values()},
+            }
+            for target, flags in new
+        ]).on_conflict_do_update(
+            # A concurrent swipe created it meanwhile: keep its flags and add ours
+            index_elements=["candidate_id", "job_posting_id", "company_id"],
+            set_={
+                **{flag: Match.__table__.c[flag] | insert.excluded[flag] for flag in MATCH_FLAGS.values()},
+                "updated_at": now,
+            },
+        )
+    )
+
+
+def record_swipe_batch(session: Session, principal: Principal, swipes: List[BatchSwipe]) -> List[dict]:
+    """
+    Record a queue of swipes, in order, in the session's transaction: one
+    multi-row swipe insert plus batched Match upserts for the rows it wrote.
+    Returns one result per swipe with status "created", "duplicate" (already
+    recorded, by an earlier swipe in the batch or a concurrent request),
+    "not_found" or "conflict" (Idempotency-Key reused for a different swipe).
+    The caller commits.
+    """
+    action_by = "candidate" if principal.is_candidate else "recruiter"
+    targets = _batch_targets(session, principal, swipes)
+    valid = [(swipe, target) for swipe, target in zip(swipes, targets) if isinstance(target, SwipeTarget)]
+
+    # Swipes and keys recorded before, in two lookups
+    keys = [_swipe_key(target, action_by, swipe.action) for swipe, target in valid]
+    recorded = set(session.execute(
+        select(Swipe.candidate_id, Swipe.job_posting_id, Swipe.company_id, Swipe.action_by, Swipe.action)
+        .where(tuple_(Swipe.candidate_id, Swipe.job_posting_id, Swipe.company_id, Swipe.action_by, Swipe.action)
+               .in_(keys))
+    ).all()) if keys else set()
+    used_keys = _used_keys(session, action_by, principal,
+                           {swipe.idempotency_key for swipe, _ in valid if swipe.idempotency_key is not None})
+
+    now = datetime.utcnow()
+    results, rows, pending = [], [], []
+    for index, (swipe, target) in enumerate(zip(swipes, targets)):
+        if not isinstance(target, SwipeTarget):
+            results.append({"index": index, "status": "not_found", "detail": target})
+            continue
+        key = _swipe_key(target, action_by, swipe.action)
+        if swipe.idempotency_key is not None and used_keys.get(swipe.idempotency_key, key) != key:
+            results.append({"index": index, "status": "conflict",
+                            "detail": "Idempotency-Key was already used for a different swipe"})
+            continue
+        if key in recorded:
+            results.append({"index": index, "status": "duplicate"})
+            continue
+        recorded.add(key)
+        if swipe.idempotency_key is not None:
+            used_keys[swipe.idempotency_key] = key
+        rows.append({**target._asdict(), "action": swipe.action, "action_by": action_by,
+                     "idempotency_key": swipe.idempotency_key, "created_at": now})
+        results.append({"index": index, "status": "created"})
+        pending.append((results[-1], swipe, target, key))
+
+    written = _insert_swipes(session, rows) if rows else set()
+    # Rows the insert skipped: recorded by a concurrent request since the lookups
+    taken_keys = _used_keys(session, action_by, principal, {
+        swipe.idempotency_key for _, swipe, _, key in pending
+        if key not in written and swipe.idempotency_key is not None
+    })
+    flagged: Dict[tuple, Tuple[SwipeTarget, set]] = {}
+    for result, swipe, target, key in pending:
+        if key not in written:
+            if swipe.idempotency_key is not None and taken_keys.get(swipe.idempotency_key, key) != key:
+                result.update(status="conflict", detail="Idempotency-Key was already used for a different swipe")
+            else:
+                result["status"] = "duplicate"
+            continue
+        flag = MATCH_FLAGS.get((action_by, swipe.action))
+        if flag:
+            triple = (target.candidate_id, target.job_posting_id, target.company_id)
+            flagged.setdefault(triple, (target, set()))[1].add(flag)
+    if flagged:
+        _upsert_matches(session, flagged, now)
+    return results
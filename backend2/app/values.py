@@ -0,0 +1,13 @@
+"""
+Value helpers for TalentGraph V2
+Shared by the models' write-time hooks, the scorers and the route serializers
+"""
+
+
+def enum_value(value):
+    """
+    The .value of an enum member, other values unchanged. Enum-typed columns
+    are VARCHAR, so rows loaded from the database hold plain str while rows
+    built in Python hold the member.
+    """
+    return value.value if hasattr(value, "value") else value
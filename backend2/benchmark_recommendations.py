@@ -0,0 +1,179 @@
+"""
+Query-count benchmark for GET /recommendations/dashboard.
+Builds throwaway SQLite databases of increasing size, calls the async
+route directly and asserts that it issues the same number of SQL statements
+regardless of how many job profiles exist, both when scoring live and when
+reading materialized MatchScore rows.
+
+Usage: python benchmark_recommendations.py [--sizes 200 2000 10000] [--postings 30]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import (
+    User, Candidate, Company, JobPosting, JobProfile, Skill, LocationPreference, Match,
+    UserRole, WorkType, EmploymentType, CurrencyType, VisaStatus
+)
+from app import database, match_scores
+from app.identity import load_principal
+from app.organizations import assign_organization
+from app.match_scores import MatchScoreMaterializer
+from app.routers import recommendations
+from app.scoring import ProfileMatrix
+from app.search_index import PostingIndex, ProfileIndex
+
+VENDORS = ["Oracle", "SAP", "Salesforce", "Workday", "ServiceNow"]
+TYPES = ["ERP", "HCM", "CRM", "SCM"]
+ROLES = ["Developer", "Consultant", "Architect", "Analyst"]
+SKILLS = ["Python", "Java", "SQL", "AWS", "React", "SAP ABAP", "Oracle ERP", "Kubernetes", "Tableau"]
+CITIES = [("Austin", "TX"), ("Seattle", "WA"), ("Chicago", "IL"), ("Boston", "MA"), ("Denver", "CO")]
+
+
+def build_database(path: str, n_profiles: int, n_postings: int):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(n_profiles)
+    with Session(engine) as session:
+        recruiter = User(email="recruiter@bench.local", full_name="Recruiter", password_hash="x", role=UserRole.RECRUITER)
+        session.add(recruiter)
+        session.commit()
+        company = Company(user_id=recruiter.id, company_name="Bench Co", company_email=recruiter.email, employee_type="ADMIN")
+        session.add(company)
+        assign_organization(session, company)
+
+        n_candidates = max(1, n_profiles // 2)
+        users = [User(email=f"c{i}@bench.local", full_name=f"C{i}", password_hash="x") for i in range(n_candidates)]
+        session.add_all(users)
+        session.commit()
+        candidates = [
+            Candidate(user_id=u.id, name=u.full_name, email=u.email, phone="0", residential_address="-",
+                      location_state="TX", location_county="-", location_zipcode="0")
+            for u in users
+        ]
+        session.add_all(candidates)
+        session.commit()
+
+        profiles = [
+            JobProfile(
+                candidate_id=rng.choice(candidates).id, profile_name=f"P{i}",
+                product_vendor=rng.choice(VENDORS), product_type=rng.choice(TYPES), job_role=rng.choice(ROLES),
+                years_of_experience=rng.randint(0, 15), worktype=rng.choice(list(WorkType)),
+                employment_type=EmploymentType.FT, salary_min=rng.choice([60000, 90000, 120000]),
+                salary_max=rng.choice([100000, 140000, 180000]), salary_currency=CurrencyType.USD,
+                visa_status=VisaStatus.US_CITIZEN,
+            )
+            for i in range(n_profiles)
+        ]
+        session.add_all(profiles)
+        session.commit()
+        for profile in profiles:
+            session.add_all(
+                Skill(job_profile_id=profile.id, skill_name=name, skill_category="technical")
+                for name in rng.sample(SKILLS, 3)
+            )
+            city, state = rng.choice(CITIES)
+            session.add(LocationPreference(job_profile_id=profile.id, city=city, state=state))
+
+        postings = [
+            JobPosting(
+                company_id=company.id, job_title=f"Job {i}", product_vendor=rng.choice(VENDORS),
+                product_type=rng.choice(TYPES), job_role=rng.choice(ROLES), seniority_level="3-5",
+                worktype=rng.choice(list(WorkType)), location=", ".join(rng.choice(CITIES)),
+                employment_type=EmploymentType.FT, start_date="2025-01-01", salary_min=80000,
+                salary_max=150000, salary_currency=CurrencyType.USD, job_description="-",
+                required_skills=str(rng.sample(SKILLS, 3)).replace("'", '"'),
+            )
+            for i in range(n_postings)
+        ]
+        session.add_all(postings)
+        session.commit()
+        for posting in postings[: n_postings // 2]:
+            profile = rng.choice(profiles)
+            session.add(Match(candidate_id=profile.candidate_id, company_id=company.id, job_profile_id=profile.id,
+                              job_posting_id=posting.id, company_liked=True))
+        session.commit()
+    return engine
+
+
+def run(path: str, n_profiles: int, n_postings: int, materialized: bool):
+    engine = build_database(path, n_profiles, n_postings)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    statements = []
+    for counted in (engine, async_engine.sync_engine):
+        event.listen(counted, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    # Live scoring runs in the threadpool on app.database.engine
+    database.engine = engine
+
+    # Fresh per-process caches for this database
+    recommendations.profile_matrix = match_scores.profile_matrix = ProfileMatrix()
+    recommendations.profile_index = match_scores.profile_index = ProfileIndex()
+    match_scores.posting_index = PostingIndex()
+    materializer = recommendations.match_score_materializer = MatchScoreMaterializer(bind=engine)
+    if materialized:
+        with Session(engine) as session:
+            materializer.rebuild(session)
+        materializer.start()
+
+    with Session(engine) as session:
+        # Identity comes from the principal cache in the app, so resolve it outside the count
+        user = session.exec(select(User).where(User.email == "recruiter@bench.local")).one()
+        principal = load_principal(session, user.id)
+
+    async def dashboard():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return await recommendations.get_recommendations_dashboard(principal=principal, session=session)
+
+    async def measure():
+        await dashboard()  # warm caches
+        statements.clear()
+        started = time.perf_counter()
+        payload = await dashboard()
+        return time.perf_counter() - started, payload
+
+    elapsed, payload = asyncio.run(measure())
+    asyncio.run(async_engine.dispose())
+    materializer.stop()
+    engine.dispose()
+    return len(statements), elapsed, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2000, 10000])
+    parser.add_argument("--postings", type=int, default=30)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_recommendations_")
+    try:
+        for materialized in (False, True):
+            mode = "materialized" if materialized else "live"
+            counts = {}
+            for size in args.sizes:
+                path = os.path.join(workdir, f"{mode}_{size}.db")
+                queries, elapsed, payload = run(path, size, args.postings, materialized)
+                counts[size] = queries
+                shown = sum(len(job["top_candidates"]) for job in payload["jobs"])
+                print(f"[BENCH] mode={mode} profiles={size:>6} postings={args.postings} queries={queries} "
+                      f"time={elapsed * 1000:.1f}ms top_candidates={shown}")
+
+            assert len(set(counts.values())) == 1, f"{mode} query count depends on data size: {counts}"
+            print(f"[OK] {mode}: {next(iter(counts.values()))} queries per request at every size")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
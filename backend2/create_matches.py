@@ -4,13 +4,13 @@ from sqlmodel import Session, select
 from app.models import Match, Swipe, Company, JobPosting, Candidate, JobProfile
 
 with Session(engine) as s:
-    # Get all companies grouped by company_name
-    all_companies = s.exec(select(Company)).all()
-    company_groups = {}
+    # Get all companies grouped by organization
+    all_companies = s.exec(select(Company).order_by(Company.id)).all()
+    org_groups = {}
     for c in all_companies:
-        if c.company_name not in company_groups:
-            company_groups[c.company_name] = []
-        company_groups[c.company_name].append(c)
+        key = c.org_id if c.org_id is not None else c.company_name  # unlinked rows fall back to the name
+        org_groups.setdefault(key, []).append(c)
+    company_groups = {comps[0].company_name: comps for comps in org_groups.values()}
 
     # Get all candidates with their job profiles
     candidates = s.exec(select(Candidate)).all()
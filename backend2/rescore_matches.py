@@ -0,0 +1,142 @@
+"""
+Full MatchScore rescoring, for nightly runs and after the scoring weights change.
+Loads every job profile once into the ProfileMatrix, forks a process pool
+that shares its arrays read-only, and has each worker rescore one shard of
+job postings (an ID range) against all profiles, replacing the shard's rows
+in one transaction written with COPY. Finished shards are recorded in a
+checkpoint file, so an interrupted run picks up where it stopped with --resume.
+
+Run it with the same MATCH_SCORING_WEIGHTS and MATCH_THRESHOLD as the app.
+
+Usage: python rescore_matches.py [--workers 8] [--shard-size 200] [--checkpoint PATH] [--resume]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import and_, delete, func
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.match_scores import posting_score_rows, write_scores
+from app.models import JobPosting, JobProfile, MatchScore
+from app.scoring import MATCH_THRESHOLD, WEIGHTS, profile_matrix
+
+DEFAULT_CHECKPOINT = "rescore_checkpoint.json"
+
+
+def _in_shard(column, shard: List[Optional[int]]):
+    first_id, last_id = shard
+    return column >= first_id if last_id is None else and_(column >= first_id, column <= last_id)
+
+
+def plan_shards(session: Session, shard_size: int) -> List[List[Optional[int]]]:
+    """[first, last] posting ID ranges of shard_size postings; the last one is open-ended"""
+    ids = session.exec(select(JobPosting.id).order_by(JobPosting.id)).all()
+    starts = ids[::shard_size] or [0]
+    shards = [[start, next_start - 1] for start, next_start in zip(starts, starts[1:])]
+    shards.append([starts[-1], None])
+    return shards
+
+
+def _init_worker():
+    # Forked workers must not share the parent's pooled connections
+    engine.dispose(close=False)
+
+
+def rescore_shard(shard: List[Optional[int]]) -> Tuple[int, int]:
+    """Replace the MatchScore rows of one shard of postings; returns (pairs scored, rows written)"""
+    with Session(engine) as session:
+        postings = session.exec(select(JobPosting).where(_in_shard(JobPosting.id, shard))).all()
+        pairs, rows = 0, []
+        for job_posting in postings:
+            scored = profile_matrix.score(job_posting)
+            pairs += len(scored)
+            rows += posting_score_rows(job_posting.id, scored)
+        session.exec(delete(MatchScore).where(_in_shard(MatchScore.job_posting_id, shard)))
+        write_scores(session, rows)
+        session.commit()
+    return pairs, len(rows)
+
+
+def _settings() -> dict:
+    return {"weights": WEIGHTS.dict(), "threshold": MATCH_THRESHOLD}
+
+
+def save_checkpoint(path: str, state: dict):
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=200, help="job postings per shard")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--resume", action="store_true", help="skip the shards the checkpoint records as done")
+    args = parser.parse_args()
+    if args.workers < 1 or args.shard_size < 1:
+        parser.error("--workers and --shard-size must be positive")
+
+    with Session(engine) as session:
+        state = None
+        if args.resume and os.path.exists(args.checkpoint):
+            with open(args.checkpoint) as f:
+                state = json.load(f)
+            if state["settings"] != _settings():
+                parser.error("the checkpoint was written with other scoring settings; rerun without --resume")
+        if state is None:
+            state = {"settings": _settings(), "shards": plan_shards(session, args.shard_size), "done": []}
+            save_checkpoint(args.checkpoint, state)
+        profile_count = session.exec(select(func.count(JobProfile.id))).one()
+        profile_matrix.sync(session)
+    # Built before forking so every worker reads the same pages
+    profile_matrix.warm()
+
+    done = set(state["done"])
+    pending = [i for i in range(len(state["shards"])) if i not in done]
+    print(f"[RESCORE] {profile_count} profiles, {len(pending)} of {len(state['shards'])} posting shards to score "
+          f"on {args.workers} workers")
+
+    started = time.monotonic()
+    pairs = rows = 0
+    failed = []
+    with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("fork"),
+                             initializer=_init_worker) as pool:
+        futures = {pool.submit(rescore_shard, state["shards"][i]): i for i in pending}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                shard_pairs, shard_rows = future.result()
+            except Exception as e:
+                # Left out of the checkpoint, so --resume retries it
+                failed.append(i)
+                print(f"[RESCORE] Shard {i} {state['shards'][i]} failed: {e}")
+                continue
+            pairs += shard_pairs
+            rows += shard_rows
+            state["done"].append(i)
+            save_checkpoint(args.checkpoint, state)
+            elapsed = time.monotonic() - started
+            print(f"[RESCORE] {len(state['done'])}/{len(state['shards'])} shards, {pairs} pairs, {rows} rows, "
+                  f"{pairs / max(elapsed, 1e-9):,.0f} pairs/s")
+
+    elapsed = time.monotonic() - started
+    if failed:
+        print(f"[RESCORE] {len(failed)} shards failed; rerun with --resume to retry them")
+        return 1
+    os.remove(args.checkpoint)
+    print(f"[OK] Rescored {pairs} pairs into {rows} rows in {elapsed:.1f}s ({pairs / max(elapsed, 1e-9):,.0f} pairs/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
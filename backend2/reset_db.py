@@ -5,10 +5,12 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 from sqlmodel import SQLModel
 from app.database import engine
+from app.migrations import schema_version, upgrade
 from app.models import *
 
 print("Dropping all tables...")
 SQLModel.metadata.drop_all(engine)
+schema_version.drop(engine, checkfirst=True)
 print("Recreating all tables...")
-SQLModel.metadata.create_all(engine)
+upgrade(engine)
 print("✅ Database reset complete!")
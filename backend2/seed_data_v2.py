@@ -33,6 +33,7 @@ from app.models import (
     WorkType, EmploymentType, VisaStatus, CurrencyType
 )
 from app.security import hash_password
+from app.organizations import assign_organization
 
 
 # Universal password for all seed accounts
@@ -609,6 +610,7 @@ def create_companies_and_users(session: Session):
                 employee_type=user_data["role"].value.upper()
             )
             session.add(company)
+            assign_organization(session, company)
             session.flush()
             
             if idx == 0:
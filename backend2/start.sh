@@ -1 +1 @@
-uvicorn app.main:app --host 0.0.0.0 --port $PORT
\ No newline at end of file
+python -m app.migrations upgrade && uvicorn app.main:app --host 0.0.0.0 --port $PORT
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Shared test fixtures for TalentGraph V2
+Tests run against a throwaway SQLite database, created fresh per test module
+"""
+
+import os
+import sys
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="talentgraph-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ.setdefault("APP_JWT_SECRET", "talentgraph-test-secret-0123456789abcdef")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session
+
+from app.database import engine
+from app.identity import principal_cache
+from app.models import (
+    Candidate, Company, CurrencyType, EmploymentType, JobPosting, JobProfile, User, UserRole, VisaStatus, WorkType,
+)
+from app.security import create_access_token
+from app.values import enum_value
+
+
+@pytest.fixture(scope="module")
+def db():
+    """Empty schema for the module's tests"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    principal_cache.clear()
+    yield engine
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def session(db):
+    with Session(db) as session:
+        yield session
+
+
+@pytest.fixture(scope="module")
+def client(db):
+    from app.main import app
+    return TestClient(app)
+
+
+def auth_headers(user) -> dict:
+    """Bearer token for a stored User"""
+    token = create_access_token({
+        "sub": user.email, "email": user.email, "user_id": user.id, "role": enum_value(user.role),
+    })
+    return {"Authorization": f"Bearer {token}"}
+
+
+# ---------- stored rows ----------
+# Builders commit what they add; tests pass only the fields they care about
+
+def make_candidate(session: Session, email: str):
+    """(User, Candidate) for a new candidate account"""
+    user = User(email=email, full_name="Cand", password_hash="x", role=UserRole.CANDIDATE)
+    session.add(user)
+    session.commit()
+    candidate = Candidate(
+        user_id=user.id, name="Cand", email=email, phone="1", residential_address="1 Main St",
+        location_state="TX", location_county="Travis", location_zipcode="78701",
+    )
+    session.add(candidate)
+    session.commit()
+    return user, candidate
+
+
+def make_candidate_profile(session: Session, email: str, **fields):
+    """(User, JobProfile) for a new candidate with one SAP developer profile"""
+    user, candidate = make_candidate(session, email)
+    profile = JobProfile(**{
+        "candidate_id": candidate.id, "profile_name": "SAP dev", "product_vendor": "SAP", "product_type": "ERP",
+        "job_role": "Developer", "years_of_experience": 6, "worktype": WorkType.REMOTE,
+        "employment_type": EmploymentType.FT, "salary_min": 100000, "salary_max": 140000,
+        "salary_currency": CurrencyType.USD, "visa_status": VisaStatus.US_CITIZEN, **fields,
+    })
+    session.add(profile)
+    session.commit()
+    return user, profile
+
+
+def make_company(session: Session, email: str, role: UserRole = UserRole.RECRUITER, **fields):
+    """(User, Company) for a new company account"""
+    user = User(email=email, full_name="Rec", password_hash="x", role=role)
+    session.add(user)
+    session.commit()
+    company = Company(**{
+        "user_id": user.id, "company_name": "Acme", "company_email": email, "employee_type": "ADMIN", **fields,
+    })
+    session.add(company)
+    session.commit()
+    return user, company
+
+
+def make_job_posting(session: Session, company_id: int, **fields) -> JobPosting:
+    """An SAP developer posting of an existing company"""
+    posting = JobPosting(**{
+        "company_id": company_id, "job_title": "SAP Developer", "product_vendor": "SAP", "product_type": "ERP",
+        "job_role": "Developer", "seniority_level": "3-5", "worktype": WorkType.REMOTE, "location": "Remote",
+        "employment_type": EmploymentType.FT, "start_date": "2024-01-01", "salary_min": 110000,
+        "salary_max": 150000, "salary_currency": CurrencyType.USD, "job_description": "Build SAP things",
+        "required_skills": "[]", **fields,
+    })
+    session.add(posting)
+    session.commit()
+    return posting
+
+
+def make_company_posting(session: Session, email: str, **fields):
+    """(User, JobPosting) for a new company with one SAP developer posting"""
+    user, company = make_company(session, email)
+    return user, make_job_posting(session, company.id, **fields)
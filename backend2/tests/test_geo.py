@@ -0,0 +1,26 @@
+"""Location resolution of preferences and posting locations"""
+
+import pytest
+
+from app.geo import resolve, resolve_location
+
+
+@pytest.mark.parametrize("city, state, region", [
+    ("D.C.", None, "US-DC"),
+    ("Washington", "D.C.", "US-DC"),
+    (None, "D.C.", "US-DC"),
+    ("NYC", None, "US-NY"),
+    ("München", None, "DE"),
+    ("Portland", "ME", "US-ME"),
+])
+def test_resolve(city, state, region):
+    assert resolve(city, state).region == region
+
+
+@pytest.mark.parametrize("city", ["Remote", "Any Location", "anywhere"])
+def test_remote_preferences(city):
+    assert resolve(city).remote
+
+
+def test_posting_location_skips_remote_markers():
+    assert resolve_location("Any location / Washington, D.C.").region == "US-DC"
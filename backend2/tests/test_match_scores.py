@@ -0,0 +1,63 @@
+"""MatchScoreMaterializer recomputes and writes"""
+
+import json
+
+import pytest
+
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, select
+
+from conftest import make_candidate_profile, make_company_posting, make_job_posting
+from app.match_scores import MatchScoreMaterializer, score_posting_page
+from app.models import JobPosting, JobProfile, MatchScore, WorkType
+
+
+@pytest.fixture(scope="module")
+def stored(db):
+    """One profile and two postings that match it"""
+    with Session(db) as session:
+        make_candidate_profile(session, "ms-cand@example.com", worktype=WorkType.ONSITE)
+        _, posting = make_company_posting(
+            session, "ms-rec@example.com", worktype=WorkType.ONSITE, location="Austin, TX"
+        )
+        make_job_posting(session, posting.company_id, job_title="SAP Lead", worktype=WorkType.ONSITE,
+                         location="Austin, TX")
+
+def test_started_worker_only_recomputes_changed_postings(stored, session):
+    profile_id = session.exec(select(JobProfile.id)).first()
+    changed, untouched = session.exec(select(JobPosting.id)).all()
+    materializer = MatchScoreMaterializer(bind=session.get_bind())
+    materializer.start()
+    try:
+        assert materializer.covers_profile(profile_id)  # stored rows are current without a rebuild
+        materializer.posting_changed(changed)
+        assert materializer.drain(10)
+        assert materializer.covers_profile(profile_id)
+    finally:
+        materializer.stop()
+    session.expire_all()
+    assert session.exec(select(MatchScore.job_posting_id)).all() == [changed]
+
+
+def test_write_upserts_rows_another_worker_already_wrote(stored, session):
+    posting_id = session.exec(select(JobPosting.id)).first()
+    profile_id, candidate_id = session.exec(select(JobProfile.id, JobProfile.candidate_id)).first()
+    row = {"job_posting_id": posting_id, "job_profile_id": profile_id, "candidate_id": candidate_id,
+           "score": 99, "details": json.dumps({})}
+    MatchScoreMaterializer._write(session, [row])
+    MatchScoreMaterializer._write(session, [dict(row, score=98)])
+    scores = session.exec(
+        select(MatchScore.score).where(MatchScore.job_posting_id == posting_id, MatchScore.job_profile_id == profile_id)
+    ).all()
+    assert scores == [98]
+
+
+def test_live_scoring_syncs_mirrors_from_the_primary(stored, session, tmp_path):
+    job_posting = session.exec(select(JobPosting)).first()
+    # A replica that has not replayed any of the stored rows yet
+    lagging = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    SQLModel.metadata.create_all(lagging)
+    with Session(lagging) as replica_session:
+        page, total = score_posting_page(replica_session, job_posting, None, None)
+    assert total == 1
+    assert [entry.key for entry in page.items] == session.exec(select(JobProfile.id)).all()
@@ -0,0 +1,37 @@
+"""Top-K pages and keyset cursors"""
+
+from app.pagination import DEFAULT_PAGE_SIZE, Ranked, keyset_page, page_limit, top_k_page
+
+ENTRIES = [Ranked(score, key, group=key % 7) for key, score in enumerate(range(100, 0, -1))]
+
+
+def _fetch(after, n):
+    ranked = sorted(ENTRIES, key=lambda e: (-e.score, e.key))
+    if after is not None:
+        ranked = [e for e in ranked if (-e.score, e.key) > (-after[0], after[1])]
+    return ranked[:n]
+
+
+def _groups_before(position):
+    return {e.group for e in ENTRIES if (-e.score, e.key) <= (-position[0], position[1])}
+
+
+def test_page_limit():
+    assert page_limit(None, None) is None
+    assert page_limit(None, "cursor") == DEFAULT_PAGE_SIZE
+    assert page_limit(10, None) == 10
+
+
+def test_unpaged_returns_every_group():
+    for page in (top_k_page(ENTRIES, None), keyset_page(_fetch, None)):
+        assert [e.key for e in page.items] == list(range(7))
+        assert page.next_cursor is None
+
+
+def test_pages_follow_the_cursor():
+    for read in (lambda limit, cursor: top_k_page(ENTRIES, limit, cursor),
+                 lambda limit, cursor: keyset_page(_fetch, limit, cursor, _groups_before)):
+        first = read(4, None)
+        rest = read(4, first.next_cursor)
+        assert [e.key for e in first.items + rest.items] == list(range(7))
+        assert rest.next_cursor is None
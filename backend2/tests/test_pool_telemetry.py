@@ -0,0 +1,21 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.pool_telemetry import LivenessMonitor, PoolTelemetry
+
+
+def test_liveness_monitor_checks_every_engine_it_is_given(tmp_path):
+    primary, replica, async_replica = PoolTelemetry("sync"), PoolTelemetry("replica"), PoolTelemetry("async-replica")
+    monitor = LivenessMonitor(30, [
+        (create_engine(f"sqlite:///{tmp_path / 'primary.db'}"), primary),
+        (create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"), replica),
+        (create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"), async_replica),
+    ])
+
+    asyncio.run(monitor.check())
+
+    assert (primary.liveness_checks, primary.liveness_failures) == (1, 0)
+    assert (replica.liveness_checks, replica.liveness_failures) == (1, 1)
+    assert (async_replica.liveness_checks, async_replica.liveness_failures) == (1, 0)
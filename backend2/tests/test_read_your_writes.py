@@ -0,0 +1,60 @@
+"""Writes pin their user's reads to the primary"""
+
+import pytest
+
+from conftest import auth_headers, make_candidate, make_company
+from app.database import primary_pins
+from app.models import UserRole
+
+JOB_PROFILE = {
+    "profile_name": "SAP dev", "product_vendor": "SAP", "product_type": "ERP", "job_role": "Developer",
+    "years_of_experience": 6, "worktype": "remote", "employment_type": "ft", "salary_min": 100000,
+    "salary_max": 140000, "salary_currency": "usd", "visa_status": "us_citizen",
+}
+
+
+@pytest.fixture(scope="module")
+def users(db):
+    """A candidate, and an admin with a recruiter on the same company"""
+    from sqlmodel import Session
+    with Session(db) as session:
+        candidate_user, _ = make_candidate(session, "ryw-cand@example.com")
+        admin, primary = make_company(session, "ryw-admin@example.com", role=UserRole.ADMIN, is_primary_account=True)
+        _, member = make_company(session, "ryw-rec@example.com", employee_type="RECRUITER",
+                                 parent_company_id=primary.id)
+        for row in (candidate_user, admin, member):
+            session.refresh(row)
+        session.expunge_all()
+    return candidate_user, admin, member
+
+@pytest.fixture(autouse=True)
+def no_pins():
+    primary_pins.clear()
+
+
+def _pinned_after(user, response):
+    assert response.status_code == 200, response.text
+    pinned = primary_pins.is_pinned(user.id)
+    primary_pins.clear()
+    return pinned
+
+
+def test_job_profile_writes_pin(client, users):
+    candidate_user, _, _ = users
+    headers = auth_headers(candidate_user)
+    created = client.post("/candidates/job-profiles", json=JOB_PROFILE, headers=headers)
+    assert _pinned_after(candidate_user, created)
+    job_profile_id = created.json()["job_profile_id"]
+    assert _pinned_after(candidate_user, client.put(
+        f"/candidates/job-profiles/{job_profile_id}", json={**JOB_PROFILE, "years_of_experience": 7}, headers=headers
+    ))
+    assert _pinned_after(candidate_user, client.delete(f"/candidates/job-profiles/{job_profile_id}", headers=headers))
+
+
+def test_team_writes_pin(client, users):
+    _, admin, member = users
+    headers = auth_headers(admin)
+    assert _pinned_after(admin, client.put(
+        f"/company/team/members/{member.id}/role", params={"new_role": "hr"}, headers=headers
+    ))
+    assert _pinned_after(admin, client.delete(f"/company/team/members/{member.id}", headers=headers))
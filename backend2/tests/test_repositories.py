@@ -0,0 +1,38 @@
+"""Batched dashboard reads with load_candidate_rows"""
+
+import pytest
+
+from conftest import auth_headers, make_candidate_profile, make_company_posting, make_job_posting
+from app.models import Skill, Swipe
+
+
+@pytest.fixture(scope="module")
+def shortlist(db):
+    """A recruiter who shortlisted one profile for two postings, the second since deleted"""
+    from sqlmodel import Session
+    with Session(db) as session:
+        _, profile = make_candidate_profile(session, "rep-cand@example.com")
+        recruiter, posting = make_company_posting(session, "rep-rec@example.com")
+        postings = [posting, make_job_posting(session, posting.company_id)]
+        session.add(Skill(job_profile_id=profile.id, skill_name="SAP ABAP", skill_category="technical"))
+        session.add_all([
+            Swipe(candidate_id=profile.candidate_id, company_id=posting.company_id, job_profile_id=profile.id,
+                  job_posting_id=posting.id, action="like", action_by="recruiter")
+            for posting in postings
+        ])
+        session.commit()
+        # SQLite does not enforce the foreign key, like a delete landing between two reads
+        session.delete(postings[1])
+        session.commit()
+        session.refresh(recruiter)
+        session.refresh(postings[0])
+        session.expunge_all()
+    return recruiter, postings[0]
+
+def test_shortlist_skips_rows_whose_posting_is_gone(client, shortlist):
+    recruiter, posting = shortlist
+    response = client.get("/dashboard/recruiter/shortlist", headers=auth_headers(recruiter))
+    assert response.status_code == 200, response.text
+    rows = response.json()
+    assert [row["job_posting"]["id"] for row in rows] == [posting.id]
+    assert [skill["skill_name"] for skill in rows[0]["job_profile"]["skills"]] == ["SAP ABAP"]
@@ -0,0 +1,98 @@
+"""posting_score_bound against score_pair, over generated pairs and weights"""
+
+import json
+import random
+
+import pytest
+from sqlmodel import Session, select
+
+from conftest import make_company
+from app.compensation import normalize_compensation
+from app.geo import resolve
+from app.models import CurrencyType, EmploymentType, JobPosting, JobProfile, WorkType
+from app.scoring import ProfileFeatures, ScoringWeights, posting_features, posting_score_bound, score_pair
+from app.search_index import posting_index
+
+VENDORS = ["SAP", "Oracle", "Workday"]
+PRODUCT_TYPES = ["ERP", "HCM"]
+ROLES = ["Developer", "Consultant"]
+SKILLS = [
+    "Python", "SQL", "PL/SQL", "React", "React Native", "AWS", "AWS Solutions Architect", "golang",
+    "Oracle Fusion", "Oracle Fusion Financials", "SAP ABAP", "Leadership",
+]
+SENIORITY = ["0-2", "3-5", "5-8", "10+", "Senior", ""]
+POSTING_LOCATIONS = ["Remote", "Austin, TX", "Dallas, TX / Remote", "Berlin", "New York, NY", "Texas", "", "Mars"]
+PREFERENCES = [("Austin", "TX", "US"), ("Remote", None, None), (None, "TX", "US"), ("Berlin", None, "DE"),
+               ("Brooklyn", "NY", "US"), ("Atlantis", None, None)]
+PAY_TYPES = [None, "annually", "hourly"]
+
+
+def _salary(rng: random.Random):
+    low = rng.choice([0, 40, 60, 80000, 100000, 140000])
+    return low, rng.choice([low, low * 1.3, float("inf")])
+
+
+def _posting(rng: random.Random, company_id: int) -> JobPosting:
+    salary_min, salary_max = _salary(rng)
+    return JobPosting(
+        company_id=company_id, job_title="Generated", product_vendor=rng.choice(VENDORS),
+        product_type=rng.choice(PRODUCT_TYPES), job_role=rng.choice(ROLES), seniority_level=rng.choice(SENIORITY),
+        worktype=rng.choice(list(WorkType)), location=rng.choice(POSTING_LOCATIONS),
+        employment_type=EmploymentType.FT, start_date="2024-01-01", salary_min=salary_min, salary_max=salary_max,
+        salary_currency=rng.choice(list(CurrencyType)), pay_type=rng.choice(PAY_TYPES), job_description="Generated",
+        required_skills=json.dumps(rng.sample(SKILLS, rng.randint(0, 4))),
+    )
+
+
+def _profile(rng: random.Random) -> ProfileFeatures:
+    salary_min, salary_max = _salary(rng) if rng.random() < 0.8 else (None, None)
+    job_profile = JobProfile(
+        id=0, candidate_id=0, profile_name="Generated", product_vendor=rng.choice(VENDORS),
+        product_type=rng.choice(PRODUCT_TYPES), job_role=rng.choice(ROLES), years_of_experience=rng.randint(0, 12),
+        worktype=rng.choice(list(WorkType)), salary_min=salary_min, salary_max=salary_max,
+        salary_currency=rng.choice(list(CurrencyType)), pay_type=rng.choice(PAY_TYPES),
+        remote_acceptance=rng.choice([None, "yes"]),
+    )
+    normalize_compensation(job_profile)
+    places = [resolve(*preference) for preference in rng.sample(PREFERENCES, rng.randint(0, 3))]
+    return ProfileFeatures.from_profile(job_profile, rng.sample(SKILLS, rng.randint(0, 5)), places)
+
+
+def _weights(rng: random.Random) -> ScoringWeights:
+    product_vendor = rng.randint(0, 20)
+    product_type = product_vendor + rng.randint(0, 15)
+    salary_near = rng.randint(0, 10)
+    return ScoringWeights(
+        product_role=product_type + rng.randint(0, 15), product_type=product_type, product_vendor=product_vendor,
+        skills=rng.randint(0, 40), experience=rng.randint(0, 30), experience_unparsed=rng.randint(0, 30),
+        experience_unparsed_years=rng.randint(0, 8), salary_overlap=salary_near + rng.randint(0, 10),
+        salary_near=salary_near, salary_near_ratio=rng.uniform(1.0, 1.5), location=rng.randint(0, 20),
+        worktype_bonus=rng.randint(0, 10),
+    )
+
+
+@pytest.fixture(scope="module")
+def postings(db):
+    """Generated postings, stored and indexed"""
+    rng = random.Random(2024)
+    with Session(db) as session:
+        _, company = make_company(session, "sc-rec@example.com")
+        session.add_all([_posting(rng, company.id) for _ in range(80)])
+        session.commit()
+        posting_index.load(session)
+        yield session, session.exec(select(JobPosting)).all()
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_bound_is_at_least_the_score(postings, seed):
+    session, stored = postings
+    rng = random.Random(seed)
+    weights = _weights(rng)
+    for _ in range(8):
+        profile = _profile(rng)
+        bounds = dict(session.exec(
+            select(JobPosting.id, posting_score_bound(profile, *posting_index.posting_hits(profile), weights))
+        ).all())
+        for job_posting in stored:
+            score = score_pair(posting_features(job_posting), profile, weights)["score"]
+            assert bounds[job_posting.id] >= score, (job_posting, profile, weights)
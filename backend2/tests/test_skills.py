@@ -0,0 +1,37 @@
+"""SkillDictionary matching of required skills against a candidate's skills"""
+
+import pytest
+
+from app.skills import skill_dictionary
+
+
+def _meets(required, candidate_skills):
+    return bool(skill_dictionary.ids(required) & skill_dictionary.covered_ids(candidate_skills))
+
+
+@pytest.mark.parametrize("required, candidate_skills", [
+    ("Oracle Fusion Financials", ["Oracle Fusion SCM"]),
+    ("PL/SQL", ["SQL"]),
+    ("React", ["React Native"]),
+    ("Go", ["Google Analytics"]),
+])
+def test_unmet(required, candidate_skills):
+    assert not _meets(required, candidate_skills)
+
+
+@pytest.mark.parametrize("required, candidate_skills", [
+    ("Python", ["python"]),
+    ("Go", ["golang"]),
+    ("PL/SQL", ["pl/sql"]),
+    ("Oracle Fusion Financials", ["Oracle Fusion Financials"]),
+    ("AWS", ["AWS Solutions Architect"]),
+    ("Oracle Fusion", ["Oracle Fusion SCM"]),
+])
+def test_met(required, candidate_skills):
+    assert _meets(required, candidate_skills)
+
+
+def test_covered_ids_of_a_non_catalog_skill():
+    covered = skill_dictionary.covered_ids(["React Native"])
+    assert skill_dictionary.ids("React Native") <= covered
+    assert not skill_dictionary.ids("React") & covered
@@ -0,0 +1,47 @@
+"""Swipe deck routes, dealing real decks from stored rows"""
+
+import pytest
+
+from conftest import auth_headers, make_candidate_profile, make_company_posting
+from app.models import Skill
+
+
+@pytest.fixture(scope="module")
+def deck_rows(db):
+    from sqlmodel import Session
+    with Session(db) as session:
+        candidate_user, profile = make_candidate_profile(session, "cand@example.com")
+        recruiter_user, posting = make_company_posting(session, "rec@example.com", required_skills='["SAP ABAP"]')
+        session.add(Skill(job_profile_id=profile.id, skill_name="SAP ABAP", skill_category="technical"))
+        session.commit()
+        for row in (candidate_user, recruiter_user, profile, posting):
+            session.refresh(row)
+        session.expunge_all()
+    return candidate_user, recruiter_user, profile, posting
+
+def test_candidate_deck_serializes_stored_postings(client, deck_rows):
+    candidate_user, _, profile, posting = deck_rows
+    response = client.get(
+        f"/dashboard/candidate/deck?job_profile_id={profile.id}", headers=auth_headers(candidate_user)
+    )
+    assert response.status_code == 200, response.text
+    cards = response.json()["cards"]
+    assert [card["job_posting"]["id"] for card in cards] == [posting.id]
+    job = cards[0]["job_posting"]
+    assert (job["worktype"], job["employment_type"], job["salary_currency"]) == ("remote", "ft", "usd")
+    assert job["job_description"] == "Build SAP things"
+    assert cards[0]["match_percentage"] >= 40
+
+
+def test_recruiter_deck_serializes_stored_profiles(client, deck_rows):
+    _, recruiter_user, profile, posting = deck_rows
+    response = client.get(
+        f"/dashboard/recruiter/deck?job_posting_id={posting.id}", headers=auth_headers(recruiter_user)
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    cards = body["cards"]
+    assert [card["job_profile"]["id"] for card in cards] == [profile.id]
+    job_profile = cards[0]["job_profile"]
+    assert (job_profile["worktype"], job_profile["employment_type"], job_profile["visa_status"]) == ("remote", "ft", "us_citizen")
+    assert body["analytics"] == {"shortlisted_count": 0, "required_count": 0, "interview_count": 0, "offered_count": 0}
@@ -0,0 +1,79 @@
+"""Swipe idempotency keys, scoped to the swiping actor"""
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+
+from conftest import make_candidate_profile, make_company_posting, make_job_posting
+from app import swipe_service
+from app.identity import Principal
+from app.models import Match, Swipe, UserRole
+from app.swipe_service import BatchSwipe, SwipeTarget, record_swipe, record_swipe_batch
+
+
+@pytest.fixture(scope="module")
+def targets(db):
+    """Two candidates, each with a profile, and two postings of one company"""
+    from sqlmodel import Session
+    with Session(db) as session:
+        profiles = [make_candidate_profile(session, f"sw-cand{i}@example.com")[1] for i in range(2)]
+        _, posting = make_company_posting(session, "sw-rec@example.com")
+        postings = [posting, make_job_posting(session, posting.company_id)]
+        return [
+            [SwipeTarget(profile.candidate_id, posting.company_id, profile.id, posting.id) for posting in postings]
+            for profile in profiles
+        ]
+
+def test_candidates_may_share_a_key(session, targets):
+    assert record_swipe(session, targets[0][0], "like", "candidate", "key-1")
+    assert record_swipe(session, targets[1][0], "like", "candidate", "key-1")
+    session.commit()
+
+
+def test_reused_key_is_scoped_to_the_candidate(session, targets):
+    assert not record_swipe(session, targets[0][0], "like", "candidate", "key-1")
+    with pytest.raises(HTTPException) as raised:
+        record_swipe(session, targets[0][1], "like", "candidate", "key-1")
+    assert raised.value.status_code == 422
+
+
+def test_recruiter_keys_are_apart_from_candidate_keys(session, targets):
+    assert record_swipe(session, targets[0][0], "like", "recruiter", "key-1")
+    session.commit()
+    company_id = targets[0][0].company_id
+    principal = Principal(user_id=0, email="sw-rec@example.com", full_name="Rec", role=UserRole.RECRUITER,
+                          is_active=True, company_id=company_id, company_ids=(company_id,))
+    target = targets[1][1]
+    results = record_swipe_batch(session, principal, [
+        BatchSwipe("like", target.job_profile_id, target.job_posting_id, target.candidate_id, "key-1"),
+    ])
+    assert [result["status"] for result in results] == ["conflict"]
+    assert session.query(Swipe).filter(Swipe.idempotency_key == "key-1").count() == 3
+
+
+def test_batch_reports_rows_a_concurrent_request_wrote_first(session, targets, monkeypatch):
+    company_id = targets[0][0].company_id
+    principal = Principal(user_id=0, email="sw-rec@example.com", full_name="Rec", role=UserRole.RECRUITER,
+                          is_active=True, company_id=company_id, company_ids=(company_id,))
+    raced, reused, fresh = targets[1][0], targets[1][1], targets[0][1]
+    insert_swipes = swipe_service._insert_swipes
+
+    def racing_insert(session, rows):
+        # Lands between the batch's lookups and its insert: the same swipe, and key-2 on another one
+        session.add_all([
+            Swipe(**raced._asdict(), action="like", action_by="recruiter"),
+            Swipe(**raced._asdict(), action="pass", action_by="recruiter", idempotency_key="key-2"),
+        ])
+        session.flush()
+        return insert_swipes(session, rows)
+
+    monkeypatch.setattr(swipe_service, "_insert_swipes", racing_insert)
+    results = record_swipe_batch(session, principal, [
+        BatchSwipe("like", raced.job_profile_id, raced.job_posting_id, raced.candidate_id),
+        BatchSwipe("like", reused.job_profile_id, reused.job_posting_id, reused.candidate_id, "key-2"),
+        BatchSwipe("like", fresh.job_profile_id, fresh.job_posting_id, fresh.candidate_id),
+    ])
+    assert [result["status"] for result in results] == ["duplicate", "conflict", "created"]
+    liked = set(session.exec(select(Match.job_posting_id, Match.candidate_id).where(Match.company_liked == True)).all())
+    assert (fresh.job_posting_id, fresh.candidate_id) in liked
+    assert (raced.job_posting_id, raced.candidate_id) not in liked
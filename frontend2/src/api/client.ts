@@ -163,8 +163,8 @@ export const apiClient = {
     api.post(`/matches/${matchId}/ask-to-apply`),
 
   // Recommendations
-  getJobRecommendations: (jobId: number) =>
-    api.get(`/recommendations/job/${jobId}`),
+  getJobRecommendations: (jobId: number, limit?: number, cursor?: string) =>
+    api.get(`/recommendations/job/${jobId}`, { params: { limit, cursor } }),
   
   getRecommendationsDashboard: () =>
     api.get('/recommendations/dashboard'),
@@ -203,8 +203,13 @@ export const apiClient = {
     api.delete(`/applications/${applicationId}`),
   
   // Dashboard - Candidate
-  getCandidateRecommendations: (jobProfileId: number) =>
-    api.get(`/dashboard/candidate/recommendations?job_profile_id=${jobProfileId}`),
+  // Next page cursor is returned in the X-Next-Cursor response header
+  getCandidateRecommendations: (jobProfileId: number, limit?: number, cursor?: string) =>
+    api.get('/dashboard/candidate/recommendations', { params: { job_profile_id: jobProfileId, limit, cursor } }),
+  
+  // Next unswiped jobs, dealt from the precomputed swipe deck
+  getCandidateDeck: (jobProfileId: number, limit?: number) =>
+    api.get('/dashboard/candidate/deck', { params: { job_profile_id: jobProfileId, limit } }),
   
   getRecruiterInvites: () =>
     api.get('/dashboard/candidate/recruiter-invites'),
@@ -222,6 +227,10 @@ export const apiClient = {
   getRecruiterRecommendations: (jobPostingId: number) =>
     api.get(`/dashboard/recruiter/recommendations?job_posting_id=${jobPostingId}`),
   
+  // Next candidates not yet swiped on, dealt from the precomputed swipe deck, with analytics
+  getRecruiterDeck: (jobPostingId: number, limit?: number) =>
+    api.get('/dashboard/recruiter/deck', { params: { job_posting_id: jobPostingId, limit } }),
+  
   getRecruiterShortlist: (jobPostingId?: number) =>
     api.get('/dashboard/recruiter/shortlist' + (jobPostingId ? `?job_posting_id=${jobPostingId}` : '')),
   
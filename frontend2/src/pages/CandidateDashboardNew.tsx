@@ -4,6 +4,9 @@ import { useNavigate } from 'react-router-dom';
 import '../styles/ModernDashboard.css';
 import '../styles/CandidateApplied.css';
 
+// Cards dealt per fetch; swiping re-deals from the server's swipe deck
+const DECK_SIZE = 50;
+
 const CandidateDashboard: React.FC = () => {
   const navigate = useNavigate();
   const [activeTab, setActiveTab] = useState('recommendations');
@@ -46,7 +49,7 @@ const CandidateDashboard: React.FC = () => {
   // Keyboard navigation for recommendation cards
   const handleKeyDown = useCallback((e: KeyboardEvent) => {
     if (activeTab !== 'recommendations' || !recommendations?.length) return;
-    const total = recommendations.filter((r: any) => !r.already_swiped).length;
+    const total = recommendations.length;
     if (e.key === 'ArrowRight') {
       setRecCardIndex(prev => Math.min(prev + 1, total - 1));
     } else if (e.key === 'ArrowLeft') {
@@ -88,9 +91,9 @@ const CandidateDashboard: React.FC = () => {
     console.log('[API CALL] Fetching recommendations for profile:', selectedProfileId);
     setLoading(true);
     try {
-      const response = await apiClient.getCandidateRecommendations(selectedProfileId);
-      console.log('[API SUCCESS] Recommendations fetched, count:', response.data.length);
-      setRecommendations(response.data);
+      const response = await apiClient.getCandidateDeck(selectedProfileId, DECK_SIZE);
+      console.log('[API SUCCESS] Recommendations fetched, count:', response.data.cards.length);
+      setRecommendations(response.data.cards);
     } catch (error) {
       console.error('[API ERROR] Failed to fetch recommendations:', error);
     } finally {
@@ -373,29 +376,12 @@ const CandidateDashboard: React.FC = () => {
                 <path d="M21 21l-4.35-4.35"/>
               </svg>
             </div>
-            <h3 className="empty-title">No recommendations yet</h3>
-            <p className="empty-subtitle">We're analyzing your profile to find the best matching opportunities. Check back soon.</p>
+            <h3 className="empty-title">No new recommendations</h3>
+            <p className="empty-subtitle">You're all caught up. New matching opportunities will show up here as they're posted.</p>
           </div>
         ) : (() => {
-          const visibleRecs = recommendations.filter((r: any) => !r.already_swiped);
-          const actionedRecs = recommendations.filter((r: any) => r.already_swiped);
-          if (visibleRecs.length === 0) {
-            return (
-              <div className="empty-state-modern">
-                <div className="empty-icon-professional">
-                  <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="1.5">
-                    <polyline points="20 6 9 17 4 12"/>
-                  </svg>
-                </div>
-                <h3 className="empty-title">All Caught Up!</h3>
-                <p className="empty-subtitle">
-                  You have reviewed all {actionedRecs.length} job{actionedRecs.length !== 1 ? 's' : ''}.
-                </p>
-              </div>
-            );
-          }
-          const safeIndex = Math.min(recCardIndex, visibleRecs.length - 1);
-          const rec = visibleRecs[safeIndex];
+          const safeIndex = Math.min(recCardIndex, recommendations.length - 1);
+          const rec = recommendations[safeIndex];
           return (
             <div className="carousel-container">
               {/* Navigation Header */}
@@ -410,13 +396,13 @@ const CandidateDashboard: React.FC = () => {
                 <div className="carousel-counter">
                   <span className="carousel-current">{safeIndex + 1}</span>
                   <span className="carousel-separator">of</span>
-                  <span className="carousel-total">{visibleRecs.length}</span>
+                  <span className="carousel-total">{recommendations.length}</span>
                   <span className="carousel-hint">jobs</span>
                 </div>
                 <button
                   className="carousel-arrow-btn"
-                  onClick={() => setRecCardIndex(Math.min(safeIndex + 1, visibleRecs.length - 1))}
-                  disabled={safeIndex === visibleRecs.length - 1}
+                  onClick={() => setRecCardIndex(Math.min(safeIndex + 1, recommendations.length - 1))}
+                  disabled={safeIndex === recommendations.length - 1}
                 >
                   <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2.5"><polyline points="9 18 15 12 9 6"/></svg>
                 </button>
@@ -507,7 +493,7 @@ const CandidateDashboard: React.FC = () => {
                   <div className="job-actions-modern">
                     <div className="action-buttons-grid">
                       <button
-                        onClick={(e) => { e.stopPropagation(); handleSwipePass(rec.job_posting.id); setRecCardIndex(Math.min(safeIndex, visibleRecs.length - 2)); }}
+                        onClick={(e) => { e.stopPropagation(); handleSwipePass(rec.job_posting.id); setRecCardIndex(Math.min(safeIndex, recommendations.length - 2)); }}
                         className="action-btn secondary"
                       >
                         <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2">
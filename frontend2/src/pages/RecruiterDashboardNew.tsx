@@ -4,6 +4,9 @@ import { useNavigate } from 'react-router-dom';
 import '../styles/ModernDashboard.css';
 import '../styles/RecruiterApplications.css';
 
+// Cards dealt per fetch; swiping re-deals from the server's swipe deck
+const DECK_SIZE = 50;
+
 const RecruiterDashboard: React.FC = () => {
   console.log('[COMPONENT MOUNT] RecruiterDashboard loaded');
   const navigate = useNavigate();
@@ -110,8 +113,8 @@ const RecruiterDashboard: React.FC = () => {
 
   // Keyboard navigation for recommendation cards
   const handleKeyDown = useCallback((e: KeyboardEvent) => {
-    if (activeTab !== 'recommendations' || !recommendations?.recommendations?.length) return;
-    const total = recommendations.recommendations.filter((r: any) => !r.already_actioned).length;
+    if (activeTab !== 'recommendations' || !recommendations?.cards?.length) return;
+    const total = recommendations.cards.length;
     if (e.key === 'ArrowRight') {
       setRecCardIndex(prev => Math.min(prev + 1, total - 1));
     } else if (e.key === 'ArrowLeft') {
@@ -144,7 +147,7 @@ const RecruiterDashboard: React.FC = () => {
     console.log('[API CALL] Fetching recruiter recommendations for job:', selectedJobId);
     setLoading(true);
     try {
-      const response = await apiClient.getRecruiterRecommendations(selectedJobId);
+      const response = await apiClient.getRecruiterDeck(selectedJobId, DECK_SIZE);
       console.log('[API SUCCESS] Recommendations fetched with analytics:', response.data);
       setRecommendations(response.data);
     } catch (error) {
@@ -342,7 +345,7 @@ const RecruiterDashboard: React.FC = () => {
           </div>
         </div>
 
-        {recommendations.recommendations.length === 0 ? (
+        {recommendations.cards.length === 0 ? (
           <div className="empty-state-modern">
             <div className="empty-icon-professional">
               <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="1.5">
@@ -352,31 +355,14 @@ const RecruiterDashboard: React.FC = () => {
                 <path d="M16 3.13a4 4 0 0 1 0 7.75"/>
               </svg>
             </div>
-            <h3 className="empty-title">No Candidates Found</h3>
+            <h3 className="empty-title">No New Candidates</h3>
             <p className="empty-subtitle">
-              No matching candidates found for this job posting yet. Check back later as new candidates join the platform.
+              You're all caught up on this job posting. Check back later as new candidates join the platform.
             </p>
           </div>
         ) : (() => {
-          const visibleRecs = recommendations.recommendations.filter((r: any) => !r.already_actioned);
-          const actionedRecs = recommendations.recommendations.filter((r: any) => r.already_actioned);
-          if (visibleRecs.length === 0) {
-            return (
-              <div className="empty-state-modern">
-                <div className="empty-icon-professional">
-                  <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="1.5">
-                    <polyline points="20 6 9 17 4 12"/>
-                  </svg>
-                </div>
-                <h3 className="empty-title">All Caught Up!</h3>
-                <p className="empty-subtitle">
-                  You have reviewed all {actionedRecs.length} candidate{actionedRecs.length !== 1 ? 's' : ''} for this position.
-                </p>
-              </div>
-            );
-          }
-          const safeIndex = Math.min(recCardIndex, visibleRecs.length - 1);
-          const rec = visibleRecs[safeIndex];
+          const safeIndex = Math.min(recCardIndex, recommendations.cards.length - 1);
+          const rec = recommendations.cards[safeIndex];
           return (
             <div className="carousel-container">
               {/* Navigation Header */}
@@ -391,13 +377,13 @@ const RecruiterDashboard: React.FC = () => {
                 <div className="carousel-counter">
                   <span className="carousel-current">{safeIndex + 1}</span>
                   <span className="carousel-separator">of</span>
-                  <span className="carousel-total">{visibleRecs.length}</span>
+                  <span className="carousel-total">{recommendations.cards.length}</span>
                   <span className="carousel-hint">candidates</span>
                 </div>
                 <button
                   className="carousel-arrow-btn"
-                  onClick={() => setRecCardIndex(Math.min(safeIndex + 1, visibleRecs.length - 1))}
-                  disabled={safeIndex === visibleRecs.length - 1}
+                  onClick={() => setRecCardIndex(Math.min(safeIndex + 1, recommendations.cards.length - 1))}
+                  disabled={safeIndex === recommendations.cards.length - 1}
                 >
                   <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2.5"><polyline points="9 18 15 12 9 6"/></svg>
                 </button>
@@ -518,7 +504,7 @@ const RecruiterDashboard: React.FC = () => {
                   <div className="candidate-actions-modern">
                     <div className="action-buttons-grid">
                       <button
-                        onClick={(e) => { e.stopPropagation(); handleRecruiterPass(rec.candidate.id, rec.job_profile.id); setRecCardIndex(Math.min(safeIndex, visibleRecs.length - 2)); }}
+                        onClick={(e) => { e.stopPropagation(); handleRecruiterPass(rec.candidate.id, rec.job_profile.id); setRecCardIndex(Math.min(safeIndex, recommendations.cards.length - 2)); }}
                         className="action-btn secondary"
                       >
                         <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2">